@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Frame Computation Benchmark
+
+Times server.FrameGenerator against the previous per-light frame code for
+every animation at several light counts (virtual lights, alternating
+gradient and solid), and checks that both produce the same colours for the
+deterministic animations. Run it with and without NumPy installed to
+compare the batched and pure-Python paths.
+
+Usage:
+    python3 bench/bench_frames.py [--lights 30,200,1000] [--frames 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("HUE_USER", "bench")  # server.py refuses to import without one
+
+import server  # noqa: E402
+
+
+def legacy_frame(anim, palette, lights, phase, brightness, rng):
+    """The pre-FrameGenerator frame code: one light at a time"""
+    length = len(palette["x"])
+    count = len(lights)
+    frame = []
+    for idx, light_id in enumerate(lights):
+        mode = anim["phase"]
+        if mode == "offset":
+            light_phase = (phase + idx * anim["offset_mul"] // anim["offset_div"]) % length
+        elif mode == "jitter":
+            light_phase = (phase + rng.randrange(4)) % length
+        elif mode == "random":
+            light_phase = rng.randrange(length)
+        else:
+            light_phase = idx * length // count
+        random_bri = None
+        if "random_brightness" in anim:
+            random_bri = rng.randrange(*anim["random_brightness"])
+        if server.is_gradient_light(light_id):
+            bri = anim["gradient_brightness"]
+            if bri is None:
+                bri = brightness
+            elif bri == "random":
+                bri = random_bri
+            points = []
+            for offset in (0, 2, 4, 6, 8):
+                p = (light_phase + offset) % length
+                points.append({"color": {"xy": {"x": palette["x"][p], "y": palette["y"][p]}},
+                               "dimming": {"brightness": palette["b"][p]}})
+            payload = {"gradient": {"points": points}, "on": {"on": True},
+                       "dynamics": {"duration": anim["transition"]}, "dimming": {"brightness": bri}}
+        else:
+            if anim["solid_brightness"] == "random":
+                bri = random_bri
+            else:
+                bri = palette["b"][light_phase] * brightness // 100
+            payload = {"on": {"on": True},
+                       "color": {"xy": {"x": palette["x"][light_phase], "y": palette["y"][light_phase]}},
+                       "dimming": {"brightness": bri}, "dynamics": {"duration": anim["transition"]}}
+        frame.append((light_id, payload))
+    return frame
+
+
+def virtual_lights(count):
+    """Virtual light IDs, every other one marked solid"""
+    lights = [str(uuid.UUID(int=i + 1)) for i in range(count)]
+    server.SOLID_LIGHTS.update(lights[1::2])
+    return lights
+
+
+def same_colours(a, b):
+    return len(a) == len(b) and all(
+        light_a == light_b and _flatten(payload_a) == _flatten(payload_b)
+        for (light_a, payload_a), (light_b, payload_b) in zip(a, b))
+
+
+def _flatten(value):
+    if isinstance(value, dict):
+        return {key: _flatten(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_flatten(item) for item in value]
+    return round(float(value), 6) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark animation frame computation")
+    parser.add_argument("--lights", default="30,200,1000", help="Comma-separated light counts")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--palette", default=next(iter(server.PALETTES)))
+    args = parser.parse_args()
+
+    palette = server.PALETTES[args.palette]
+    print(f"FrameGenerator path: {'numpy ' + server.np.__version__ if server.np is not None else 'pure Python'}")
+    for count in (int(c) for c in args.lights.split(",")):
+        lights = virtual_lights(count)
+        print(f"{count} lights:")
+        for name, anim in server.ANIMATIONS.items():
+            rng = server.random.Random(1)
+            started = time.perf_counter()
+            for phase in range(args.frames):
+                legacy = legacy_frame(anim, palette, lights, phase, 90, rng)
+            legacy_time = (time.perf_counter() - started) / args.frames
+
+            generator = server.FrameGenerator(anim, palette, lights, 90, server.random.Random(1))
+            started = time.perf_counter()
+            for phase in range(args.frames):
+                batched = generator.frame(phase)
+            batched_time = (time.perf_counter() - started) / args.frames
+
+            check = ""
+            if anim["phase"] in ("offset", "spread") and "random_brightness" not in anim:
+                check = "  ok" if same_colours(legacy, batched) else "  MISMATCH"
+            print(f"  {name:<11} legacy {legacy_time * 1000:7.2f} ms/frame  "
+                  f"generator {batched_time * 1000:7.2f} ms/frame  "
+                  f"({legacy_time / batched_time:4.1f}x){check}")
+
+
+if __name__ == '__main__':
+    main()
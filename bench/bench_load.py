@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Server Load Benchmark
+
+Runs server.py against the fake bridge (bench/fake_bridge.py) and replays
+each animation across growing numbers of lights while N control-panel
+clients hit the server the way the web UI does: an /api/events stream plus
+scene status polls and proxied light reads. For every animation x light
+count it reports bridge commands/s, panel request p50/p99, EventStream
+events delivered to panels, and the server's CPU and memory use.
+
+The server runs as a subprocess with its own scene state and a rooms file
+defining "bench-<N>" rooms over the fake bridge's virtual lights, so
+nothing in the checkout is touched. Admission control is lifted so every
+scenario runs; the bridge rate limits are server.py's normal defaults.
+
+Usage:
+    python3 bench/bench_load.py [--lights 1,10,50,200] [--animations wave,disco]
+        [--clients 5] [--duration 20] [--mode threaded|asyncio]
+        [--latency 20] [--jitter 10] [--rate-limit 0] [--error-rate 0] [--json out.json]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("HUE_USER", "bench")  # server.py refuses to import without one
+
+import server  # noqa: E402
+from fake_bridge import FakeBridge, virtual_light_id  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SERVER_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server.py")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProcessSampler:
+    """CPU seconds and RSS of a process: psutil if installed, else /proc, else ps"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.process = psutil.Process(pid) if psutil else None
+
+    def cpu_seconds(self):
+        if self.process:
+            times = self.process.cpu_times()
+            return times.user + times.system
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        except OSError:
+            out = subprocess.run(["ps", "-o", "cputime=", "-p", str(self.pid)],
+                                 capture_output=True, text=True).stdout.strip()
+            seconds = 0
+            for part in out.replace("-", ":").split(":"):
+                seconds = seconds * 60 + int(part or 0)
+            return seconds
+
+    def rss_mb(self):
+        if self.process:
+            return self.process.memory_info().rss / 1e6
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024 / 1e6
+        except OSError:
+            out = subprocess.run(["ps", "-o", "rss=", "-p", str(self.pid)],
+                                 capture_output=True, text=True).stdout.strip()
+            return int(out or 0) * 1024 / 1e6
+        return 0.0
+
+
+class PanelClient:
+    """One browser tab: an /api/events stream plus status polls and light reads"""
+
+    def __init__(self, port, light_ids, poll_interval, stop_event):
+        self.port = port
+        self.light_ids = light_ids
+        self.poll_interval = poll_interval
+        self.stop_event = stop_event
+        self.latencies = []
+        self.errors = 0
+        self.events = 0
+        self.threads = []
+
+    def start(self):
+        for target in (self.poll, self.listen):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+    def poll(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        index = 0
+        while not self.stop_event.is_set():
+            light_id = self.light_ids[index % len(self.light_ids)]
+            index += 1
+            for path in ("/api/scenes/status", f"/api/clip/v2/resource/light/{light_id}"):
+                started = time.perf_counter()
+                try:
+                    conn.request("GET", path)
+                    response = conn.getresponse()
+                    response.read()
+                    if response.status >= 400:
+                        self.errors += 1
+                    self.latencies.append(time.perf_counter() - started)
+                except (OSError, http.client.HTTPException):
+                    self.errors += 1
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+            self.stop_event.wait(self.poll_interval)
+        conn.close()
+
+    def listen(self):
+        try:
+            sock = socket.create_connection(("127.0.0.1", self.port), timeout=1)
+            sock.sendall(b"GET /api/events HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n")
+        except OSError:
+            self.errors += 1
+            return
+        with sock:
+            while not self.stop_event.is_set():
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+                if not data:
+                    return
+                self.events += data.count(b"\nevent: ") + data.startswith(b"event: ")
+
+
+class ServerProcess:
+    """server.py under test, pointed at the fake bridge with private state files"""
+
+    def __init__(self, bridge_address, light_counts, mode, workdir):
+        self.port = free_port()
+        rooms_file = os.path.join(workdir, "rooms.json")
+        with open(rooms_file, "w") as f:
+            json.dump({"rooms": {f"bench-{count}": [virtual_light_id(i) for i in range(count)]
+                                 for count in light_counts}}, f)
+        env = dict(os.environ,
+                   HUE_BRIDGE=f"{bridge_address[0]}:{bridge_address[1]}",
+                   HUE_USER="bench", PORT=str(self.port), SERVER_MODE=mode,
+                   ANIMATION_BUDGET="1000000", SCENE_STATE_FILE=os.path.join(workdir, "state.json"),
+                   ROOMS_FILE=rooms_file, PYTHONUNBUFFERED="1")
+        self.log = open(os.path.join(workdir, "server.log"), "w")
+        self.process = subprocess.Popen([sys.executable, SERVER_PY], env=env,
+                                        stdout=self.log, stderr=subprocess.STDOUT)
+        self.sampler = ProcessSampler(self.process.pid)
+
+    def request(self, method, path, body=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        try:
+            conn.request(method, path, json.dumps(body) if body is not None else None,
+                         {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read() or b"{}")
+        finally:
+            conn.close()
+
+    def wait_ready(self, timeout=15):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server.py exited with {self.process.returncode}, see {self.log.name}")
+            try:
+                if self.request("GET", "/health")[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"server.py not ready after {timeout}s, see {self.log.name}")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+def run_scenario(server_proc, bridge, animation, palette, light_count, clients, duration, poll_interval):
+    status, body = server_proc.request("POST", "/api/scenes/start", {
+        "palette": palette, "animation": animation, "rooms": [f"bench-{light_count}"]})
+    if status != 200:
+        return {"animation": animation, "lights": light_count, "error": body.get("error", status)}
+
+    light_ids = [virtual_light_id(i) for i in range(light_count)]
+    stop_event = threading.Event()
+    before = bridge.snapshot()
+    cpu_before = server_proc.sampler.cpu_seconds()
+    started = time.monotonic()
+    panels = [PanelClient(server_proc.port, light_ids, poll_interval, stop_event).start()
+              for _ in range(clients)]
+    peak_rss = 0.0
+    while time.monotonic() - started < duration:
+        time.sleep(0.5)
+        peak_rss = max(peak_rss, server_proc.sampler.rss_mb())
+    stop_event.set()
+    elapsed = time.monotonic() - started
+    cpu = server_proc.sampler.cpu_seconds() - cpu_before
+    after = bridge.snapshot()
+    for panel in panels:
+        panel.join()
+    server_proc.request("POST", "/api/scenes/stop", {"id": body["id"]})
+
+    latencies = [latency for panel in panels for latency in panel.latencies]
+    p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+    return {
+        "animation": animation,
+        "lights": light_count,
+        "bridge_commands_per_s": round((after["puts"] - before["puts"]) / elapsed, 2),
+        "bridge_429": after["rate_limited"] - before["rate_limited"],
+        "panel_requests_per_s": round(len(latencies) / elapsed, 1),
+        "panel_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+        "panel_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        "panel_errors": sum(panel.errors for panel in panels),
+        "panel_events_per_s": round(sum(panel.events for panel in panels) / elapsed, 1),
+        "server_cpu_percent": round(cpu / elapsed * 100, 1),
+        "server_rss_mb": round(peak_rss, 1),
+    }
+
+
+def print_result(result):
+    if "error" in result:
+        print(f"  {result['animation']:<10} {result['lights']:>4} lights  FAILED: {result['error']}")
+        return
+    print(f"  {result['animation']:<10} {result['lights']:>4} lights  "
+          f"{result['bridge_commands_per_s']:6.1f} cmd/s  "
+          f"p50 {result['panel_p50_ms']} ms  p99 {result['panel_p99_ms']} ms  "
+          f"{result['panel_events_per_s']:7.1f} ev/s  "
+          f"cpu {result['server_cpu_percent']:5.1f}%  rss {result['server_rss_mb']:.1f} MB"
+          + (f"  429s={result['bridge_429']}" if result["bridge_429"] else "")
+          + (f"  errors={result['panel_errors']}" if result["panel_errors"] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test server.py against a fake bridge")
+    parser.add_argument("--lights", default="1,10,50,200", help="Comma-separated light counts")
+    parser.add_argument("--animations", default=",".join(server.ANIMATIONS),
+                        help="Comma-separated animations")
+    parser.add_argument("--palette", default=next(iter(server.PALETTES)))
+    parser.add_argument("--clients", type=int, default=5, help="Simulated control panels")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between panel polls")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per scenario")
+    parser.add_argument("--mode", choices=("threaded", "asyncio"), default=server.SERVER_MODE)
+    parser.add_argument("--latency", type=float, default=20, help="Bridge latency (ms)")
+    parser.add_argument("--jitter", type=float, default=10, help="Bridge latency jitter (ms)")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Bridge requests/s before 429 (0 = off)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of random bridge 429/503s")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    light_counts = [int(count) for count in args.lights.split(",")]
+    animations = args.animations.split(",")
+    bridge = FakeBridge(port=free_port(), virtual_lights=max(light_counts), latency_ms=args.latency,
+                        jitter_ms=args.jitter, rate_limit=args.rate_limit,
+                        error_rate=args.error_rate).start()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="hue-bench-") as workdir:
+        server_proc = ServerProcess(bridge.address, light_counts, args.mode, workdir)
+        try:
+            server_proc.wait_ready()
+            print(f"server.py ({args.mode}) on :{server_proc.port}, fake bridge on :{bridge.address[1]}, "
+                  f"{args.clients} panels, {args.duration:g}s per scenario")
+            idle_cpu = server_proc.sampler.cpu_seconds()
+            time.sleep(2)
+            print(f"  idle: cpu {(server_proc.sampler.cpu_seconds() - idle_cpu) / 2 * 100:.1f}%  "
+                  f"rss {server_proc.sampler.rss_mb():.1f} MB")
+            for animation in animations:
+                for light_count in light_counts:
+                    result = run_scenario(server_proc, bridge, animation, args.palette, light_count,
+                                          args.clients, args.duration, args.poll_interval)
+                    results.append(result)
+                    print_result(result)
+        finally:
+            server_proc.stop()
+            bridge.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"mode": args.mode, "clients": args.clients, "duration": args.duration,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
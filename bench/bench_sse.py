@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+EventStream Parser Benchmark
+
+Feeds bursts of bridge EventStream traffic through server.SSEDecoder and
+through the previous string-splitting parser, at several read sizes, and
+reports throughput. Bursts are either synthesized (whole-house animation
+updates: 30 lights with gradients, several events per SSE message) or
+replayed from a raw capture of the bridge stream:
+
+    curl -skN -H "hue-application-key: $HUE_USER" -H "Accept: text/event-stream" \
+        https://$HUE_BRIDGE/eventstream/clip/v2 > capture.sse
+
+Usage:
+    python3 bench/bench_sse.py [--capture capture.sse] [--bursts 200] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("HUE_USER", "bench")  # server.py refuses to import without one
+
+import server  # noqa: E402
+
+
+def legacy_parse(chunks):
+    """The pre-SSEDecoder parser: decode, append to a string, split per event"""
+    count = 0
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.decode('utf-8', 'replace')
+        while '\n\n' in buffer:
+            event_data, buffer = buffer.split('\n\n', 1)
+            for line in event_data.split('\n'):
+                line = line.strip()
+                if line.startswith('data:'):
+                    try:
+                        data = json.loads(line[5:].strip())
+                    except json.JSONDecodeError:
+                        continue
+                    count += len(data) if isinstance(data, list) else 1
+    return count
+
+
+def decoder_parse(chunks):
+    count = 0
+    decoder = server.SSEDecoder()
+    for chunk in chunks:
+        for sse_event in decoder.feed(chunk):
+            count += len(server.bridge_events(sse_event))
+    return count
+
+
+def synthetic_stream(bursts, lights=30, events_per_message=6):
+    """Whole-house animation bursts shaped like real CLIP v2 light updates"""
+    light_ids = [str(uuid.UUID(int=i)) for i in range(lights)]
+    out = bytearray()
+    sequence = 0
+    for burst in range(bursts):
+        for start in range(0, lights, events_per_message):
+            events = []
+            for light_id in light_ids[start:start + events_per_message]:
+                points = [{"color": {"xy": {"x": 0.4 + k / 100, "y": 0.2 + burst % 7 / 100}}}
+                          for k in range(5)]
+                events.append({
+                    "creationtime": "2026-10-18T20:00:00Z",
+                    "id": str(uuid.uuid4()),
+                    "type": "update",
+                    "data": [{"id": light_id, "id_v1": f"/lights/{start}", "type": "light",
+                              "owner": {"rid": light_id, "rtype": "device"},
+                              "dimming": {"brightness": 80.0 + burst % 20},
+                              "gradient": {"points": points},
+                              "on": {"on": True}}],
+                })
+            sequence += 1
+            out += f"id: {1760000000 + burst}:{sequence}\ndata: {json.dumps(events)}\n\n".encode()
+        out += b": hi\n\n"  # Bridge keep-alive comment
+    return bytes(out)
+
+
+def split_chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def run(name, parser, chunks, total_bytes, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        events = parser(chunks)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<10} {total_bytes / best / 1e6:8.1f} MB/s  {events / best:10.0f} events/s  "
+          f"({events} events, {best * 1000:.1f} ms)")
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the EventStream SSE parser")
+    parser.add_argument("--capture", help="Raw EventStream capture to replay")
+    parser.add_argument("--bursts", type=int, default=200, help="Synthetic bursts (ignored with --capture)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, "rb") as f:
+            data = f.read()
+        print(f"Replaying {args.capture}: {len(data) / 1e6:.2f} MB")
+    else:
+        data = synthetic_stream(args.bursts)
+        print(f"Synthetic stream: {args.bursts} whole-house bursts, {len(data) / 1e6:.2f} MB")
+
+    for size in (512, 4096, 65536):
+        chunks = split_chunks(data, size)
+        print(f"read size {size}:")
+        legacy = run("legacy", legacy_parse, chunks, len(data), args.repeat)
+        decoded = run("decoder", decoder_parse, chunks, len(data), args.repeat)
+        if legacy != decoded:
+            print(f"  MISMATCH: legacy={legacy} decoder={decoded}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Fake Hue Bridge
+
+A local stand-in for the bridge's CLIP v2 API so server.py can be measured
+without real hardware. Serves HTTPS with a self-signed certificate (made
+with openssl on first use), light/device/room/grouped_light resources built
+from server.ROOM_LIGHTS plus any number of virtual lights, PUTs that update
+that state, and a /eventstream/clip/v2 feed that reports every change the
+way the bridge does (batched updates every --event-interval seconds).
+
+Bridge behaviour under load can be imitated with a per-request latency
+(plus jitter), a bridge-wide rate limit answered with 429 like the real
+bridge, and a random 429/503 error rate.
+
+Run the server against it with:
+    HUE_BRIDGE=127.0.0.1:9443 HUE_USER=bench python3 server.py
+
+Usage:
+    python3 bench/fake_bridge.py [--port 9443] [--virtual-lights 0] [--latency 20]
+        [--jitter 10] [--rate-limit 0] [--error-rate 0] [--interval 2]
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("HUE_USER", "bench")  # server.py refuses to import without one
+
+import server  # noqa: E402
+
+CERT_DIR = os.path.join(tempfile.gettempdir(), "hue-fake-bridge")
+
+
+def self_signed_cert(directory=CERT_DIR):
+    """Return (cert, key) paths, creating a self-signed pair with openssl if needed"""
+    cert = os.path.join(directory, "bridge.crt")
+    key = os.path.join(directory, "bridge.key")
+    if not (os.path.exists(cert) and os.path.exists(key)):
+        os.makedirs(directory, exist_ok=True)
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                        "-keyout", key, "-out", cert, "-days", "365",
+                        "-subj", "/CN=fake-hue-bridge"],
+                       check=True, capture_output=True)
+    return cert, key
+
+
+def virtual_light_id(index):
+    return str(uuid.UUID(int=0xFA4E << 112 | index))
+
+
+def build_resources(virtual_lights=0):
+    """CLIP v2 resources for the house in ROOM_LIGHTS plus a "virtual" room"""
+    rooms = {room: list(server.BASE_ROOM_LIGHTS[room]) for room in server.BASE_ROOMS}
+    if virtual_lights:
+        rooms["virtual"] = [virtual_light_id(i) for i in range(virtual_lights)]
+
+    resources = {rtype: {} for rtype in ("light", "device", "room", "zone", "grouped_light",
+                                         "entertainment", "entertainment_configuration")}
+    owners = {}
+    for room, light_ids in rooms.items():
+        for light_id in light_ids:
+            if light_id in resources["light"]:
+                continue  # Already created for a smaller room
+            device_id = str(uuid.uuid5(uuid.NAMESPACE_OID, "device-" + light_id))
+            light = {"id": light_id, "type": "light",
+                     "owner": {"rid": device_id, "rtype": "device"},
+                     "metadata": {"name": f"{room} {len(owners) + 1}"},
+                     "on": {"on": True}, "dimming": {"brightness": 50.0},
+                     "color": {"xy": {"x": 0.3, "y": 0.3}}}
+            if server.is_gradient_light(light_id):
+                light["gradient"] = {"points": [{"color": {"xy": {"x": 0.3, "y": 0.3}}}] * 5,
+                                     "points_capable": 5}
+            resources["light"][light_id] = light
+            resources["device"][device_id] = {
+                "id": device_id, "type": "device", "metadata": {"name": light["metadata"]["name"]},
+                "services": [{"rid": light_id, "rtype": "light"}]}
+            owners[light_id] = device_id
+
+    # Bridge rooms are disjoint: each light belongs to the first (smallest) room it appears in
+    assigned = set()
+    for room, light_ids in rooms.items():
+        members = [light_id for light_id in light_ids if light_id not in assigned]
+        if not members:
+            continue
+        assigned.update(members)
+        room_id = str(uuid.uuid5(uuid.NAMESPACE_OID, "room-" + room))
+        grouped_id = str(uuid.uuid5(uuid.NAMESPACE_OID, "grouped-" + room))
+        resources["room"][room_id] = {
+            "id": room_id, "type": "room", "metadata": {"name": room},
+            "children": [{"rid": owners[light_id], "rtype": "device"} for light_id in members],
+            "services": [{"rid": grouped_id, "rtype": "grouped_light"}]}
+        resources["grouped_light"][grouped_id] = {
+            "id": grouped_id, "type": "grouped_light", "on": {"on": True},
+            "owner": {"rid": room_id, "rtype": "room"}, "members": members}
+    return resources
+
+
+class RateLimiter:
+    """Bridge-wide token bucket; requests without a token get 429"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class FakeBridge:
+    """Threaded HTTPS server imitating the bridge's CLIP v2 API and EventStream"""
+
+    def __init__(self, host="127.0.0.1", port=9443, virtual_lights=0, latency_ms=0,
+                 jitter_ms=0, rate_limit=0, error_rate=0.0, event_interval=0.1):
+        self.resources = build_resources(virtual_lights)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.limiter = RateLimiter(rate_limit, max(1, int(rate_limit)))
+        self.error_rate = error_rate
+        self.event_interval = event_interval
+        self.lock = threading.Lock()
+        self.pending_events = []
+        self.subscribers = set()
+        self.stop_event = threading.Event()
+        self.stats = {"requests": 0, "puts": 0, "gets": 0, "rate_limited": 0,
+                      "injected_errors": 0, "events": 0, "in_flight": 0, "max_in_flight": 0}
+
+        bridge = self
+
+        class Handler(BridgeHandler):
+            fake = bridge
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        cert, key = self_signed_cert()
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+        self.address = self.httpd.server_address
+        self.threads = []
+
+    def start(self):
+        for target, name in ((self.httpd.serve_forever, "FakeBridge"),
+                             (self._event_loop, "FakeBridgeEvents")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def apply_put(self, rtype, resource_id, state):
+        """Merge a PUT body into the resource and queue the matching event(s)"""
+        with self.lock:
+            store = self.resources.get(rtype, {})
+            resource = store.get(resource_id)
+            if resource is None:
+                return False
+            state.pop("dynamics", None)
+            targets = [resource]
+            if rtype == "grouped_light":
+                targets = [self.resources["light"][light_id] for light_id in resource["members"]]
+            for target in targets:
+                server.deep_merge(target, json.loads(json.dumps(state)))
+                self.pending_events.append(dict(state, id=target["id"], type=target["type"]))
+        return True
+
+    def subscribe(self):
+        client = queue.Queue(maxsize=1000)
+        with self.lock:
+            self.subscribers.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.subscribers.discard(client)
+
+    def _event_loop(self):
+        """Flush state changes to EventStream clients in batches, like the bridge"""
+        sequence = 0
+        last_keepalive = time.monotonic()
+        while not self.stop_event.wait(self.event_interval):
+            with self.lock:
+                pending, self.pending_events = self.pending_events, []
+                subscribers = list(self.subscribers)
+            messages = []
+            if pending:
+                sequence += 1
+                event = {"creationtime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                         "id": str(uuid.uuid4()), "type": "update", "data": pending}
+                messages.append(f"id: {int(time.time())}:{sequence}\ndata: {json.dumps([event])}\n\n")
+                self.count("events", len(pending))
+            if time.monotonic() - last_keepalive > 10:
+                messages.append(": hi\n\n")
+                last_keepalive = time.monotonic()
+            for message in messages:
+                for client in subscribers:
+                    try:
+                        client.put_nowait(message.encode())
+                    except queue.Full:
+                        pass  # Slow reader - the real bridge drops events too
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, subscribers=len(self.subscribers),
+                        lights=len(self.resources["light"]))
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class BridgeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the bridge
+    wbufsize = -1  # Whole response in one write
+    fake = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def authorized(self):
+        if self.headers.get("hue-application-key"):
+            return True
+        self.send_body(403, {"errors": [{"description": "unauthorized user"}], "data": []})
+        return False
+
+    def simulate_load(self):
+        """Apply latency, rate limiting and injected errors; False if answered"""
+        fake = self.fake
+        if fake.latency or fake.jitter:
+            time.sleep(max(0.0, fake.latency + random.uniform(-fake.jitter, fake.jitter)))
+        if not fake.limiter.allow():
+            fake.count("rate_limited")
+            self.send_body(429, {"errors": [{"description": "Too many requests"}], "data": []})
+            return False
+        if fake.error_rate and random.random() < fake.error_rate:
+            fake.count("injected_errors")
+            status = random.choice((429, 503))
+            self.send_body(status, {"errors": [{"description": "Injected error"}], "data": []})
+            return False
+        return True
+
+    def handle_one(self, method):
+        fake = self.fake
+        with fake.lock:
+            fake.stats["requests"] += 1
+            fake.stats["in_flight"] += 1
+            fake.stats["max_in_flight"] = max(fake.stats["max_in_flight"], fake.stats["in_flight"])
+        try:
+            body = self.read_body()
+            if not self.authorized() or not self.simulate_load():
+                return
+            parts = self.path.split("?", 1)[0].strip("/").split("/")
+            if parts[:3] != ["clip", "v2", "resource"] or len(parts) not in (4, 5):
+                self.send_body(404, {"errors": [{"description": "resource not found"}], "data": []})
+                return
+            rtype, resource_id = parts[3], (parts[4] if len(parts) == 5 else None)
+            if method == "GET":
+                fake.count("gets")
+                with fake.lock:
+                    store = fake.resources.get(rtype, {})
+                    items = list(store.values()) if resource_id is None else \
+                        [store[resource_id]] if resource_id in store else None
+                    payload = json.dumps({"errors": [], "data": items}) if items is not None else None
+                if payload is None:
+                    self.send_body(404, {"errors": [{"description": "resource not found"}], "data": []})
+                    return
+                data = payload.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            elif method == "PUT" and resource_id:
+                fake.count("puts")
+                try:
+                    state = json.loads(body or b"{}")
+                except ValueError:
+                    self.send_body(400, {"errors": [{"description": "body contains invalid JSON"}],
+                                         "data": []})
+                    return
+                if not fake.apply_put(rtype, resource_id, state):
+                    self.send_body(404, {"errors": [{"description": "resource not found"}], "data": []})
+                    return
+                self.send_body(200, {"errors": [], "data": [{"rid": resource_id, "rtype": rtype}]})
+            else:
+                self.send_body(405, {"errors": [{"description": "method not available"}], "data": []})
+        finally:
+            with fake.lock:
+                fake.stats["in_flight"] -= 1
+
+    def do_GET(self):
+        if self.path.startswith("/eventstream/clip/v2"):
+            self.stream_events()
+        else:
+            self.handle_one("GET")
+
+    def do_PUT(self):
+        self.handle_one("PUT")
+
+    def stream_events(self):
+        if not self.authorized():
+            return
+        client = self.fake.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.flush()
+            while not self.fake.stop_event.is_set():
+                try:
+                    message = client.get(timeout=1)
+                except queue.Empty:
+                    continue
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(message), message))
+                self.wfile.flush()
+        except OSError:
+            pass  # Client went away
+        finally:
+            self.fake.unsubscribe(client)
+            self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Hue bridge (CLIP v2 + EventStream)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--virtual-lights", type=int, default=0,
+                        help="Extra lights in a \"virtual\" room, for scaling tests")
+    parser.add_argument("--latency", type=float, default=20, help="Mean response latency (ms)")
+    parser.add_argument("--jitter", type=float, default=10, help="Latency jitter (+/- ms)")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Bridge-wide requests/s before answering 429 (0 = off)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of random 429/503s")
+    parser.add_argument("--event-interval", type=float, default=0.1, help="EventStream batch interval (s)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between reports")
+    args = parser.parse_args()
+
+    bridge = FakeBridge(args.host, args.port, args.virtual_lights, args.latency, args.jitter,
+                        args.rate_limit, args.error_rate, args.event_interval).start()
+    print(f"Fake bridge on https://{bridge.address[0]}:{bridge.address[1]} "
+          f"({len(bridge.resources['light'])} lights, {len(bridge.resources['room'])} rooms)")
+    previous = 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            snap = bridge.snapshot()
+            rate = (snap["requests"] - previous) / args.interval
+            previous = snap["requests"]
+            print(f"{rate:6.1f} req/s  puts={snap['puts']} gets={snap['gets']} "
+                  f"429={snap['rate_limited']} injected={snap['injected_errors']} "
+                  f"events={snap['events']} max_in_flight={snap['max_in_flight']} "
+                  f"eventstreams={snap['subscribers']}")
+    except KeyboardInterrupt:
+        bridge.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Fake Entertainment Receiver
+
+Stands in for the bridge's entertainment port (UDP 2100) so streaming scenes
+can be checked without real hardware. Receives HueStream v2 messages over
+plain UDP, decodes them and reports message rate and the latest colour per
+channel.
+
+Run the server against it with:
+    ENTERTAINMENT_TRANSPORT=udp ENTERTAINMENT_PORT=2100 python3 server.py
+
+Usage:
+    python3 bench/fake_entertainment.py [--port 2100] [--interval 2]
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+
+HEADER_LEN = 16 + 36  # "HueStream" + version/sequence/reserved/colour space + config id
+CHANNEL_LEN = 7
+
+
+def decode_message(data):
+    """Decode a HueStream v2 message into a dict (raises ValueError if malformed)"""
+    if len(data) < HEADER_LEN or data[:9] != b"HueStream":
+        raise ValueError("Not a HueStream message")
+    major, minor, sequence = data[9], data[10], data[11]
+    if major != 2:
+        raise ValueError(f"Unsupported protocol version {major}.{minor}")
+    color_space = "xy" if data[14] == 1 else "rgb"
+    config_id = data[16:52].decode("ascii")
+    channels = []
+    body = data[HEADER_LEN:]
+    if len(body) % CHANNEL_LEN:
+        raise ValueError("Truncated channel data")
+    for offset in range(0, len(body), CHANNEL_LEN):
+        channel_id, a, b, c = struct.unpack_from(">BHHH", body, offset)
+        if color_space == "xy":
+            channels.append({"channel": channel_id, "x": a / 0xFFFF, "y": b / 0xFFFF,
+                             "brightness": c / 0xFFFF * 100})
+        else:
+            channels.append({"channel": channel_id, "r": a, "g": b, "b": c})
+    return {"sequence": sequence, "color_space": color_space,
+            "config_id": config_id, "channels": channels}
+
+
+class FakeEntertainmentReceiver:
+    """UDP listener that decodes and counts HueStream messages"""
+
+    def __init__(self, host="127.0.0.1", port=2100):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.5)
+        self.address = self.sock.getsockname()
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.errors = 0
+        self.dropped_sequences = 0
+        self.last = None
+        self.channels = {}
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve, name="FakeEntertainment", daemon=True)
+        self.thread.start()
+        return self
+
+    def serve(self):
+        while not self.stop_event.is_set():
+            try:
+                data, _ = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            try:
+                message = decode_message(data)
+            except ValueError:
+                with self.lock:
+                    self.errors += 1
+                continue
+            with self.lock:
+                if self.last and message["sequence"] != (self.last["sequence"] + 1) % 256:
+                    self.dropped_sequences += 1
+                self.messages += 1
+                self.last = message
+                for channel in message["channels"]:
+                    self.channels[channel["channel"]] = channel
+
+    def stop(self):
+        self.stop_event.set()
+        self.sock.close()
+        if self.thread:
+            self.thread.join(timeout=1)
+
+    def snapshot(self):
+        with self.lock:
+            return {"messages": self.messages, "errors": self.errors,
+                    "sequence_gaps": self.dropped_sequences,
+                    "config_id": self.last["config_id"] if self.last else None,
+                    "channels": dict(self.channels)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Hue entertainment stream receiver")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2100)
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between reports")
+    args = parser.parse_args()
+
+    receiver = FakeEntertainmentReceiver(args.host, args.port).start()
+    print(f"Listening for HueStream on udp://{receiver.address[0]}:{receiver.address[1]}")
+    previous = 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            snap = receiver.snapshot()
+            rate = (snap["messages"] - previous) / args.interval
+            previous = snap["messages"]
+            print(f"{rate:5.1f} msg/s  total={snap['messages']} errors={snap['errors']} "
+                  f"gaps={snap['sequence_gaps']} channels={len(snap['channels'])}")
+            for channel_id, channel in sorted(snap["channels"].items()):
+                if "x" in channel:
+                    print(f"    ch{channel_id:<3} x={channel['x']:.3f} y={channel['y']:.3f} "
+                          f"bri={channel['brightness']:.0f}")
+    except KeyboardInterrupt:
+        receiver.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -25,6 +25,7 @@ set_gradient() {
     local p4=$(( (phase + 8) % PALETTE_LEN ))
 
     curl -s -X PUT "$SERVER_URL/api/clip/v2/resource/light/$id" \
+      -H "X-Command-Priority: animation" \
       -H "Content-Type: application/json" \
       -d "{\"gradient\":{\"points\":[
         {\"color\":{\"xy\":{\"x\":${CX[$p0]},\"y\":${CY[$p0]}}},\"dimming\":{\"brightness\":${CB[$p0]}}},
@@ -48,6 +49,7 @@ set_solid() {
     local bri=${brightness_override:-$scaled_bri}
 
     curl -s -X PUT "$SERVER_URL/api/clip/v2/resource/light/$id" \
+      -H "X-Command-Priority: animation" \
       -H "Content-Type: application/json" \
       -d "{\"on\":{\"on\":true},\"color\":{\"xy\":{\"x\":${CX[$p]},\"y\":${CY[$p]}}},\"dimming\":{\"brightness\":$bri},\"dynamics\":{\"duration\":$duration}}" > /dev/null 2>&1
 }
@@ -2,27 +2,61 @@
 """
 Hue Control Panel Server
 
-A threaded HTTP server that:
+A threaded (or, with SERVER_MODE=asyncio, event-loop) HTTP server that:
 - Proxies requests to the Hue bridge (bypasses CORS)
-- Manages scene animations via subprocess
+- Runs scene animations in-process (or via run-scene.sh with SCENE_ENGINE=script)
 - Provides health checks for monitoring
 - Binds to 0.0.0.0 for LAN access
 """
 
 from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http import HTTPStatus
 from socketserver import ThreadingMixIn
+import urllib.parse
 import urllib.request
+import asyncio
+import errno
+import collections
+import functools
+import gzip
+import hashlib
+import heapq
+import mimetypes
+import http.client
+import queue
+import select
+import selectors
 import ssl
 import json
+import math
 import os
 import signal
 import subprocess
 import uuid
+import random
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 import socket
+import sqlite3
+import struct
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+try:
+    from mbedtls import tls as mbedtls_tls  # Optional: DTLS for Entertainment streaming
+except ImportError:
+    mbedtls_tls = None
+
+try:
+    import brotli  # Optional: br-encoded static assets
+except ImportError:
+    brotli = None
+
+try:
+    import numpy as np  # Optional: batched frame computation for large/streamed scenes
+except ImportError:
+    np = None
 
 # Load .env file
 def load_env():
@@ -42,15 +76,57 @@ HUE_BRIDGE = os.environ.get("HUE_BRIDGE", "192.168.1.209")
 HUE_API_KEY = os.environ.get("HUE_USER", "")
 PORT = int(os.environ.get("PORT", "8080"))
 SCRIPT_DIR = Path(__file__).parent / "scripts"
-STATE_FILE = Path(__file__).parent / ".scene-state.json"
-FEATURE_REQUESTS_FILE = Path(__file__).parent / ".feature-requests.json"
+STATE_FILE = Path(os.environ.get("SCENE_STATE_FILE", Path(__file__).parent / ".scene-state.json"))
+FEATURE_REQUESTS_FILE = Path(__file__).parent / ".feature-requests.json"  # Legacy store, imported once
+FEATURE_REQUESTS_DB = Path(os.environ.get("FEATURE_REQUESTS_DB", Path(__file__).parent / ".feature-requests.db"))
+FEATURE_REQUEST_PAGE_MAX = 500  # Largest page GET /api/feature-requests returns
+ROOMS_FILE = Path(os.environ.get("ROOMS_FILE", Path(__file__).parent / ".rooms.json"))  # Optional room overrides
+SCHEDULES_FILE = Path(os.environ.get("SCHEDULES_FILE", Path(__file__).parent / ".schedules.json"))
+RAMP_STEP_SECONDS = 15  # Scheduled brightness ramps move in steps this far apart
+BRIDGE_POOL_SIZE = int(os.environ.get("BRIDGE_POOL_SIZE", "6"))
+BRIDGE_TIMEOUT = 10  # Seconds per bridge request
+SCENE_ENGINE = os.environ.get("SCENE_ENGINE", "native")  # "native" or "script"
+SCENE_OVERLAP = os.environ.get("SCENE_OVERLAP", "steal")  # New scene vs busy lights: "steal" or "reject"
+SCENE_MOTION = os.environ.get("SCENE_MOTION", "steps")  # "steps" (every frame) or "keyframes"
+KEYFRAME_ERROR_BUDGET = float(os.environ.get("KEYFRAME_ERROR_BUDGET", "0.02"))  # Max xy/brightness drift
+STAGGER_FRACTION = float(os.environ.get("STAGGER_FRACTION", "0.8"))  # Share of a step to spread a frame over
+
+# Admission control - projected animation traffic across all scenes
+ANIMATION_BUDGET = float(os.environ.get("ANIMATION_BUDGET", "10"))  # Commands/s, leaves room for UI
+MAX_ANIMATED_LIGHTS = int(os.environ.get("MAX_ANIMATED_LIGHTS", "0"))  # 0 = no cap
+GRADIENT_COMMAND_COST = float(os.environ.get("GRADIENT_COMMAND_COST", "2"))  # vs. a solid light
+MAX_SLOWDOWN = float(os.environ.get("MAX_SLOWDOWN", "3"))  # Furthest a scene is slowed to fit
+
+# Entertainment streaming (optional, per scene with "output": "stream")
+HUE_CLIENTKEY = os.environ.get("HUE_CLIENTKEY", "")  # PSK from registration with generateclientkey
+ENTERTAINMENT_CONFIG = os.environ.get("ENTERTAINMENT_CONFIG", "")  # ID or name, default: best match
+ENTERTAINMENT_PORT = int(os.environ.get("ENTERTAINMENT_PORT", "2100"))
+ENTERTAINMENT_TRANSPORT = os.environ.get("ENTERTAINMENT_TRANSPORT", "dtls")  # "udp" = fake bridge only
+STREAM_HZ = min(50.0, max(25.0, float(os.environ.get("STREAM_HZ", "40"))))
+
+# Bridge rate limits (see docs/technical-learnings.md "API Rate Limits")
+BRIDGE_RATE_LIMIT = float(os.environ.get("BRIDGE_RATE_LIMIT", "12"))  # Commands/s, whole bridge
+BRIDGE_BURST = int(os.environ.get("BRIDGE_BURST", "20"))
+LIGHT_RATE_LIMIT = float(os.environ.get("LIGHT_RATE_LIMIT", "10"))  # Commands/s per light
+GROUP_RATE_LIMIT = float(os.environ.get("GROUP_RATE_LIMIT", "1"))  # Commands/s per group
+SCHEDULER_MAX_QUEUE = int(os.environ.get("SCHEDULER_MAX_QUEUE", "256"))
+MIRROR_RESYNC_SECONDS = int(os.environ.get("MIRROR_RESYNC_SECONDS", "300"))
+READ_CACHE_SCALE = float(os.environ.get("READ_CACHE_SCALE", "1"))  # Multiplies BRIDGE_READ_TTLS; 0 disables
+
+# Server core: "threaded" (thread per connection) or "asyncio" (one event loop)
+SERVER_MODE = os.environ.get("SERVER_MODE", "threaded")
+ASYNC_MAX_REQUESTS = int(os.environ.get("ASYNC_MAX_REQUESTS", "64"))  # Requests handled at once
+ASYNC_KEEPALIVE_SECONDS = 30  # Idle keep-alive connections are closed after this
+BATCH_MAX_LIGHTS = int(os.environ.get("BATCH_MAX_LIGHTS", "200"))  # Lights per /api/lights/batch
+STATIC_PRELOAD = ("control-panel.html",)  # Loaded into memory at startup
+STATIC_MAX_CACHED_BYTES = 4 * 1024 * 1024  # Larger static files are read from disk per request
 
 if not HUE_API_KEY:
     print("Error: HUE_USER not set. Create a .env file with HUE_USER=your_api_key")
     exit(1)
 
 # Room-to-light-ID mapping (mirrors scripts/lib/rooms.sh)
-ROOM_LIGHTS = {
+BASE_ROOM_LIGHTS = {
     "dining": [
         "fa08b99f-aa8a-4683-af76-c0e3fd566217", "03e56936-b959-4687-b2de-5f2f670c8674",
         "d1a940ac-c385-4857-88dc-bb89ff5ddfc4", "ca82265e-1ee9-4337-a0d4-e44b46b21b1d",
@@ -93,21 +169,13 @@ ROOM_LIGHTS = {
     "balcony": ["7b12ed85-aebe-4c3e-9471-ad8598443ef3"],
 }
 
-# Composite rooms
-ROOM_LIGHTS["whole-house"] = (
-    ROOM_LIGHTS["dining"] + ROOM_LIGHTS["jamies-office"] +
-    ROOM_LIGHTS["master-bedroom"] + ROOM_LIGHTS["master-bath"] +
-    ROOM_LIGHTS["jordans-room"] + ROOM_LIGHTS["kestons-room"] +
-    ROOM_LIGHTS["tv-room"] + ROOM_LIGHTS["balcony"]
-)
-ROOM_LIGHTS["adults-only"] = (
-    ROOM_LIGHTS["dining"] + ROOM_LIGHTS["jamies-office"] +
-    ROOM_LIGHTS["master-bedroom"] + ROOM_LIGHTS["master-bath"]
-)
-ROOM_LIGHTS["bedrooms"] = (
-    ROOM_LIGHTS["master-bedroom"] + ROOM_LIGHTS["jordans-room"] +
-    ROOM_LIGHTS["kestons-room"]
-)
+# Composite rooms - expanded into ROOM_LIGHTS by RoomTopology
+COMPOSITE_ROOMS = {
+    "whole-house": ["dining", "jamies-office", "master-bedroom", "master-bath",
+                    "jordans-room", "kestons-room", "tv-room", "balcony"],
+    "adults-only": ["dining", "jamies-office", "master-bedroom", "master-bath"],
+    "bedrooms": ["master-bedroom", "jordans-room", "kestons-room"],
+}
 
 # Base rooms (not composites) - ordered small-to-large for granular backoff
 # Smaller subsets first so "kitchen" matches before "dining" (which includes kitchen)
@@ -115,35 +183,231 @@ BASE_ROOMS = ["dining-signes-only", "kitchen", "dining", "jamies-office",
               "master-bedroom", "master-bath", "jordans-room", "kestons-room",
               "tv-room", "balcony"]
 
+# Lights without gradient support (mirrors the solid: entries in scripts/lib/rooms.sh)
+SOLID_LIGHTS = {
+    "ca9107e3-4f2c-4383-bf1a-67ae0765bbdf", "52e22f83-a8c0-4ede-9a5e-68801c8c69f7",
+    "bd5ef4f9-7258-4ee8-af97-851b9713c147",  # Kitchen West
+    "dd90028e-5494-4585-9a75-cb593d1275ec", "7fabbbed-4222-4bf4-baee-64977ebc5dde",
+    "f95f8da4-3dd0-4f80-91a5-ca8ad1a7ff22",  # Kitchen East
+    "5396d289-b7e1-4bdb-90f6-2b57e0ad7fc5", "0d806f9b-0416-47bb-8583-e5461fecb669",  # Twilight fronts
+    "c75776ff-d48f-4ec8-b8cc-5dd45e50e9d7",  # Jordan front
+    "d3bbd5c5-585c-48b1-a01d-4eb5a4d7f4c6",  # Keston front
+}
+
+def is_gradient_light(light_id):
+    """True for Signe/Play/strip lights that take 5-point gradients"""
+    return light_id not in SOLID_LIGHTS
+
+class RoomTopology:
+    """Room layout compiled once for constant-time lookups
+
+    Built from base room light lists, composite definitions and the
+    small-to-large BASE_ROOMS order. Every light gets a bit so sets of
+    lights (a room, the animated lights, the backed-off lights) can be
+    compared as ints: "room fully backed off" is a single AND.
+    """
+
+    def __init__(self, base_lights, composites, base_rooms):
+        self.room_lights = {}  # room -> tuple in animation order
+        for room, lights in base_lights.items():
+            self.room_lights[room] = tuple(lights)
+        for room, members in composites.items():
+            self.room_lights[room] = tuple(light_id for member in members
+                                           for light_id in base_lights.get(member, []))
+        self.room_sets = {room: frozenset(lights) for room, lights in self.room_lights.items()}
+        self.base_rooms = tuple(room for room in base_rooms if room in self.room_sets)
+
+        # Smallest base room wins, so iterate small-to-large and keep the first
+        self.base_room_of = {}
+        for room in self.base_rooms:
+            for light_id in self.room_lights[room]:
+                self.base_room_of.setdefault(light_id, room)
+
+        self.bit = {}
+        for lights in self.room_lights.values():
+            for light_id in lights:
+                self.bit.setdefault(light_id, 1 << len(self.bit))
+        self.room_masks = {room: self.mask(lights) for room, lights in self.room_lights.items()}
+
+    def mask(self, light_ids):
+        """Bitmask for a collection of light IDs (unknown lights are ignored)"""
+        mask = 0
+        for light_id in light_ids:
+            mask |= self.bit.get(light_id, 0)
+        return mask
+
+    def base_room(self, light_id):
+        return self.base_room_of.get(light_id)
+
+    def lights(self, rooms):
+        light_ids = set()
+        for room in rooms:
+            light_ids.update(self.room_sets.get(room, ()))
+        return light_ids
+
+    def ordered_lights(self, rooms):
+        lights = []
+        seen = set()
+        for room in rooms:
+            for light_id in self.room_lights.get(room, ()):
+                if light_id not in seen:
+                    seen.add(light_id)
+                    lights.append(light_id)
+        return lights
+
+    def backed_off_rooms(self, backed_off_mask, light_mask=-1):
+        """Base rooms whose lights (those in light_mask) are all backed off"""
+        rooms = []
+        for room in self.base_rooms:
+            mask = self.room_masks[room] & light_mask
+            if mask and mask & backed_off_mask == mask:
+                rooms.append(room)
+        return rooms
+
+def reload_topology():
+    """(Re)compile rooms, applying ROOMS_FILE overrides if present"""
+    global topology
+    base_lights = dict(BASE_ROOM_LIGHTS)
+    composites = dict(COMPOSITE_ROOMS)
+    if ROOMS_FILE.exists():
+        try:
+            with open(ROOMS_FILE) as f:
+                overrides = json.load(f)
+            base_lights.update(overrides.get("rooms", {}))
+            composites.update(overrides.get("composites", {}))
+        except Exception as e:
+            log(f"Ignoring {ROOMS_FILE.name}: {e}")
+    compiled = RoomTopology(base_lights, composites, BASE_ROOMS)
+    topology = compiled  # Single assignment - readers see old or new, never half
+    ROOM_LIGHTS.clear()
+    ROOM_LIGHTS.update({room: list(lights) for room, lights in compiled.room_lights.items()})
+    return compiled
+
 def get_base_room_for_light(light_id):
     """Return the smallest base room containing this light (granular backoff)"""
-    for room in BASE_ROOMS:
-        if light_id in ROOM_LIGHTS.get(room, []):
-            return room
-    return None
+    return topology.base_room(light_id)
 
 def get_light_ids_for_rooms(rooms):
     """Get all light IDs for a list of room names"""
-    light_ids = set()
-    for room in rooms:
-        if room in ROOM_LIGHTS:
-            light_ids.update(ROOM_LIGHTS[room])
-    return light_ids
-
-# Scene state - tracks running animation process
-scene_state = {
-    "running": False,
-    "process": None,
-    "pid": None,  # For recovery after restart
-    "palette": None,
-    "animation": None,
-    "rooms": [],
-    "light_ids": set(),  # Light UUIDs being animated
-    "backed_off_lights": set(),  # Lights excluded due to external override
-    "started_at": None,
-    "last_command_time": 0,  # Timestamp of last command we sent
+    return topology.lights(rooms)
+
+def get_ordered_lights_for_rooms(rooms):
+    """Light IDs for rooms in animation order (W->E per room), without duplicates"""
+    return topology.ordered_lights(rooms)
+
+# Color palettes as parallel x/y/brightness lists (mirrors scripts/lib/palettes.sh)
+PALETTES = {
+    "SUNFLARE": {
+        "x": [0.52, 0.50, 0.47, 0.44, 0.40, 0.36, 0.32, 0.28, 0.24, 0.20, 0.18, 0.20],
+        "y": [0.41, 0.42, 0.42, 0.41, 0.40, 0.39, 0.38, 0.37, 0.36, 0.35, 0.37, 0.36],
+        "b": [80, 85, 88, 90, 92, 95, 98, 100, 100, 100, 100, 100],
+    },
+    "VAPORWAVE": {
+        "x": [0.45, 0.42, 0.38, 0.34, 0.30, 0.25, 0.20, 0.16, 0.15, 0.18, 0.25, 0.35],
+        "y": [0.22, 0.20, 0.17, 0.15, 0.14, 0.13, 0.14, 0.20, 0.28, 0.32, 0.25, 0.20],
+        "b": [100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100],
+    },
+    "TOADSTOOL": {
+        "x": [0.60, 0.58, 0.55, 0.52, 0.48, 0.45, 0.42, 0.38, 0.35, 0.33, 0.36, 0.45],
+        "y": [0.35, 0.38, 0.40, 0.42, 0.44, 0.47, 0.50, 0.52, 0.54, 0.52, 0.45, 0.40],
+        "b": [100, 100, 95, 90, 90, 90, 95, 100, 100, 100, 100, 100],
+    },
+    "ROMANTIC": {
+        "x": [0.50, 0.52, 0.54, 0.56, 0.57, 0.58, 0.57, 0.56, 0.54, 0.52, 0.50, 0.48],
+        "y": [0.25, 0.28, 0.30, 0.32, 0.34, 0.36, 0.38, 0.40, 0.38, 0.35, 0.30, 0.26],
+        "b": [100, 100, 100, 100, 100, 95, 90, 85, 90, 95, 100, 100],
+    },
+    "MIDNIGHT": {
+        "x": [0.45, 0.42, 0.38, 0.35, 0.32, 0.30, 0.32, 0.36, 0.40, 0.44, 0.46, 0.45],
+        "y": [0.20, 0.17, 0.15, 0.14, 0.15, 0.18, 0.20, 0.18, 0.16, 0.17, 0.19, 0.20],
+        "b": [100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100],
+    },
+    "SUNRISE": {
+        "x": [0.58, 0.55, 0.52, 0.50, 0.48, 0.45, 0.42, 0.40, 0.42, 0.45, 0.50, 0.54],
+        "y": [0.35, 0.38, 0.40, 0.42, 0.43, 0.43, 0.42, 0.40, 0.38, 0.36, 0.34, 0.33],
+        "b": [100, 95, 90, 85, 85, 85, 90, 95, 100, 100, 100, 100],
+    },
+    "OCEAN": {
+        "x": [0.16, 0.18, 0.20, 0.23, 0.26, 0.28, 0.30, 0.28, 0.25, 0.22, 0.19, 0.17],
+        "y": [0.32, 0.34, 0.36, 0.37, 0.38, 0.37, 0.36, 0.35, 0.34, 0.33, 0.32, 0.31],
+        "b": [100, 100, 100, 100, 95, 90, 85, 90, 95, 100, 100, 100],
+    },
+    "CANDLE": {
+        "x": [0.54, 0.52, 0.55, 0.53, 0.51, 0.54, 0.52, 0.55, 0.53, 0.50, 0.54, 0.52],
+        "y": [0.41, 0.42, 0.40, 0.43, 0.42, 0.41, 0.43, 0.42, 0.41, 0.44, 0.40, 0.43],
+        "b": [75, 85, 70, 90, 80, 75, 85, 70, 80, 90, 75, 85],
+    },
+    "NORDIC": {
+        "x": [0.34, 0.38, 0.42, 0.44, 0.46, 0.48, 0.46, 0.44, 0.42, 0.40, 0.38, 0.36],
+        "y": [0.28, 0.30, 0.34, 0.36, 0.38, 0.40, 0.41, 0.39, 0.36, 0.33, 0.30, 0.28],
+        "b": [70, 75, 80, 85, 85, 85, 85, 80, 75, 70, 70, 70],
+    },
+    "AURORA": {
+        "x": [0.30, 0.28, 0.25, 0.22, 0.20, 0.22, 0.28, 0.32, 0.35, 0.32, 0.28, 0.25],
+        "y": [0.55, 0.50, 0.40, 0.30, 0.20, 0.15, 0.18, 0.22, 0.30, 0.40, 0.48, 0.52],
+        "b": [100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100],
+    },
+    "FIRE": {
+        "x": [0.65, 0.62, 0.60, 0.58, 0.55, 0.58, 0.62, 0.65, 0.63, 0.60, 0.57, 0.60],
+        "y": [0.33, 0.35, 0.38, 0.40, 0.42, 0.40, 0.36, 0.33, 0.32, 0.35, 0.38, 0.36],
+        "b": [80, 90, 100, 90, 80, 70, 85, 95, 90, 85, 75, 80],
+    },
+    "ROLLERDISCO": {
+        "x": [0.45, 0.15, 0.25, 0.32, 0.60, 0.68, 0.20, 0.55, 0.45, 0.15, 0.32, 0.68],
+        "y": [0.15, 0.25, 0.65, 0.12, 0.38, 0.31, 0.15, 0.25, 0.15, 0.25, 0.12, 0.31],
+        "b": [100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100, 100],
+    },
+    "SEAHAWKS": {
+        "x": [0.18, 0.34, 0.18, 0.30, 0.34, 0.18, 0.34, 0.30, 0.18, 0.34, 0.30, 0.34],
+        "y": [0.18, 0.55, 0.18, 0.32, 0.55, 0.18, 0.55, 0.32, 0.18, 0.55, 0.32, 0.55],
+        "b": [100, 100, 100, 90, 100, 100, 100, 90, 100, 100, 90, 100],
+    },
 }
 
+# Animation patterns as data (mirrors scripts/lib/animations.sh)
+#   step_time         - seconds between frames (None = set once and finish)
+#   transition        - dynamics.duration in ms
+#   phase             - "offset": phase + idx * offset_mul // offset_div
+#                       "jitter": phase + random 0..3
+#                       "random": random palette index, phase never advances
+#                       "spread": idx spread evenly across the palette
+#   gradient_brightness - None (scene brightness), fixed int, or "random"
+#   solid_brightness  - "scaled" (palette * scene brightness) or "random"
+#   random_brightness - (low, high) range used by "random" brightness
+ANIMATIONS = {
+    "wave": {"step_time": 5, "transition": 3000, "phase": "offset",
+             "offset_mul": 2, "offset_div": 1,
+             "gradient_brightness": None, "solid_brightness": "scaled"},
+    "breathing": {"step_time": 8, "transition": 6000, "phase": "offset",
+                  "offset_mul": 1, "offset_div": 3,
+                  "gradient_brightness": None, "solid_brightness": "scaled"},
+    "flicker": {"step_time": 1.2, "transition": 800, "phase": "jitter",
+                "gradient_brightness": 80, "solid_brightness": "random",
+                "random_brightness": (60, 95)},
+    "drift": {"step_time": 15, "transition": 12000, "phase": "offset",
+              "offset_mul": 1, "offset_div": 1,
+              "gradient_brightness": 75, "solid_brightness": "scaled"},
+    "pulse": {"step_time": 1.5, "transition": 1200, "phase": "offset",
+              "offset_mul": 0, "offset_div": 1,
+              "gradient_brightness": None, "solid_brightness": "scaled"},
+    "sportswave": {"step_time": 0.8, "transition": 600, "phase": "offset",
+                   "offset_mul": 2, "offset_div": 1,
+                   "gradient_brightness": None, "solid_brightness": "scaled"},
+    "disco": {"step_time": 0.3, "transition": 200, "phase": "random",
+              "gradient_brightness": "random", "solid_brightness": "random",
+              "random_brightness": (70, 101)},
+    "static": {"step_time": None, "transition": 2000, "phase": "spread",
+               "gradient_brightness": None, "solid_brightness": "scaled"},
+}
+
+# Running scenes by id - each is a dict as built by new_scene(). Scenes own
+# disjoint sets of lights; light_owner maps every animated light to its scene.
+scenes = {}
+light_owner = {}
+light_command_times = {}  # light_id -> ms we last sent it a command (override debounce)
+scenes_lock = threading.RLock()
+scene_start_lock = threading.Lock()  # One start at a time, so light claims can't race
+
 # EventStream monitor state
 event_monitor = {
     "thread": None,
@@ -156,6 +420,1120 @@ def log(msg):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {msg}")
 
+# All rooms (base + composite), kept in sync with the compiled topology
+ROOM_LIGHTS = {}
+topology = reload_topology()
+
+# =============================================================================
+# METRICS - Counters and latency histograms, Prometheus text format at /metrics
+# =============================================================================
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RATE_WINDOW_SECONDS = 10  # Window for the commands/s figure in /health
+
+class Metrics:
+    """Process-wide counters, histograms and gauges
+
+    Series are keyed by (name, sorted label tuple). Label values are kept
+    to bounded sets (methods, resource types, light ids, animation names)
+    so the series count stays fixed however long the server runs. Gauges
+    are read from callbacks at scrape time rather than stored.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.help = {}  # name -> (type, help text)
+        self.counters = {}
+        self.histograms = {}  # key -> [bucket counts..., sum, count]
+        self.collectors = []  # (name, callback returning {labels tuple: value})
+        self.recent_commands = collections.deque()  # Monotonic send times, last RATE_WINDOW_SECONDS
+
+    def describe(self, name, metric_type, help_text):
+        self.help[name] = (metric_type, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def collector(self, name, metric_type, help_text, callback):
+        """Series read at scrape time from callback() -> {label tuple: value}"""
+        self.describe(name, metric_type, help_text)
+        self.collectors.append((name, callback))
+
+    def command_sent(self):
+        """Record one bridge command for the rolling commands/s rate"""
+        now = time.monotonic()
+        with self.lock:
+            self.recent_commands.append(now)
+            while self.recent_commands[0] < now - RATE_WINDOW_SECONDS:
+                self.recent_commands.popleft()
+
+    def commands_per_second(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.recent_commands and self.recent_commands[0] < now - RATE_WINDOW_SECONDS:
+                self.recent_commands.popleft()
+            return len(self.recent_commands) / RATE_WINDOW_SECONDS
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(series) for key, series in self.histograms.items()}
+        collected = []
+        for name, callback in self.collectors:
+            try:
+                collected.extend((name, labels, value) for labels, value in callback().items())
+            except Exception:
+                continue  # A broken collector shouldn't break the scrape
+
+        lines = []
+        described = set()
+
+        def header(name):
+            if name not in described and name in self.help:
+                described.add(name)
+                metric_type, help_text = self.help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name)
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), series in sorted(histograms.items()):
+            header(name)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{name}_sum{self._labels(labels)} {series[-2]:.6f}")
+            lines.append(f"{name}_count{self._labels(labels)} {series[-1]}")
+        for name, labels, value in sorted(collected, key=lambda series: (series[0], series[1])):
+            header(name)
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        return ("\n".join(lines) + "\n").encode()
+
+    @staticmethod
+    def quantile_ms(series, q):
+        """Bucket bound (ms) below which a fraction q of observations fall, None if past the last"""
+        target = q * series[-1]
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, series):
+            cumulative += count
+            if cumulative >= target:
+                return bound * 1000
+        return None
+
+    def summary(self):
+        """Compact view for /health: rate, bridge latency per resource, error counts"""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(series) for key, series in self.histograms.items()}
+        latency = {}
+        for (name, labels), series in histograms.items():
+            if name != "hue_bridge_request_seconds" or not series[-1]:
+                continue
+            resource = dict(labels).get("resource", "other")
+            merged = latency.setdefault(resource, [0] * len(series))
+            for i, value in enumerate(series):
+                merged[i] += value
+        totals = collections.Counter()
+        for (name, labels), value in counters.items():
+            totals[name] += value
+        return {
+            "bridge_commands_per_second": round(self.commands_per_second(), 2),
+            "bridge_latency_ms": {
+                resource: {"count": series[-1],
+                           "avg": round(series[-2] / series[-1] * 1000, 1),
+                           "p50": self.quantile_ms(series, 0.5),
+                           "p99": self.quantile_ms(series, 0.99)}
+                for resource, series in latency.items()},
+            "bridge_errors": totals["hue_bridge_errors_total"],
+            "bridge_timeouts": sum(value for (name, labels), value in counters.items()
+                                   if name == "hue_bridge_errors_total" and ("kind", "timeout") in labels),
+            "backed_off_skips": totals["hue_backed_off_skips_total"],
+            "overrides": totals["hue_overrides_total"],
+        }
+
+metrics = Metrics()
+metrics.describe("hue_bridge_request_seconds", "histogram", "Bridge request latency by method and resource type")
+metrics.describe("hue_bridge_errors_total", "counter", "Failed bridge requests (kind: timeout, connection, http)")
+metrics.describe("hue_light_command_seconds", "histogram", "Dispatch-to-response latency of light commands, per light")
+metrics.describe("hue_scheduler_queue_wait_seconds", "histogram", "Time commands spent queued, by priority")
+metrics.describe("hue_scene_commands_total", "counter", "Bridge commands sent for scenes, by animation and resource")
+metrics.describe("hue_scene_frames_total", "counter", "Animation frames computed, by animation")
+metrics.describe("hue_proxy_requests_total", "counter", "Proxied panel requests by method, resource and status")
+metrics.describe("hue_proxy_request_seconds", "histogram", "End-to-end proxied request latency by method and resource")
+metrics.describe("hue_backed_off_skips_total", "counter", "Commands not sent because the light is backed off")
+metrics.describe("hue_eventstream_events_total", "counter", "Bridge EventStream events by type")
+metrics.describe("hue_eventstream_reconnects_total", "counter", "EventStream connection attempts after the first")
+metrics.describe("hue_overrides_total", "counter", "External overrides that backed off a room")
+
+def error_kind(error):
+    """Classify a bridge failure for hue_bridge_errors_total"""
+    if isinstance(error, (socket.timeout, TimeoutError)):
+        return "timeout"
+    return "connection"
+
+# =============================================================================
+# BRIDGE CLIENT - Pooled keep-alive HTTPS connections
+# =============================================================================
+
+def make_bridge_ssl_context():
+    """SSL context for the bridge (self-signed cert, no verification)"""
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+class BridgePool:
+    """Bounded pool of persistent HTTPS connections to the bridge
+
+    Every request borrows a connection, so at most `size` requests are in
+    flight at once; further callers block until one is returned. All
+    connections share one SSL context. Idle connections are health-checked
+    on checkout and an idempotent request that fails on a reused (possibly
+    stale) connection is retried once on a fresh one.
+    """
+
+    # Drop connections idle longer than this (bridge closes them eventually)
+    MAX_IDLE_SECONDS = 30
+    # Safe to send twice; a POST may already have been applied when the socket dropped
+    RETRY_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+
+    def __init__(self, host, size=BRIDGE_POOL_SIZE, timeout=BRIDGE_TIMEOUT):
+        self.host = host
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.ssl_context = make_bridge_ssl_context()
+        self._idle = queue.LifoQueue()  # (conn, last_used) - most recent first
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "stale": 0, "retries": 0}
+
+    def _new_connection(self):
+        with self._lock:
+            self.stats["created"] += 1
+        return http.client.HTTPSConnection(
+            self.host, timeout=self.timeout, context=self.ssl_context)
+
+    def _is_healthy(self, conn, last_used):
+        """A parked connection is usable if it is recent and the peer hasn't closed it"""
+        if conn.sock is None:
+            return False
+        if time.monotonic() - last_used > self.MAX_IDLE_SECONDS:
+            return False
+        try:
+            # Readable while idle means EOF or junk - either way, unusable
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def _checkout(self):
+        """Return (conn, reused) - reused connections may still turn out stale"""
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_connection(), False
+            if self._is_healthy(conn, last_used):
+                with self._lock:
+                    self.stats["reused"] += 1
+                return conn, True
+            with self._lock:
+                self.stats["stale"] += 1
+            conn.close()
+
+    def _checkin(self, conn):
+        self._idle.put((conn, time.monotonic()))
+
+    def request(self, method, path, body=None, headers=None):
+        """Send a request to the bridge, return (status, body bytes)
+
+        Raises OSError/http.client.HTTPException when the bridge is unreachable.
+        Every request is timed into hue_bridge_request_seconds.
+        """
+        resource = resource_of_path(path)[0] or "other"
+        started = time.monotonic()
+        try:
+            status, data = self._request(method, path, body, headers)
+        except Exception as e:
+            metrics.inc("hue_bridge_errors_total", method=method, resource=resource, kind=error_kind(e))
+            raise
+        finally:
+            metrics.observe("hue_bridge_request_seconds", time.monotonic() - started,
+                            method=method, resource=resource)
+        if status >= 400:
+            metrics.inc("hue_bridge_errors_total", method=method, resource=resource, kind=f"http_{status}")
+        return status, data
+
+    def _request(self, method, path, body, headers):
+        all_headers = {'hue-application-key': HUE_API_KEY,
+                       'Content-Type': 'application/json'}
+        if headers:
+            all_headers.update(headers)
+
+        with self._slots:
+            conn, reused = self._checkout()
+            try:
+                status, data = self._send(conn, method, path, body, all_headers)
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                    ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused or method not in self.RETRY_METHODS:
+                    raise
+                # Bridge dropped a keep-alive socket between checks - retry once
+                with self._lock:
+                    self.stats["retries"] += 1
+                conn = self._new_connection()
+                try:
+                    status, data = self._send(conn, method, path, body, all_headers)
+                except Exception:
+                    conn.close()
+                    raise
+            except Exception:
+                conn.close()
+                raise
+            self._checkin(conn)
+            return status, data
+
+    def _send(self, conn, method, path, body, headers):
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        if response.will_close:
+            conn.close()
+        return response.status, data
+
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+
+    def status(self):
+        """Pool counters for /health"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        return stats
+
+bridge_pool = BridgePool(HUE_BRIDGE)
+
+# =============================================================================
+# LIGHT STATE CACHE - Last known state per light, for delta suppression
+# =============================================================================
+
+DELTA_CACHE_TTL = 120  # Seconds a cached state is trusted without confirmation
+
+def _xy_close(a, b, tolerance=0.0015):
+    # Bridge reports xy rounded to 4 decimals
+    return abs(a[0] - b[0]) <= tolerance and abs(a[1] - b[1]) <= tolerance
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _gradient_points(gradient):
+    """Normalize gradient points to [(x, y, brightness or None)], or None if malformed"""
+    if not isinstance(gradient, dict) or not isinstance(gradient.get("points", []), list):
+        return None
+    points = []
+    for point in gradient.get("points", []):
+        color = point.get("color") if isinstance(point, dict) else None
+        xy = color.get("xy") if isinstance(color, dict) else None
+        if not isinstance(xy, dict) or not _is_number(xy.get("x")) or not _is_number(xy.get("y")):
+            return None
+        dimming = point.get("dimming")
+        brightness = dimming.get("brightness") if isinstance(dimming, dict) else None
+        points.append((xy["x"], xy["y"], brightness if _is_number(brightness) else None))
+    return points
+
+def _gradient_matches(known, target):
+    if known is None or target is None or len(known) != len(target):
+        return False
+    for (kx, ky, kb), (tx, ty, tb) in zip(known, target):
+        if not _xy_close((kx, ky), (tx, ty)):
+            return False
+        if kb is not None and tb is not None and abs(kb - tb) > 0.5:
+            return False
+    return True
+
+class LightStateCache:
+    """Last known on/brightness/color/gradient per light
+
+    Fed by commands the bridge accepted and by EventStream updates (which
+    also catch external changes). Animation commands are trimmed against it
+    before sending: fields already at target are dropped, and a command with
+    nothing left is not sent at all. Entries older than DELTA_CACHE_TTL are
+    ignored so a missed event can't suppress commands forever.
+    """
+
+    def __init__(self):
+        self.states = {}  # light_id -> {"on", "brightness", "xy", "gradient", "updated"}
+        self.lock = threading.Lock()
+        self.stats = {"requests_saved": 0, "fields_trimmed": 0, "bytes_saved": 0}
+
+    def update(self, light_id, state):
+        """Merge a CLIP v2 light state (command payload or event item)"""
+        with self.lock:
+            known = self.states.setdefault(light_id, {})
+            on = state.get("on")
+            if isinstance(on, dict) and isinstance(on.get("on"), bool):
+                known["on"] = on["on"]
+            dimming = state.get("dimming")
+            if isinstance(dimming, dict) and _is_number(dimming.get("brightness")):
+                known["brightness"] = dimming["brightness"]
+            color = state.get("color")
+            xy = color.get("xy") if isinstance(color, dict) else None
+            if isinstance(xy, dict) and _is_number(xy.get("x")) and _is_number(xy.get("y")):
+                known["xy"] = (xy["x"], xy["y"])
+                known.pop("gradient", None)  # Solid colour replaces the gradient
+            if "gradient" in state:
+                known["gradient"] = _gradient_points(state["gradient"])
+                known.pop("xy", None)
+            known["updated"] = time.monotonic()
+
+    def record_command(self, path, body):
+        """Update from a command the bridge accepted"""
+        resource, target_id = resource_of_path(path)
+        try:
+            state = json.loads(body)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(state, dict):
+            return
+        if resource == "light":
+            self.update(target_id, state)
+        elif resource == "grouped_light":
+            for grouped_light_id, members in group_index.groups:
+                if grouped_light_id == target_id:
+                    for light_id in members:
+                        self.update(light_id, state)
+
+    def apply_event(self, event):
+        """Update from an EventStream event"""
+        if event.get("type") not in ("update", "add"):
+            return
+        for item in event.get("data", []):
+            if item.get("type") == "light" and item.get("id"):
+                self.update(item["id"], item)
+
+    def trim(self, light_id, body):
+        """Return body without fields already at target, or None to skip the command"""
+        with self.lock:
+            known = self.states.get(light_id)
+            if not known or time.monotonic() - known["updated"] > DELTA_CACHE_TTL:
+                return body
+            known = dict(known)
+        try:
+            state = json.loads(body)
+        except (TypeError, ValueError):
+            return body
+        if not isinstance(state, dict):
+            return body
+
+        # Only well-formed fields are compared; anything else goes to the
+        # bridge untouched and gets its error there
+        trimmed = 0
+        on = state.get("on")
+        if isinstance(on, dict) and isinstance(on.get("on"), bool) and on["on"] == known.get("on"):
+            del state["on"]
+            trimmed += 1
+        dimming = state.get("dimming")
+        if isinstance(dimming, dict) and set(dimming) == {"brightness"} \
+                and _is_number(dimming["brightness"]) and _is_number(known.get("brightness")) \
+                and abs(dimming["brightness"] - known["brightness"]) <= 0.5:
+            del state["dimming"]
+            trimmed += 1
+        color = state.get("color")
+        xy = color.get("xy") if isinstance(color, dict) and set(color) == {"xy"} else None
+        if isinstance(xy, dict) and _is_number(xy.get("x")) and _is_number(xy.get("y")) \
+                and known.get("xy") and _xy_close((xy["x"], xy["y"]), known["xy"]):
+            del state["color"]
+            trimmed += 1
+        if "gradient" in state and _gradient_matches(known.get("gradient"),
+                                                     _gradient_points(state["gradient"])):
+            del state["gradient"]
+            trimmed += 1
+
+        if not trimmed:
+            return body
+        # A transition on its own changes nothing
+        if not set(state) - {"dynamics"}:
+            with self.lock:
+                self.stats["requests_saved"] += 1
+                self.stats["fields_trimmed"] += trimmed
+                self.stats["bytes_saved"] += len(body)
+            return None
+        new_body = json.dumps(state, separators=(',', ':')).encode()
+        with self.lock:
+            self.stats["fields_trimmed"] += trimmed
+            self.stats["bytes_saved"] += len(body) - len(new_body)
+        return new_body
+
+    def status(self):
+        """Savings counters for /health"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["lights_known"] = len(self.states)
+        return stats
+
+light_state_cache = LightStateCache()
+
+# =============================================================================
+# COMMAND SCHEDULER - Rate-limited, coalescing queue in front of the bridge
+# =============================================================================
+
+# Shared fan-out for bridge commands; one worker per pooled connection
+bridge_executor = ThreadPoolExecutor(max_workers=BRIDGE_POOL_SIZE,
+                                     thread_name_prefix="BridgeSend")
+
+# Command lanes, highest priority first
+PRIORITY_INTERACTIVE = "interactive"  # UI clicks, manual changes
+PRIORITY_ANIMATION = "animation"  # Scene frames - may be coalesced or dropped
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_ANIMATION)
+DROPPED_COMMAND_RESPONSE = b'{"data":[],"errors":[]}'  # Superseded, discarded or already applied
+
+class SchedulerFull(Exception):
+    """Raised when the interactive lane is full (bridge badly backed up)"""
+
+class TokenBucket:
+    """Classic token bucket; callers hold the scheduler lock"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until one token is available (0 if available now)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+class CommandTicket:
+    """Handle for a queued command; resolves when it is sent, dropped or fails"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.status = None
+        self.data = None
+        self.error = None
+        self.dropped = False
+
+    def resolve(self, status=None, data=None, error=None, dropped=False):
+        with self._lock:
+            self.status, self.data, self.error, self.dropped = status, data, error, dropped
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """Call callback(ticket) once resolved (right away if it already is)"""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout=None):
+        """Wait for the result, return (status, data); raises on bridge errors"""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Timed out waiting for bridge scheduler")
+        if self.error:
+            raise self.error
+        return self.status, self.data
+
+def command_priority(header):
+    """Scheduler priority from an X-Command-Priority header (default interactive)"""
+    return header if header in PRIORITIES else PRIORITY_INTERACTIVE
+
+def resource_of_path(path):
+    """Split a CLIP v2 path into (resource type, id), e.g. ("light", "<uuid>")"""
+    parts = path.split('/resource/', 1)
+    if len(parts) < 2:
+        return None, None
+    segments = parts[1].split('/')
+    return segments[0], (segments[1] if len(segments) > 1 else None)
+
+def merge_bodies(old, new):
+    """Merge two queued JSON bodies for the same target (newer fields win)"""
+    try:
+        old_state, new_state = json.loads(old), json.loads(new)
+    except (TypeError, ValueError):
+        return new
+    if not isinstance(old_state, dict) or not isinstance(new_state, dict):
+        return new
+    old_state.update(new_state)
+    return json.dumps(old_state, separators=(',', ':')).encode()
+
+class CommandScheduler:
+    """Central queue for state-changing bridge commands
+
+    Every PUT is queued in a priority lane keyed by its target path. A global
+    token bucket caps the bridge-wide command rate and per-target buckets cap
+    each light (10/s) and group (1/s). A newer command for a target that is
+    still queued is merged into the pending one instead of being sent too.
+    A dispatcher thread sends ready commands through the bridge pool, with
+    at most one in-flight request per pooled connection.
+    """
+
+    def __init__(self, pool, rate=BRIDGE_RATE_LIMIT, burst=BRIDGE_BURST,
+                 max_queue=SCHEDULER_MAX_QUEUE):
+        self.pool = pool
+        self.bucket = TokenBucket(rate, burst)
+        self.target_buckets = {}
+        self.max_queue = max_queue
+        self.lanes = {priority: {} for priority in PRIORITIES}  # path -> command (FIFO)
+        self.in_flight = 0
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stats = {"queued": 0, "sent": 0, "coalesced": 0, "dropped": 0,
+                      "discarded": 0, "errors": 0}
+        self._last_error_log = float('-inf')
+
+    def _target_bucket(self, path):
+        bucket = self.target_buckets.get(path)
+        if bucket is None:
+            resource, _ = resource_of_path(path)
+            rate = GROUP_RATE_LIMIT if resource == "grouped_light" else LIGHT_RATE_LIMIT
+            bucket = self.target_buckets[path] = TokenBucket(rate, 1)
+        return bucket
+
+    def submit(self, method, path, body=None, priority=PRIORITY_INTERACTIVE):
+        """Queue a command, return a CommandTicket"""
+        ticket = CommandTicket()
+        with self.cond:
+            self._ensure_running()
+            lane = self.lanes[priority]
+            pending = lane.get(path)
+            if pending and pending["method"] == method:
+                # Coalesce: one merged command, every waiter gets its result
+                pending["body"] = merge_bodies(pending["body"], body)
+                pending["tickets"].append(ticket)
+                self.stats["coalesced"] += 1
+                return ticket
+
+            if self.queue_depth() >= self.max_queue:
+                if priority == PRIORITY_INTERACTIVE or not self.lanes[PRIORITY_ANIMATION]:
+                    raise SchedulerFull("Bridge command queue is full")
+                # Make room by dropping the oldest animation command
+                oldest = next(iter(self.lanes[PRIORITY_ANIMATION]))
+                for stale in self.lanes[PRIORITY_ANIMATION].pop(oldest)["tickets"]:
+                    stale.resolve(dropped=True)
+                self.stats["dropped"] += 1
+
+            lane[path] = {"method": method, "path": path, "body": body, "priority": priority,
+                          "tickets": [ticket], "queued_at": time.monotonic()}
+            self.stats["queued"] += 1
+            self.cond.notify()
+        return ticket
+
+    def discard(self, paths, priority=PRIORITY_ANIMATION):
+        """Drop queued commands for these paths (scene stopped, room backed off)"""
+        with self.cond:
+            lane = self.lanes[priority]
+            for path in paths:
+                command = lane.pop(path, None)
+                if command:
+                    for ticket in command["tickets"]:
+                        ticket.resolve(dropped=True)
+                    self.stats["discarded"] += 1
+
+    def queue_depth(self):
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def _ensure_running(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._dispatch_loop,
+                                           name="BridgeScheduler", daemon=True)
+            self.thread.start()
+
+    def _next_ready(self, now):
+        """Pop the first command whose buckets allow sending, else return wait time"""
+        global_wait = self.bucket.wait_time(now)
+        if global_wait > 0:
+            return None, global_wait
+        soonest = None
+        for priority in PRIORITIES:
+            lane = self.lanes[priority]
+            for path in list(lane):
+                wait = self._target_bucket(path).wait_time(now)
+                if wait == 0:
+                    command = lane.pop(path)
+                    if priority == PRIORITY_ANIMATION and not self._suppress_known_state(command):
+                        continue  # Bridge already has this state - nothing to send
+                    self.bucket.take(now)
+                    self._target_bucket(path).take(now)
+                    return command, 0
+                soonest = wait if soonest is None else min(soonest, wait)
+        return None, soonest
+
+    def _suppress_known_state(self, command):
+        """Trim fields the light already has; return False if nothing is left"""
+        resource, light_id = resource_of_path(command["path"])
+        if resource != "light" or command["method"] != 'PUT':
+            return True
+        try:
+            body = light_state_cache.trim(light_id, command["body"])
+        except Exception as e:
+            # Never let a bad body take down the dispatch loop; send it as-is
+            log(f"State trim failed for {light_id}: {e}")
+            return True
+        if body is None:
+            for ticket in command["tickets"]:
+                ticket.resolve(200, DROPPED_COMMAND_RESPONSE)
+            return False
+        command["body"] = body
+        return True
+
+    def _dispatch_loop(self):
+        while True:
+            with self.cond:
+                while True:
+                    if self.in_flight < self.pool.size and self.queue_depth():
+                        command, wait = self._next_ready(time.monotonic())
+                        if command:
+                            break
+                        self.cond.wait(wait)
+                    else:
+                        self.cond.wait()
+                self.in_flight += 1
+            bridge_executor.submit(self._execute, command)
+
+    def _execute(self, command):
+        started = time.monotonic()
+        metrics.observe("hue_scheduler_queue_wait_seconds", started - command["queued_at"],
+                        priority=command["priority"])
+        try:
+            # Keep the override debounce window current
+            resource, target_id = resource_of_path(command["path"])
+            for scene in note_command_sent(command["path"]):
+                metrics.inc("hue_scene_commands_total", animation=scene["animation"], resource=resource)
+            status, data = self.pool.request(command["method"], command["path"], command["body"])
+            metrics.command_sent()
+            if resource == "light":
+                # Only lights we know, so stray ids from clients can't add series
+                metrics.observe("hue_light_command_seconds", time.monotonic() - started,
+                                light=target_id if target_id in topology.bit else "other")
+            if status == 200:
+                light_state_cache.record_command(command["path"], command["body"])
+            for ticket in command["tickets"]:
+                ticket.resolve(status, data)
+            with self.cond:
+                self.stats["sent"] += 1
+        except Exception as e:
+            for ticket in command["tickets"]:
+                ticket.resolve(error=e)
+            with self.cond:
+                self.stats["errors"] += 1
+                log_error = time.monotonic() - self._last_error_log > 5
+                if log_error:
+                    self._last_error_log = time.monotonic()
+            if log_error:
+                log(f"Scheduler: bridge error on {command['method']} {command['path']}: {e}")
+        finally:
+            with self.cond:
+                self.in_flight -= 1
+                self.cond.notify()
+
+    def status(self):
+        """Queue depth and counters for /health"""
+        with self.cond:
+            stats = dict(self.stats)
+            stats["queue_depth"] = {priority: len(lane) for priority, lane in self.lanes.items()}
+            stats["in_flight"] = self.in_flight
+        return stats
+
+command_scheduler = CommandScheduler(bridge_pool)
+
+# =============================================================================
+# EVENT HUB - Server-Sent Events fan-out to control panels
+# =============================================================================
+
+SSE_HEARTBEAT_SECONDS = 15
+SSE_CLIENT_QUEUE = 500  # Messages buffered per client before it must resync
+
+def encode_sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+class EventHub:
+    """Fans server events out to any number of /api/events clients
+
+    Each message is encoded once and put on every client's bounded queue.
+    A client that falls SSE_CLIENT_QUEUE messages behind has its backlog
+    replaced by a single "resync" event telling it to refetch full state.
+    """
+
+    def __init__(self):
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.stats = {"published": 0, "resyncs": 0}
+
+    def subscribe(self, client=None):
+        """Register a client queue (a bounded queue.Queue unless one is given)"""
+        if client is None:
+            client = queue.Queue(maxsize=SSE_CLIENT_QUEUE)
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def publish(self, event_type, data):
+        with self.lock:
+            if not self.clients:
+                return
+            clients = list(self.clients)
+            self.stats["published"] += 1
+        message = encode_sse(event_type, data)
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                self._resync(client)
+
+    def _resync(self, client):
+        try:
+            while True:
+                client.get_nowait()
+        except queue.Empty:
+            pass
+        client.put_nowait(encode_sse("resync", {}))
+        with self.lock:
+            self.stats["resyncs"] += 1
+
+    def status(self):
+        with self.lock:
+            return dict(self.stats, clients=len(self.clients))
+
+event_hub = EventHub()
+
+def light_event_summary(item):
+    """Compact light state from an EventStream item for panel clients"""
+    summary = {"id": item["id"]}
+    if "on" in item:
+        summary["on"] = item["on"].get("on")
+    if "dimming" in item:
+        summary["brightness"] = item["dimming"].get("brightness")
+    xy = item.get("color", {}).get("xy")
+    if xy:
+        summary["color"] = xy
+    elif item.get("gradient", {}).get("points"):
+        summary["color"] = item["gradient"]["points"][0].get("color", {}).get("xy")
+    return summary
+
+def publish_light_events(event):
+    """Re-broadcast light changes from the bridge EventStream"""
+    if event.get("type") != "update":
+        return
+    for item in event.get("data", []):
+        if item.get("type") == "light" and item.get("id") and \
+                ("on" in item or "dimming" in item or "color" in item or "gradient" in item):
+            event_hub.publish("light", light_event_summary(item))
+
+# =============================================================================
+# RESOURCE MIRROR - Bridge light/room state served from memory
+# =============================================================================
+
+# Resource types mirrored from the bridge and kept current by the EventStream
+MIRROR_RESOURCES = ("light", "grouped_light", "room", "zone")
+
+def deep_merge(target, update):
+    """Merge an EventStream delta into a resource dict (lists are replaced)"""
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+class ResourceMirror:
+    """In-memory copy of the bridge's lights, grouped lights, rooms and zones
+
+    Bootstrapped from the bridge, then updated from EventStream add/update/
+    delete events. GETs for mirrored resource types are answered from here
+    while the EventStream is connected; a periodic resync (and one after
+    every EventStream reconnect) corrects any drift from missed events.
+    """
+
+    def __init__(self):
+        self.resources = {rtype: {} for rtype in MIRROR_RESOURCES}
+        self.synced_at = None  # Wall-clock time of last full resync
+        self.resyncing = False
+        self.pending_events = []  # Events seen during a resync, re-applied after
+        self.lock = threading.Lock()
+        self.resync_requested = threading.Event()
+        self.thread = None
+        self.stats = {"hits": 0, "misses": 0, "resyncs": 0, "events_applied": 0}
+
+    def resync(self):
+        """Replace the mirror with a fresh snapshot from the bridge"""
+        with self.lock:
+            self.resyncing = True
+            self.pending_events = []
+        try:
+            snapshot = {}
+            for rtype in MIRROR_RESOURCES:
+                status, data = bridge_pool.request('GET', f"/clip/v2/resource/{rtype}")
+                if status != 200:
+                    raise OSError(f"GET {rtype} returned {status}")
+                snapshot[rtype] = {item["id"]: item for item in json.loads(data).get("data", [])}
+        except Exception:
+            with self.lock:
+                self.resyncing = False
+                self.pending_events = []
+            raise
+        # Swap and replay in one critical section so no event lands on the old dict
+        with self.lock:
+            self.resources = snapshot
+            for event in self.pending_events:
+                self._apply(event)
+            self.resyncing = False
+            self.pending_events = []
+            self.synced_at = time.time()
+            self.stats["resyncs"] += 1
+
+    def apply_event(self, event):
+        with self.lock:
+            if self.resyncing:
+                self.pending_events.append(event)
+            self._apply(event)
+
+    def _apply(self, event):
+        event_type = event.get("type")
+        for item in event.get("data", []):
+            store = self.resources.get(item.get("type"))
+            if store is None or not item.get("id"):
+                continue
+            if event_type == "delete":
+                store.pop(item["id"], None)
+            elif event_type == "add":
+                store[item["id"]] = item
+            elif event_type == "update" and item["id"] in store:
+                deep_merge(store[item["id"]], item)
+            self.stats["events_applied"] += 1
+
+    def is_live(self):
+        return self.synced_at is not None and event_monitor.get("connected", False)
+
+    def get(self, path):
+        """JSON body for a mirrored GET path, or None to fall through to the bridge"""
+        if '?' in path:
+            return None
+        parts = path.strip('/').split('/')
+        # clip/v2/resource/{type}[/{id}]
+        if len(parts) not in (4, 5) or parts[:3] != ["clip", "v2", "resource"]:
+            return None
+        if parts[3] not in MIRROR_RESOURCES:
+            return None
+        with self.lock:
+            store = self.resources.get(parts[3], {})
+            if not self.is_live():
+                self.stats["misses"] += 1
+                return None
+            if len(parts) == 5:
+                item = store.get(parts[4])
+                if item is None:
+                    self.stats["misses"] += 1
+                    return None  # Let the bridge produce its own 404
+                items = [item]
+            else:
+                items = list(store.values())
+            self.stats["hits"] += 1
+            return json.dumps({"errors": [], "data": items}).encode()
+
+    def request_resync(self):
+        self.resync_requested.set()
+
+    def _resync_loop(self):
+        while True:
+            try:
+                self.resync()
+                log(f"Mirror: synced {sum(len(v) for v in self.resources.values())} resources")
+            except Exception as e:
+                log(f"Mirror: resync failed ({e}), retrying in 30s")
+                self.resync_requested.wait(30)
+                self.resync_requested.clear()
+                continue
+            self.resync_requested.wait(MIRROR_RESYNC_SECONDS)
+            self.resync_requested.clear()
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._resync_loop, name="ResourceMirror", daemon=True)
+        self.thread.start()
+
+    def status(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["live"] = self.is_live()
+            stats["age_seconds"] = round(time.time() - self.synced_at, 1) if self.synced_at else None
+            stats["resources"] = {rtype: len(store) for rtype, store in self.resources.items()}
+        return stats
+
+resource_mirror = ResourceMirror()
+
+# =============================================================================
+# BRIDGE READ CACHE - Single-flight, TTL-cached GETs of slow-changing resources
+# =============================================================================
+
+# Seconds a proxied GET of each resource type is reused. EventStream events
+# for the type invalidate it sooner; the TTL bounds staleness while the
+# stream is down.
+BRIDGE_READ_TTLS = {"room": 30, "zone": 30, "scene": 30, "smart_scene": 30,
+                    "device": 60, "bridge_home": 60, "bridge": 300}
+
+class BridgeReadCache:
+    """Proxied bridge GETs merged while in flight and reused until stale
+
+    Concurrent identical GETs share one upstream request (single-flight);
+    successful responses are kept for their type's TTL. Any add/update/
+    delete event for a type drops its cached reads, and a read that was
+    already in flight when that happened is not stored.
+    """
+
+    def __init__(self, ttls=BRIDGE_READ_TTLS, scale=READ_CACHE_SCALE):
+        self.ttls = {rtype: ttl * scale for rtype, ttl in ttls.items()}
+        self.lock = threading.Lock()
+        self.entries = {}  # path -> (expires_at, status, data)
+        self.in_flight = {}  # path -> {"done": Event, "result", "error"}
+        self.generation = collections.Counter()  # Bumped per type on invalidation
+        self.stats = {"hits": 0, "misses": 0, "merged": 0, "invalidations": 0}
+
+    def cacheable_type(self, bridge_path):
+        """Resource type of a cacheable GET path, or None"""
+        if '?' in bridge_path:
+            return None
+        parts = bridge_path.strip('/').split('/')
+        # clip/v2/resource/{type}[/{id}]
+        if len(parts) not in (4, 5) or parts[:3] != ["clip", "v2", "resource"]:
+            return None
+        return parts[3] if self.ttls.get(parts[3]) else None
+
+    def cached(self, bridge_path):
+        """(status, data) if a fresh copy is cached, else None"""
+        with self.lock:
+            entry = self.entries.get(bridge_path)
+            if entry and entry[0] > time.monotonic():
+                self.stats["hits"] += 1
+                return entry[1], entry[2]
+        return None
+
+    def request(self, bridge_path):
+        """GET through the cache; uncacheable paths go straight to the bridge pool"""
+        rtype = self.cacheable_type(bridge_path)
+        if rtype is None:
+            return bridge_pool.request('GET', bridge_path)
+        with self.lock:
+            entry = self.entries.get(bridge_path)
+            if entry and entry[0] > time.monotonic():
+                self.stats["hits"] += 1
+                return entry[1], entry[2]
+            flight = self.in_flight.get(bridge_path)
+            leader = flight is None
+            if leader:
+                flight = {"done": threading.Event(), "result": None, "error": None}
+                self.in_flight[bridge_path] = flight
+                generation = self.generation[rtype]
+                self.stats["misses"] += 1
+            else:
+                self.stats["merged"] += 1
+
+        if not leader:
+            if not flight["done"].wait(BRIDGE_TIMEOUT * 2):
+                raise TimeoutError(f"Merged bridge read timed out: {bridge_path}")
+            if flight["error"]:
+                raise flight["error"]
+            return flight["result"]
+
+        try:
+            status, data = bridge_pool.request('GET', bridge_path)
+            flight["result"] = (status, data)
+            return status, data
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[bridge_path]
+                if flight["result"] and flight["result"][0] == 200 \
+                        and self.generation[rtype] == generation:
+                    self.entries[bridge_path] = (time.monotonic() + self.ttls[rtype], *flight["result"])
+            flight["done"].set()
+
+    def invalidate(self, rtype=None):
+        """Drop cached reads of one resource type (or all of them)"""
+        if rtype is not None and rtype not in self.ttls:
+            return
+        with self.lock:
+            if rtype is None:
+                self.generation.update(self.ttls.keys())
+                dropped = list(self.entries)
+            else:
+                self.generation[rtype] += 1
+                dropped = [path for path in self.entries if self.cacheable_type(path) == rtype]
+            for path in dropped:
+                del self.entries[path]
+            self.stats["invalidations"] += len(dropped)
+
+    def apply_event(self, event):
+        if event.get("type") not in ("add", "update", "delete"):
+            return
+        for rtype in {item.get("type") for item in event.get("data", [])}:
+            self.invalidate(rtype)
+
+    def status(self):
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"] + self.stats["merged"]
+            return {**self.stats, "entries": len(self.entries), "in_flight": len(self.in_flight),
+                    "upstream_ratio": round(self.stats["misses"] / lookups, 3) if lookups else None}
+
+bridge_reads = BridgeReadCache()
+
 # =============================================================================
 # EVENTSTREAM MONITOR - Detects external light changes
 # =============================================================================
@@ -163,32 +1541,101 @@ def log(msg):
 # Debounce window: ignore events within this time after our commands
 DEBOUNCE_WINDOW_MS = 2000  # 2 seconds
 
-def parse_sse_events(data):
-    """Parse SSE data into individual events"""
-    events = []
-    for line in data.split('\n'):
-        line = line.strip()
-        if line.startswith('data:'):
-            try:
-                event_data = json.loads(line[5:].strip())
-                if isinstance(event_data, list):
-                    events.extend(event_data)
-                else:
-                    events.append(event_data)
-            except json.JSONDecodeError:
-                pass
-    return events
+class SSEDecoder:
+    """Incremental text/event-stream parser
+
+    Bytes are appended to one bytearray and scanned for line ends from where
+    the last scan stopped, so a burst costs one pass over the data rather than
+    re-splitting a growing string per event. Lines are only decoded once
+    complete, so a UTF-8 sequence split across reads is never decoded in
+    halves. Handles data (multi-line), event, id and retry fields, comments
+    and CRLF line endings. feed() returns dispatched events as dicts with
+    "event", "data" and "id" keys.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.scan_from = 0  # Buffer offset not yet searched for a newline
+        self.data_lines = []
+        self.event_type = ""
+        self.last_event_id = ""
+        self.retry_ms = None
+
+    def reset(self):
+        """Drop any partial event (new connection); keeps last id and retry"""
+        self.buffer.clear()
+        self.scan_from = 0
+        self.data_lines = []
+        self.event_type = ""
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        events = []
+        line_start = 0
+        with memoryview(self.buffer) as view:
+            while True:
+                line_end = self.buffer.find(b'\n', self.scan_from)
+                if line_end < 0:
+                    break
+                end = line_end
+                if end > line_start and self.buffer[end - 1] == 0x0D:  # CRLF
+                    end -= 1
+                self._process_line(view[line_start:end], events)
+                line_start = self.scan_from = line_end + 1
+        if line_start:
+            del self.buffer[:line_start]
+            self.scan_from -= line_start
+        return events
+
+    def _process_line(self, line, events):
+        if not line:
+            # Blank line dispatches the pending event
+            if self.data_lines:
+                events.append({"event": self.event_type or "message",
+                               "data": "\n".join(self.data_lines),
+                               "id": self.last_event_id})
+            self.data_lines = []
+            self.event_type = ""
+            return
+        if line[0] == 0x3A:  # ':' comment / keep-alive
+            return
+        text = str(line, 'utf-8', 'replace')
+        field, _, value = text.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == "data":
+            self.data_lines.append(value)
+        elif field == "event":
+            self.event_type = value
+        elif field == "id":
+            if '\0' not in value:
+                self.last_event_id = value
+        elif field == "retry" and value.isdigit():
+            self.retry_ms = int(value)
+
+def bridge_events(sse_event):
+    """Hue events carried in one SSE message (data is a JSON list of events)"""
+    try:
+        event_data = json.loads(sse_event["data"])
+    except json.JSONDecodeError:
+        return []
+    return event_data if isinstance(event_data, list) else [event_data]
 
-def is_external_change(event_time_ms):
-    """Check if change happened outside our debounce window"""
-    last_cmd = scene_state.get("last_command_time", 0)
-    return (event_time_ms - last_cmd) > DEBOUNCE_WINDOW_MS
+def is_external_change(scene, light_id, event_time_ms, window=DEBOUNCE_WINDOW_MS):
+    """Check if a light's change happened outside the debounce window of our last command to it
+
+    Compared per light: a staggered frame keeps the scene as a whole busy
+    for most of every step. Lights we haven't commanded yet fall back to
+    the scene's last command.
+    """
+    last_cmd = light_command_times.get(light_id)
+    if last_cmd is None:
+        last_cmd = scene.get("last_command_time", 0)
+    return (event_time_ms - last_cmd) > window
 
 def handle_light_event(event):
     """Process a light change event, trigger override if external"""
-    global scene_state
-
-    if not scene_state["running"]:
+    if not scenes:
         return
 
     # Check if this is a light update event
@@ -204,100 +1651,120 @@ def handle_light_event(event):
         if not light_id:
             continue
 
-        # Check if this light is in our active animation
-        if light_id not in scene_state.get("light_ids", set()):
+        # Check if this light is in an active animation
+        scene = scene_for_light(light_id)
+        if scene is None:
             continue
 
         # Skip already backed-off lights
-        if light_id in scene_state.get("backed_off_lights", set()):
+        if light_id in scene["backed_off_lights"]:
             continue
 
         # Check if light was turned off (strongest override signal)
         on_state = item.get("on", {})
         if on_state.get("on") is False:
             current_time_ms = int(time.time() * 1000)
-            if is_external_change(current_time_ms):
+            if is_external_change(scene, light_id, current_time_ms):
                 log(f"Override detected: Light {light_id[:8]}... turned OFF externally")
-                trigger_room_backoff(light_id)
+                trigger_room_backoff(scene, light_id)
                 return
 
         # Check for color/brightness changes (now reliable since animations route through server)
         if "color" in item or "dimming" in item:
             current_time_ms = int(time.time() * 1000)
-            if (current_time_ms - scene_state.get("last_command_time", 0)) > (DEBOUNCE_WINDOW_MS * 2):
+            if is_external_change(scene, light_id, current_time_ms, DEBOUNCE_WINDOW_MS * 2):
                 log(f"Override detected: Light {light_id[:8]}... changed externally")
-                trigger_room_backoff(light_id)
+                trigger_room_backoff(scene, light_id)
                 return
 
-def trigger_room_backoff(light_id):
-    """Back off the base room containing this light (granular backoff)"""
-    global scene_state
-
+def trigger_room_backoff(scene, light_id):
+    """Back off the scene's lights in the base room containing this light"""
     # Find which base room contains this light
     room = get_base_room_for_light(light_id)
     if not room:
         return
 
-    # Back off all lights in that room
-    room_lights = set(ROOM_LIGHTS.get(room, []))
-    newly_backed = room_lights - scene_state["backed_off_lights"]
+    # Back off all of the scene's lights in that room
+    room_lights = topology.room_sets[room] & scene["light_ids"]
+    newly_backed = room_lights - scene["backed_off_lights"]
     if newly_backed:
-        scene_state["backed_off_lights"].update(room_lights)
-        log(f"Backed off room '{room}' ({len(newly_backed)} lights)")
+        scene["backed_off_lights"].update(room_lights)
+        scene["backed_off_mask"] |= topology.room_masks[room] & scene["light_mask"]
+        event_hub.publish("backoff", {"scene": scene["id"], "room": room, "lights": sorted(newly_backed)})
+        command_scheduler.discard([light_path(light_id) for light_id in newly_backed] +
+                                  [group_path(gid) for gid, members in group_index.groups
+                                   if members & newly_backed])
+        metrics.inc("hue_overrides_total", room=room)
+        log(f"Backed off room '{room}' ({len(newly_backed)} lights) in scene {scene['id']}")
         save_scene_state()  # Persist for recovery
+        event_hub.publish("scene", scene_status())
 
-    # If all active lights are now backed off, stop the scene entirely
-    if scene_state["backed_off_lights"] >= scene_state["light_ids"]:
-        log("All rooms backed off, stopping scene")
-        stop_scene()
+    # If all of the scene's lights are now backed off, stop it entirely
+    if scene["light_mask"] & ~scene["backed_off_mask"] == 0:
+        log(f"All rooms backed off, stopping scene {scene['id']}")
+        stop_scene(scene["id"])
+
+def process_stream_chunk(decoder, chunk):
+    """Decode EventStream bytes and hand each bridge event to its consumers"""
+    for sse_event in decoder.feed(chunk):
+        for event in bridge_events(sse_event):
+            metrics.inc("hue_eventstream_events_total", type=event.get("type", "unknown"))
+            light_state_cache.apply_event(event)
+            resource_mirror.apply_event(event)
+            bridge_reads.apply_event(event)
+            publish_light_events(event)
+            handle_light_event(event)
 
 def event_stream_monitor():
     """Background thread that monitors Hue EventStream for external changes"""
     global event_monitor
 
-    # Create SSL context (bridge uses self-signed cert)
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
+    # Long-lived stream gets its own connection, but shares the pool's SSL context
+    ctx = bridge_pool.ssl_context
 
     url = f"https://{HUE_BRIDGE}/eventstream/clip/v2"
+    decoder = SSEDecoder()
+    attempts = 0
 
     while not event_monitor["stop_event"].is_set():
         try:
             req = urllib.request.Request(url)
             req.add_header('hue-application-key', HUE_API_KEY)
             req.add_header('Accept', 'text/event-stream')
+            if decoder.last_event_id:
+                req.add_header('Last-Event-ID', decoder.last_event_id)
 
             log("EventStream: Connecting to bridge...")
+            if attempts:
+                metrics.inc("hue_eventstream_reconnects_total")
+            attempts += 1
 
             with urllib.request.urlopen(req, context=ctx, timeout=None) as response:
                 event_monitor["connected"] = True
                 log("EventStream: Connected, monitoring for overrides")
+                resource_mirror.request_resync()  # Events may have been missed while down
+                bridge_reads.invalidate()
 
-                buffer = ""
+                decoder.reset()
                 while not event_monitor["stop_event"].is_set():
                     try:
-                        chunk = response.read(4096).decode('utf-8')
+                        # read1 returns whatever has arrived instead of waiting for 4 KB
+                        chunk = response.read1(4096)
                         if not chunk:
                             break
 
-                        buffer += chunk
-
-                        # Process complete events (separated by double newlines)
-                        while '\n\n' in buffer:
-                            event_data, buffer = buffer.split('\n\n', 1)
-                            events = parse_sse_events(event_data)
-                            for event in events:
-                                handle_light_event(event)
+                        process_stream_chunk(decoder, chunk)
                     except socket.timeout:
                         # Normal timeout, just continue
                         continue
+            event_monitor["connected"] = False
 
         except Exception as e:
             event_monitor["connected"] = False
             if not event_monitor["stop_event"].is_set():
-                log(f"EventStream: Connection error: {e}, reconnecting in 5s...")
-                time.sleep(5)
+                delay = decoder.retry_ms / 1000 if decoder.retry_ms else 5
+                log(f"EventStream: Connection error: {e}, reconnecting in {delay:g}s...")
+                time.sleep(delay)
 
     event_monitor["connected"] = False
     log("EventStream: Monitor stopped")
@@ -326,201 +1793,2468 @@ def stop_event_monitor():
         event_monitor["thread"].join(timeout=2)
 
 # =============================================================================
-# SCENE STATE MANAGEMENT
+# SCENE ENGINE - In-process animation frames sent through the bridge pool
 # =============================================================================
 
+GRADIENT_POINT_OFFSETS = (0, 2, 4, 6, 8)  # Palette steps between gradient points, bottom to top
+
+def plan_keyframes(palette, offsets=GRADIENT_POINT_OFFSETS, budget=KEYFRAME_ERROR_BUDGET):
+    """Fewest palette indices to command at, leaving the rest to bridge fades
+
+    Between two keyframes the bridge fades linearly (dynamics.duration). A
+    step in between can be skipped when its colour - as (x, y,
+    brightness/100), at every point offset (all five gradient points, or
+    (0,) for solid lights) - is within budget of where that fade passes it.
+    Returns the sorted keyframe indices of the
+    smallest such cycle (at least two, so the fade always has somewhere to
+    go); a budget of 0 keeps every step.
+    """
+    length = len(palette["x"])
+    colors = list(zip(palette["x"], palette["y"], (b / 100 for b in palette["b"])))
+
+    def fits(start, end):
+        span = end - start
+        for step in range(1, span):
+            t = step / span
+            for offset in offsets:
+                a = colors[(start + offset) % length]
+                b = colors[(end + offset) % length]
+                faded = [a_k + (b_k - a_k) * t for a_k, b_k in zip(a, b)]
+                if math.dist(colors[(start + step + offset) % length], faded) > budget:
+                    return False
+        return True
+
+    best = list(range(length))
+    max_span = max(1, length // 2)
+    for first in range(length):
+        keys = [first]
+        while True:
+            start = end = keys[-1]
+            end += 1
+            while end < first + length and end + 1 - start <= max_span and fits(start, end + 1):
+                end += 1
+            if end >= first + length:
+                break
+            keys.append(end)
+        if len(keys) < len(best):
+            best = sorted(key % length for key in keys)
+    return best
+
+def scene_keyframes(palette):
+    """Keyframe plans for a palette, by light kind"""
+    return {"gradient": plan_keyframes(palette), "solid": plan_keyframes(palette, (0,))}
+
+def keyframe_ratio(palette_name, motion, kind):
+    """Share of steps a light of this kind is commanded at, for load projections"""
+    if motion != "keyframes" or palette_name is None or palette_name.upper() not in PALETTES:
+        return 1.0
+    return len(palette_keyframes(palette_name.upper())[kind]) / len(PALETTES[palette_name.upper()]["x"])
+
+@functools.lru_cache(maxsize=None)
+def palette_keyframes(palette_name):
+    """scene_keyframes for a named palette, planned once"""
+    return scene_keyframes(PALETTES[palette_name])
+
+class FrameGenerator:
+    """Computes every light's colour for a frame in one batch
+
+    Each light's phase offset is fixed when the generator is built and the
+    per-frame phase/brightness arithmetic runs over all lights at once
+    (NumPy arrays if installed, plain lists otherwise). Payload pieces come
+    from tables built once per palette index (solid colour, scaled
+    brightness, the five gradient points), so a frame allocates one small
+    dict per light. Payloads share those pieces: treat them as read-only.
+    Rebuild the generator when the light list changes.
+
+    With keyframes (from scene_keyframes) a periodic animation only commands
+    a light on the step after each keyframe, sending the next keyframe's
+    colour with a duration that lands on it when stepping would have; the
+    bridge fades through the steps in between. The first frame of a new
+    generator commands every light, fading from wherever it is now to its
+    next keyframe, so no light waits out a segment it never started.
+    """
+
+    def __init__(self, anim, palette, lights, brightness, rng=random, keyframes=None):
+        self.anim = anim
+        self.lights = list(lights)
+        self.brightness = brightness
+        self.rng = rng
+        xs, ys, bs = palette["x"], palette["y"], palette["b"]
+        self.length = length = len(xs)
+        count = len(self.lights)
+        if anim["phase"] == "offset":
+            offsets = [idx * anim["offset_mul"] // anim["offset_div"] for idx in range(count)]
+        elif anim["phase"] == "spread":
+            offsets = [idx * length // count for idx in range(count)]
+        else:  # jitter/random draw per frame
+            offsets = [0] * count
+        self.offsets = offsets
+        self.gradient = [is_gradient_light(light_id) for light_id in self.lights]
+
+        self.solid_colors = [{"xy": {"x": xs[p], "y": ys[p]}} for p in range(length)]
+        self.solid_brightness = [bs[p] * brightness // 100 for p in range(length)]
+        self.gradients = [{"points": [{"color": {"xy": {"x": xs[q], "y": ys[q]}},
+                                       "dimming": {"brightness": bs[q]}}
+                                      for q in ((p + offset) % length for offset in GRADIENT_POINT_OFFSETS)]}
+                          for p in range(length)]
+        self.on = {"on": True}
+        self.dynamics = {"duration": anim["transition"]}
+        # Same phase, same payloads - frames repeat every palette length
+        self.periodic = anim["phase"] in ("offset", "spread") and "random_brightness" not in anim
+
+        # Gradient light? -> light phase -> (target palette index, dynamics) for keyframe motion
+        self.key_targets = None
+        self.key_entries = None  # Same shape, every phase -> next keyframe (first frame)
+        self.primed = False
+        if keyframes and self.periodic and anim["step_time"] is not None:
+            self.key_targets, self.key_entries = {}, {}
+            step_ms = anim["step_time"] * 1000
+            for gradient, keys in ((True, keyframes["gradient"]), (False, keyframes["solid"])):
+                targets = self.key_targets[gradient] = [None] * length
+                for i, key in enumerate(keys):
+                    following = keys[(i + 1) % len(keys)]
+                    span = (following - key) % length or length
+                    targets[(key + 1) % length] = (
+                        following, {"duration": int((span - 1) * step_ms + anim["transition"])})
+                entries = self.key_entries[gradient] = []
+                for p in range(length):
+                    ahead = min((key - p) % length for key in keys)
+                    entries.append(((p + ahead) % length,
+                                    {"duration": int(ahead * step_ms + anim["transition"])}))
+
+        if np is not None:
+            self.offset_array = np.array(offsets, dtype=np.int64)
+            # Seeded from rng so a seeded random.Random gives repeatable frames
+            self.np_rng = np.random.default_rng(rng.getrandbits(64))
+
+    def light_phases(self, phase):
+        """Palette position of every light for this frame, as a list"""
+        anim = self.anim
+        count = len(self.lights)
+        length = self.length
+        base = 0 if anim["phase"] == "spread" else phase
+        if np is not None:
+            if anim["phase"] == "jitter":
+                phases = self.np_rng.integers(0, 4, count) + base
+            elif anim["phase"] == "random":
+                phases = self.np_rng.integers(0, length, count)
+            else:
+                phases = self.offset_array + base
+            return (phases % length).tolist()
+        if anim["phase"] == "jitter":
+            phases = [base + self.rng.randrange(4) for _ in range(count)]
+        elif anim["phase"] == "random":
+            return [self.rng.randrange(length) for _ in range(count)]
+        else:
+            phases = [base + offset for offset in self.offsets]
+        return [p % length for p in phases]
+
+    def random_brightness(self):
+        """One draw per light, shared by gradient and solid lights (as in disco)"""
+        if "random_brightness" not in self.anim:
+            return None
+        low, high = self.anim["random_brightness"]
+        if np is not None:
+            return self.np_rng.integers(low, high, len(self.lights)).tolist()
+        return [self.rng.randrange(low, high) for _ in self.lights]
+
+    def frame(self, phase):
+        """One frame: list of (light_id, payload) for every light"""
+        phases = self.light_phases(phase)
+        random_bri = self.random_brightness()
+        if self.key_targets:
+            return self._keyframe_frame(phases)
+
+        gradient_bri = self.anim["gradient_brightness"]
+        solid_random = self.anim["solid_brightness"] == "random"
+        on, dynamics = self.on, self.dynamics
+        frame = []
+        for idx, light_id in enumerate(self.lights):
+            p = phases[idx]
+            if self.gradient[idx]:
+                if gradient_bri is None:
+                    bri = self.brightness
+                elif gradient_bri == "random":
+                    bri = random_bri[idx]
+                else:
+                    bri = gradient_bri
+                payload = {"gradient": self.gradients[p], "on": on, "dynamics": dynamics,
+                           "dimming": {"brightness": bri}}
+            else:
+                bri = random_bri[idx] if solid_random else self.solid_brightness[p]
+                payload = {"on": on, "color": self.solid_colors[p],
+                           "dimming": {"brightness": bri}, "dynamics": dynamics}
+            frame.append((light_id, payload))
+        return frame
+
+    def _keyframe_frame(self, phases):
+        """Commands only for lights starting a fade towards their next keyframe"""
+        gradient_bri = self.anim["gradient_brightness"]
+        bri = self.brightness if gradient_bri is None else gradient_bri
+        # First frame: every light heads for its next keyframe from where it is
+        targets = self.key_targets if self.primed else self.key_entries
+        self.primed = True
+        frame = []
+        for idx, light_id in enumerate(self.lights):
+            target = targets[self.gradient[idx]][phases[idx]]
+            if target is None:
+                continue  # Mid-fade: the bridge is already heading there
+            p, dynamics = target
+            if self.gradient[idx]:
+                payload = {"gradient": self.gradients[p], "on": self.on, "dynamics": dynamics,
+                           "dimming": {"brightness": bri}}
+            else:
+                payload = {"on": self.on, "color": self.solid_colors[p],
+                           "dimming": {"brightness": self.solid_brightness[p]}, "dynamics": dynamics}
+            frame.append((light_id, payload))
+        return frame
+
+def light_path(light_id):
+    return f"/clip/v2/resource/light/{light_id}"
+
+def encode_payload(payload):
+    """Command body for a payload dict (bytes are passed through as already encoded)"""
+    if isinstance(payload, bytes):
+        return payload
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+def send_light_command(light_id, payload, priority=PRIORITY_ANIMATION, scene=None):
+    """Queue a state change for one light; the scene's backed-off lights are skipped
+
+    payload is a dict or an encoded body. Returns a CommandTicket, or None
+    if the light was skipped.
+    """
+    if scene:
+        if light_id in scene["backed_off_lights"]:
+            return None
+        # Keep the override debounce window current
+        scene["last_command_time"] = int(time.time() * 1000)
+    return command_scheduler.submit('PUT', light_path(light_id), encode_payload(payload), priority)
+
+def group_path(grouped_light_id):
+    return f"/clip/v2/resource/grouped_light/{grouped_light_id}"
+
+def send_group_command(grouped_light_id, payload, priority=PRIORITY_ANIMATION, scene=None):
+    """Queue a state change for a whole bridge room/zone, return a CommandTicket"""
+    if scene:
+        scene["last_command_time"] = int(time.time() * 1000)
+    return command_scheduler.submit('PUT', group_path(grouped_light_id), encode_payload(payload), priority)
+
+class GroupIndex:
+    """Bridge rooms/zones with their grouped_light service and member lights
+
+    Loaded from the bridge (room, zone and device resources) and refreshed
+    when older than MAX_AGE_SECONDS. If the bridge can't be read the index
+    stays empty and frames fall back to per-light commands.
+    """
+
+    MAX_AGE_SECONDS = 600
+
+    def __init__(self):
+        self.groups = []  # (grouped_light_id, frozenset of light ids), largest first
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def _get(self, resource):
+        status, data = bridge_pool.request('GET', f"/clip/v2/resource/{resource}")
+        if status != 200:
+            raise OSError(f"GET {resource} returned {status}")
+        return json.loads(data).get("data", [])
+
+    def load(self):
+        device_lights = {}
+        for device in self._get("device"):
+            device_lights[device["id"]] = [service["rid"] for service in device.get("services", [])
+                                           if service.get("rtype") == "light"]
+        groups = []
+        for group in self._get("room") + self._get("zone"):
+            grouped = [service["rid"] for service in group.get("services", [])
+                       if service.get("rtype") == "grouped_light"]
+            if not grouped:
+                continue
+            lights = set()
+            for child in group.get("children", []):
+                if child.get("rtype") == "light":
+                    lights.add(child["rid"])
+                elif child.get("rtype") == "device":
+                    lights.update(device_lights.get(child["rid"], []))
+            if len(lights) > 1:
+                groups.append((grouped[0], frozenset(lights)))
+        groups.sort(key=lambda group: len(group[1]), reverse=True)
+        return groups
+
+    def get(self):
+        """Return the group list, (re)loading it from the bridge if stale"""
+        with self.lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > self.MAX_AGE_SECONDS:
+                try:
+                    self.groups = self.load()
+                    log(f"Group index: {len(self.groups)} bridge rooms/zones")
+                except Exception as e:
+                    log(f"Group index: could not load rooms/zones ({e}), using per-light commands")
+                self.loaded_at = time.monotonic()
+            return self.groups
+
+group_index = GroupIndex()
+
+def plan_frame_commands(frame, groups):
+    """Collapse a frame into grouped_light commands where a whole group is uniform
+
+    frame is a list of (light_id, encoded body). A bridge room/zone is used
+    when every one of its lights is in the frame with the same non-gradient
+    body (grouped_light can't set gradients). Returns a list of (resource
+    type, id, body), resource type being "grouped_light" or "light".
+    """
+    bodies = {light_id: body for light_id, body in frame if b'"gradient"' not in body}
+
+    commands = []
+    covered = set()
+    for grouped_light_id, members in groups:
+        if covered & members:
+            continue
+        group_bodies = {bodies.get(light_id) for light_id in members}
+        if len(group_bodies) == 1 and None not in group_bodies:
+            commands.append(("grouped_light", grouped_light_id, group_bodies.pop()))
+            covered |= members
+
+    for light_id, body in frame:
+        if light_id not in covered:
+            commands.append(("light", light_id, body))
+    return commands
+
+class PayloadCache:
+    """Encoded command bodies of a periodic animation, by (light, phase)
+
+    Deterministic animations (offset/spread phases, no random draws) repeat
+    every palette-length frames, so after the first cycle every body is a
+    dict lookup instead of a json.dumps. Owned by one scene's RestOutput and
+    cleared when its lights change; a new brightness, palette or animation
+    means a new engine and so a new cache.
+    """
+
+    def __init__(self):
+        self.bodies = {}
+        self.size = 0  # Bytes of cached bodies
+        self.stats = {"hits": 0, "misses": 0}
+
+    def encode(self, light_id, payload, phase=None):
+        """Body for a light's payload at a frame phase (phase None = don't cache)"""
+        if phase is None:
+            return encode_payload(payload)
+        key = (light_id, phase)
+        body = self.bodies.get(key)
+        if body is not None:
+            self.stats["hits"] += 1
+            return body
+        self.stats["misses"] += 1
+        body = self.bodies[key] = encode_payload(payload)
+        self.size += len(body)
+        return body
+
+    def clear(self):
+        self.bodies = {}
+        self.size = 0
+
+    def status(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(self.stats, entries=len(self.bodies), bytes=self.size,
+                    hit_ratio=round(self.stats["hits"] / lookups, 3) if lookups else None)
+
+class RestOutput:
+    """Sends a scene's frames as CLIP v2 REST commands through the scheduler"""
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.groups = group_index.get()
+        self.stats = {"light_commands": 0, "group_commands": 0, "lights_via_groups": 0}
+        self.paths_used = set()  # Everything we may have queued, for discard on stop
+        self.bodies = PayloadCache()
+
+    def send_frame(self, frame, stop_event, phase=None, offsets=None):
+        """Queue all commands for a frame, return their tickets
+
+        phase is the frame's position in a periodic animation (bodies are
+        cached by light and phase), or None if frames don't repeat. offsets
+        maps light -> seconds after the frame starts to queue its command
+        (a group goes with its earliest member); without it everything is
+        queued at once.
+        """
+        backed_off = self.scene["backed_off_lights"]
+        if backed_off:
+            count = len(frame)
+            frame = [(light_id, payload) for light_id, payload in frame if light_id not in backed_off]
+            if len(frame) < count:
+                metrics.inc("hue_backed_off_skips_total", count - len(frame), source="engine")
+        frame = [(light_id, self.bodies.encode(light_id, payload, phase)) for light_id, payload in frame]
+        commands = plan_frame_commands(frame, self.groups)
+        members = dict(self.groups)
+        if offsets:
+            commands.sort(key=lambda command: offsets.get(command[1], 0) if command[0] == "light" else
+                          min(offsets.get(light_id, 0) for light_id in members[command[1]]))
+        started = time.monotonic()
+        tickets = []
+        for resource, target_id, body in commands:
+            if offsets:
+                delay = offsets.get(target_id, 0) if resource == "light" else \
+                    min(offsets.get(light_id, 0) for light_id in members[target_id])
+                stop_event.wait(started + delay - time.monotonic())
+            if stop_event.is_set():
+                break
+            # Lights can be handed to another scene while a staggered frame is going out
+            owned = self.scene["light_ids"]
+            if resource == "light":
+                if target_id not in owned:
+                    continue
+            elif not members[target_id] <= owned:
+                continue
+            if resource == "grouped_light":
+                ticket = send_group_command(target_id, body, scene=self.scene)
+                self.paths_used.add(group_path(target_id))
+                self.stats["group_commands"] += 1
+                self.stats["lights_via_groups"] += sum(
+                    len(members) for gid, members in self.groups if gid == target_id)
+            else:
+                ticket = send_light_command(target_id, body, scene=self.scene)
+                self.paths_used.add(light_path(target_id))
+                self.stats["light_commands"] += 1
+            if ticket:
+                tickets.append(ticket)
+        return tickets
+
+    def release(self, light_ids):
+        """Drop queued commands for lights handed to another scene"""
+        paths = {light_path(light_id) for light_id in light_ids}
+        command_scheduler.discard(paths & self.paths_used)
+        self.paths_used -= paths
+        self.bodies.clear()  # Remaining lights' phase offsets shift
+
+    def stop(self):
+        # Anything still queued for this scene is now stale
+        command_scheduler.discard(self.paths_used)
+
+def slowed_animation(anim, slowdown):
+    """Animation with step and transition stretched by slowdown (admission control)"""
+    if slowdown == 1 or anim["step_time"] is None:
+        return anim
+    return dict(anim, step_time=anim["step_time"] * slowdown,
+                transition=int(anim["transition"] * slowdown))
+
+def dispatch_offsets(anim, lights):
+    """Seconds into each step to queue each light's command, or None for all at once
+
+    A frame is spread evenly over STAGGER_FRACTION of the step so the bridge
+    sees a steady trickle instead of a burst per step. Colours in an offset
+    animation travel from the end of the light list towards the start, so
+    lights are dispatched in that order and the stagger moves with the wave.
+    """
+    if anim["step_time"] is None or STAGGER_FRACTION <= 0 or len(lights) < 2:
+        return None
+    order = list(lights)
+    if anim["phase"] == "offset" and anim["offset_mul"]:
+        order.reverse()
+    window = anim["step_time"] * min(STAGGER_FRACTION, 1.0)
+    return {light_id: idx * window / len(order) for idx, light_id in enumerate(order)}
+
+class SceneEngine(threading.Thread):
+    """Runs one animation loop in a background thread
+
+    Frames are computed in-process and queued on the command scheduler, so
+    stopping is just setting an event - no process tree to tear down. Frames
+    are not awaited: if the bridge falls behind, the next frame's commands
+    coalesce with the ones still queued. With output="stream", lights in the
+    bridge's entertainment area are streamed instead and only the rest use REST.
+    With motion="keyframes", periodic animations only send keyframes and let
+    the bridge fade between them. A static scene finishes once its frame is
+    sent, unless hold is set: then it stays running and resends the frame on
+    each brightness change (schedule ramps).
+    """
+
+    def __init__(self, scene, palette, animation, lights, brightness, output="rest", slowdown=1.0,
+                 motion="steps", hold=False):
+        super().__init__(name=f"Scene-{animation}-{scene['id']}", daemon=True)
+        self.scene = scene
+        self.palette = PALETTES[palette.upper()]
+        self.anim = slowed_animation(ANIMATIONS[animation], slowdown)
+        self.lights = lights
+        self.brightness = brightness
+        self.keyframes = palette_keyframes(palette.upper()) if motion == "keyframes" else None
+        self.frames = FrameGenerator(self.anim, self.palette, lights, brightness,
+                                     keyframes=self.keyframes)
+        self.dispatch_offsets = dispatch_offsets(self.anim, lights)
+        self.pending_brightness = None
+        self.hold = hold
+        self.wake = threading.Event()  # Brightness changed or stopping (held static scenes)
+        self.output = output
+        self.stop_event = threading.Event()
+        self.frames_sent = 0
+        self.rest = None
+        self.stream = None
+
+    @property
+    def stats(self):
+        stats = dict(self.rest.stats) if self.rest else {}
+        stats["frames"] = self.frames_sent
+        if self.rest:
+            stats["payload_cache"] = self.rest.bodies.status()
+        stats["output"] = "stream" if self.stream else "rest"
+        if self.frames.key_targets:
+            stats["keyframes"] = {kind: f"{len(keys)}/{len(self.palette['x'])}"
+                                  for kind, keys in self.keyframes.items()}
+        if self.stream:
+            stats["stream"] = self.stream.status()
+        return stats
+
+    def run(self):
+        self.rest = RestOutput(self.scene)
+        if self.output == "stream":
+            self.stream = start_stream_output(self.lights, self.scene)
+        try:
+            self._animate()
+        finally:
+            if self.stream:
+                self.stream.stop()
+        if not self.stop_event.is_set():
+            scene_finished(self)
+
+    def _animate(self):
+        phase = 0
+        length = len(self.palette["x"])
+        next_frame = time.monotonic()
+        while not self.stop_event.is_set():
+            if self.pending_brightness is not None:
+                self.brightness, self.pending_brightness = self.pending_brightness, None
+                self.frames = FrameGenerator(self.anim, self.palette, self.lights, self.brightness,
+                                             keyframes=self.keyframes)
+                self.rest.bodies.clear()
+            frame = self.frames.frame(phase)
+            if self.stream:
+                # Streamed lights are handled; the rest fall through to REST
+                frame = self.stream.send_frame(frame, self.anim["transition"])
+            tickets = self.rest.send_frame(frame, self.stop_event,
+                                           phase if self.frames.periodic else None,
+                                           self.dispatch_offsets)
+            self.frames_sent += 1
+            metrics.inc("hue_scene_frames_total", animation=self.scene["animation"])
+
+            if self.anim["step_time"] is None:
+                # static: set once and finish once the bridge has it
+                self.wait_for(tickets)
+                if not self.hold:
+                    break
+                # Held: sleep until the next brightness change, then resend
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            if self.anim["phase"] != "random":
+                phase = (phase + 1) % length
+            # Frames start every step_time, however long the staggered dispatch took
+            next_frame += self.anim["step_time"]
+            self.stop_event.wait(max(0.0, next_frame - time.monotonic()))
+
+    def wait_for(self, tickets):
+        """Block until queued commands are sent (or the scene is stopped)"""
+        for ticket in tickets:
+            while not self.stop_event.is_set():
+                try:
+                    ticket.wait(timeout=0.5)
+                    break
+                except TimeoutError:
+                    continue
+                except Exception:
+                    break  # Bridge error - already logged by the scheduler
+
+    def set_brightness(self, brightness):
+        """Use a new brightness from the next frame on"""
+        self.scene["brightness"] = brightness
+        self.pending_brightness = brightness  # Applied by the engine thread between frames
+        self.wake.set()
+
+    def release(self, light_ids):
+        """Stop animating lights that another scene has taken over"""
+        self.lights = [light_id for light_id in self.lights if light_id not in light_ids]
+        self.frames = FrameGenerator(self.anim, self.palette, self.lights, self.brightness,
+                                     keyframes=self.keyframes)
+        self.dispatch_offsets = dispatch_offsets(self.anim, self.lights)
+        if self.rest:
+            self.rest.release(light_ids)
+        if self.stream:
+            self.stream.release(light_ids)
+
+    def stop(self, timeout=2):
+        self.stop_event.set()
+        self.wake.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=timeout)
+        if self.rest:
+            self.rest.stop()
+
+def scene_finished(engine):
+    """Clean up after an engine that ran to completion (static scenes)"""
+    if scenes.get(engine.scene["id"]) is engine.scene:
+        stop_scene(engine.scene["id"])
+
+# =============================================================================
+# ENTERTAINMENT STREAMING - HueStream v2 frames over DTLS (port 2100)
+# =============================================================================
+
+class StreamUnavailable(Exception):
+    """Entertainment streaming can't be used; the scene falls back to REST"""
+
+def encode_stream_message(config_id, sequence, channels):
+    """Build a HueStream v2 message in XY+brightness colour space
+
+    channels: list of (channel_id, x, y, brightness) with x/y in 0..1 and
+    brightness in 0..100. At most 20 channels per message.
+    """
+    header = (b"HueStream" + bytes([2, 0, sequence & 0xFF, 0, 0, 1, 0]) +
+              config_id.encode("ascii"))
+    body = bytearray()
+    for channel_id, x, y, brightness in channels[:20]:
+        body += struct.pack(">BHHH", channel_id,
+                            int(min(1.0, max(0.0, x)) * 0xFFFF),
+                            int(min(1.0, max(0.0, y)) * 0xFFFF),
+                            int(min(100.0, max(0.0, brightness)) / 100 * 0xFFFF))
+    return header + bytes(body)
+
+def light_channel_targets(payload, channel_count):
+    """Colour per entertainment channel of a light, as [(x, y, brightness)]"""
+    if "gradient" in payload:
+        overall = payload.get("dimming", {}).get("brightness", 100)
+        points = [(point["color"]["xy"]["x"], point["color"]["xy"]["y"],
+                   point.get("dimming", {}).get("brightness", 100) * overall / 100)
+                  for point in payload["gradient"]["points"]]
+        if channel_count == 1:
+            return [points[len(points) // 2]]
+        return [points[round(k * (len(points) - 1) / (channel_count - 1))]
+                for k in range(channel_count)]
+    xy = payload["color"]["xy"]
+    color = (xy["x"], xy["y"], payload["dimming"]["brightness"])
+    return [color] * channel_count
+
+class DtlsTransport:
+    """DTLS 1.2 PSK client to the bridge (requires python-mbedtls)"""
+
+    def __init__(self, host, port):
+        if mbedtls_tls is None:
+            raise StreamUnavailable("python-mbedtls is not installed")
+        if not HUE_CLIENTKEY:
+            raise StreamUnavailable("HUE_CLIENTKEY not set in .env")
+        conf = mbedtls_tls.DTLSConfiguration(
+            pre_shared_key=(HUE_API_KEY, bytes.fromhex(HUE_CLIENTKEY)),
+            ciphers=["TLS-PSK-WITH-AES-128-GCM-SHA256"],
+            validate_certificates=False,
+        )
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(5)
+        self.sock = mbedtls_tls.ClientContext(conf).wrap_socket(sock, server_hostname=None)
+        self.sock.connect((host, port))
+        deadline = time.monotonic() + 5
+        delay = 0.005
+        while True:
+            try:
+                self.sock.do_handshake()
+                break
+            except (mbedtls_tls.WantReadError, mbedtls_tls.WantWriteError):
+                if time.monotonic() > deadline:
+                    self.sock.close()
+                    raise StreamUnavailable("DTLS handshake timed out")
+                time.sleep(delay)  # Wait for the bridge's flight instead of spinning
+                delay = min(delay * 2, 0.2)
+
+    def send(self, message):
+        self.sock.send(message)
+
+    def close(self):
+        self.sock.close()
+
+class UdpTransport:
+    """Unencrypted datagrams - only for the local fake bridge (bench/fake_entertainment.py)"""
+
+    def __init__(self, host, port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((host, port))
+
+    def send(self, message):
+        self.sock.send(message)
+
+    def close(self):
+        self.sock.close()
+
+def load_entertainment_channels(config):
+    """Map light_id -> [channel_id, ...] (in segment order) for a configuration"""
+    status, data = bridge_pool.request('GET', "/clip/v2/resource/entertainment")
+    if status != 200:
+        raise StreamUnavailable(f"GET entertainment returned {status}")
+    service_lights = {}
+    for service in json.loads(data).get("data", []):
+        ref = service.get("renderer_reference", {})
+        if ref.get("rtype") == "light":
+            service_lights[service["id"]] = ref["rid"]
+
+    members = {}
+    for channel in config.get("channels", []):
+        for member in channel.get("members", []):
+            light_id = service_lights.get(member.get("service", {}).get("rid"))
+            if light_id:
+                members.setdefault(light_id, []).append((member.get("index", 0), channel["channel_id"]))
+    return {light_id: [channel_id for _, channel_id in sorted(entries)]
+            for light_id, entries in members.items()}
+
+def find_entertainment_config(lights):
+    """Pick the configured (or best-overlapping) entertainment area
+
+    Returns (config id, {light_id: [channel ids]}) for the scene's lights.
+    """
+    status, data = bridge_pool.request('GET', "/clip/v2/resource/entertainment_configuration")
+    if status != 200:
+        raise StreamUnavailable(f"GET entertainment_configuration returned {status}")
+    best = None
+    for config in json.loads(data).get("data", []):
+        name = config.get("metadata", {}).get("name", "")
+        if ENTERTAINMENT_CONFIG and ENTERTAINMENT_CONFIG not in (config["id"], name):
+            continue
+        channels = load_entertainment_channels(config)
+        covered = {light_id: ids for light_id, ids in channels.items() if light_id in lights}
+        if covered and (best is None or len(covered) > len(best[1])):
+            best = (config["id"], covered)
+    if best is None:
+        raise StreamUnavailable("No entertainment configuration covers these lights")
+    return best
+
+class StreamOutput:
+    """Streams a scene's lights at STREAM_HZ through an entertainment area
+
+    Animation frames set per-channel targets; the stream thread interpolates
+    towards them over the frame's transition time, so the bridge sees a
+    smooth 25-50 Hz stream instead of sparse REST commands.
+    """
+
+    def __init__(self, config_id, light_channels, transport, scene):
+        self.scene = scene
+        self.config_id = config_id
+        self.light_channels = light_channels
+        self.transport = transport
+        self.lock = threading.Lock()
+        self.channels = {}  # channel_id -> (start colour, target colour, start time, duration s)
+        self.stop_event = threading.Event()
+        self.sequence = 0
+        self.messages_sent = 0
+        self.thread = threading.Thread(target=self._stream_loop, name="EntertainmentStream",
+                                       daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def send_frame(self, frame, transition_ms):
+        """Take the streamed lights' targets from a frame, return the rest"""
+        now = time.monotonic()
+        remaining = []
+        backed_off = self.scene["backed_off_lights"]
+        with self.lock:
+            for light_id, payload in frame:
+                channel_ids = self.light_channels.get(light_id)
+                if not channel_ids:
+                    remaining.append((light_id, payload))
+                    continue
+                if light_id in backed_off:
+                    continue
+                targets = light_channel_targets(payload, len(channel_ids))
+                duration = payload.get("dynamics", {}).get("duration", transition_ms) / 1000
+                for channel_id, target in zip(channel_ids, targets):
+                    current = self._current(channel_id, now) or target
+                    self.channels[channel_id] = (current, target, now, duration)
+        return remaining
+
+    def release(self, light_ids):
+        """Stop streaming lights that another scene has taken over"""
+        with self.lock:
+            for light_id in light_ids:
+                for channel_id in self.light_channels.pop(light_id, ()):
+                    self.channels.pop(channel_id, None)
+
+    def _current(self, channel_id, now):
+        state = self.channels.get(channel_id)
+        if state is None:
+            return None
+        start, target, started, duration = state
+        t = 1.0 if duration <= 0 else min(1.0, (now - started) / duration)
+        return tuple(a + (b - a) * t for a, b in zip(start, target))
+
+    def _stream_loop(self):
+        interval = 1 / STREAM_HZ
+        next_send = time.monotonic()
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            with self.lock:
+                channels = [(channel_id,) + self._current(channel_id, now)
+                            for channel_id in sorted(self.channels)]
+            if channels:
+                try:
+                    self.transport.send(encode_stream_message(self.config_id, self.sequence, channels))
+                    self.sequence = (self.sequence + 1) % 256
+                    self.messages_sent += 1
+                    now_ms = int(time.time() * 1000)
+                    self.scene["last_command_time"] = now_ms
+                    with self.lock:
+                        light_command_times.update(dict.fromkeys(self.light_channels, now_ms))
+                except OSError as e:
+                    log(f"Entertainment stream error: {e}")
+            next_send += interval
+            self.stop_event.wait(max(0, next_send - time.monotonic()))
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=1)
+        self.transport.close()
+        try:
+            bridge_pool.request('PUT', f"/clip/v2/resource/entertainment_configuration/{self.config_id}",
+                                b'{"action":"stop"}')
+        except Exception as e:
+            log(f"Entertainment: could not stop streaming ({e})")
+
+    def status(self):
+        return {"config": self.config_id, "lights": len(self.light_channels),
+                "channels": len(self.channels), "messages": self.messages_sent, "hz": STREAM_HZ}
+
+def start_stream_output(lights, scene):
+    """Set up entertainment streaming for a scene's lights, or None to use REST only"""
+    started = None
+    try:
+        config_id, light_channels = find_entertainment_config(lights)
+        status, data = bridge_pool.request(
+            'PUT', f"/clip/v2/resource/entertainment_configuration/{config_id}",
+            b'{"action":"start"}')
+        if status != 200:
+            raise StreamUnavailable(f"start streaming returned {status}: {data[:200]!r}")
+        started = config_id
+        host = HUE_BRIDGE.split(':')[0]
+        if ENTERTAINMENT_TRANSPORT == "udp":
+            transport = UdpTransport(host, ENTERTAINMENT_PORT)
+        else:
+            transport = DtlsTransport(host, ENTERTAINMENT_PORT)
+    except Exception as e:
+        log(f"Entertainment streaming unavailable ({e}), using REST")
+        if started:
+            # A started configuration keeps the lights in streaming mode and would fight REST
+            try:
+                bridge_pool.request('PUT', f"/clip/v2/resource/entertainment_configuration/{started}",
+                                    b'{"action":"stop"}')
+            except Exception as stop_error:
+                log(f"Entertainment: could not stop streaming ({stop_error})")
+        return None
+    stream = StreamOutput(config_id, light_channels, transport, scene)
+    stream.start()
+    log(f"Entertainment: streaming {len(light_channels)} lights at {STREAM_HZ:g} Hz")
+    return stream
+
+# =============================================================================
+# SCENE STATE MANAGEMENT
+# =============================================================================
+
+class AdmissionRejected(Exception):
+    """Starting a scene would exceed the animation budget or light cap"""
+
+    def __init__(self, message, details):
+        super().__init__(message)
+        self.details = details
+
+class SceneConflict(Exception):
+    """A new scene wants lights another scene owns (overlap policy "reject")"""
+
+def new_scene(**fields):
+    """Scene dict with defaults; light bitmasks are derived from the light sets"""
+    scene = {
+        "id": uuid.uuid4().hex[:8],
+        "running": True,
+        "engine": None,  # SceneEngine thread (native mode)
+        "process": None,  # run-scene.sh process (script mode)
+        "pid": None,  # For recovery after restart
+        "palette": None,
+        "animation": None,
+        "brightness": None,
+        "output": "rest",
+        "motion": "steps",  # "keyframes": bridge fades between sparse commands
+        "rooms": [],
+        "light_ids": set(),  # Light UUIDs being animated
+        "backed_off_lights": set(),  # Lights excluded due to external override
+        "slowdown": 1.0,  # Step time multiplier applied by admission control
+        "started_at": datetime.now().isoformat(),
+        "last_command_time": int(time.time() * 1000),  # Timestamp of last command we sent
+    }
+    scene.update(fields)
+    scene["light_mask"] = topology.mask(scene["light_ids"])
+    scene["backed_off_mask"] = topology.mask(scene["backed_off_lights"])
+    return scene
+
+def scene_for_light(light_id):
+    """The running scene animating this light, or None"""
+    return scenes.get(light_owner.get(light_id))
+
+def note_command_sent(path):
+    """Keep the override debounce window current for scenes owning this target
+
+    Returns those scenes (empty for commands outside any scene).
+    """
+    resource, target_id = resource_of_path(path)
+    if resource == "light":
+        light_ids = (target_id,)
+    elif resource == "grouped_light":
+        light_ids = next((members for gid, members in group_index.groups if gid == target_id), ())
+    else:
+        return []
+    now = int(time.time() * 1000)
+    for light_id in light_ids:
+        light_command_times[light_id] = now
+    touched = []
+    for scene_id in {light_owner.get(light_id) for light_id in light_ids}:
+        scene = scenes.get(scene_id)
+        if scene:
+            scene["last_command_time"] = now
+            touched.append(scene)
+    return touched
+
 def save_scene_state():
-    """Persist scene state to disk"""
-    if not scene_state["running"]:
-        # Remove state file when not running
+    """Persist running scenes to disk"""
+    with scenes_lock:
+        running = list(scenes.values())
+    if not running:
+        # Remove state file when nothing is running
         if STATE_FILE.exists():
             STATE_FILE.unlink()
         return
 
-    # Save state with PID for recovery
-    pid = scene_state["process"].pid if scene_state["process"] else None
-    state = {
-        "running": scene_state["running"],
-        "pid": pid,
-        "palette": scene_state["palette"],
-        "animation": scene_state["animation"],
-        "rooms": scene_state["rooms"],
-        "light_ids": list(scene_state.get("light_ids", set())),  # Convert set to list for JSON
-        "backed_off_lights": list(scene_state.get("backed_off_lights", set())),  # Convert set to list for JSON
-        "started_at": scene_state["started_at"]
-    }
+    # Save each scene with PID (script mode) or engine settings (native) for recovery
+    states = []
+    for scene in running:
+        pid = scene["process"].pid if scene["process"] else scene.get("pid")
+        states.append({
+            "id": scene["id"],
+            "running": scene["running"],
+            "engine": "native" if scene.get("engine") else "script",
+            "pid": pid,
+            "palette": scene["palette"],
+            "animation": scene["animation"],
+            "brightness": scene.get("brightness"),
+            "output": scene.get("output", "rest"),
+            "motion": scene.get("motion", "steps"),
+            "rooms": scene["rooms"],
+            "light_ids": list(scene["light_ids"]),  # Convert set to list for JSON
+            "backed_off_lights": list(scene["backed_off_lights"]),  # Convert set to list for JSON
+            "started_at": scene["started_at"]
+        })
     with open(STATE_FILE, 'w') as f:
-        json.dump(state, f)
-    log(f"Scene state saved (PID: {pid})")
+        json.dump({"scenes": states}, f)
+    log(f"Scene state saved ({len(states)} scene{'s' if len(states) != 1 else ''})")
+
+class ProcessSupervisor:
+    """Liveness, identity and teardown for scene script processes
+
+    Watched PIDs get a pidfd (Linux 5.3+) registered with one watcher
+    thread, so an exit arrives as a notification and a liveness check is a
+    dict lookup. Without pidfd, liveness falls back to signal 0. Identity
+    and the process tree come from /proc, or from a single ps call on
+    systems without it - never a fork per check.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.watched = {}  # pid -> {"alive", "fd", "script", "on_exit"}
+        self.pending = []  # pidfds for the watcher thread to register
+        self.selector = None
+        self.wake_r = self.wake_w = None
+        self.thread = None
+        self.procfs = os.path.isdir("/proc/self")
+        self.stats = {"exits": 0, "fallback_checks": 0}
+
+    def _start(self):
+        """Start the watcher thread (caller holds the lock)"""
+        if self.thread:
+            return
+        self.selector = selectors.DefaultSelector()
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        self.selector.register(self.wake_r, selectors.EVENT_READ)
+        self.thread = threading.Thread(target=self._run, daemon=True, name="process-watch")
+        self.thread.start()
+
+    def watch(self, pid, on_exit=None):
+        """Track pid; on_exit runs on the watcher thread once it exits"""
+        fd = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                fd = os.pidfd_open(pid)
+            except OSError as e:
+                if e.errno == errno.ESRCH:
+                    return False  # Already gone
+        with self.lock:
+            old = self.watched.get(pid)
+            if old and old["fd"] is not None:
+                if fd is not None:
+                    os.close(fd)
+                old["on_exit"] = on_exit  # Already watched
+                return True
+            self.watched[pid] = {"alive": True, "fd": fd, "script": None, "on_exit": on_exit}
+            if fd is not None:
+                self._start()
+                self.pending.append((fd, pid))
+        if fd is not None:
+            os.write(self.wake_w, b"\0")
+        return True
+
+    def _run(self):
+        while True:
+            for key, _ in self.selector.select():
+                if key.fd == self.wake_r:
+                    try:
+                        os.read(self.wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    with self.lock:
+                        pending, self.pending = self.pending, []
+                    for fd, pid in pending:
+                        self.selector.register(fd, selectors.EVENT_READ, pid)
+                    continue
+                # A pidfd turns readable when its process exits
+                self.selector.unregister(key.fd)
+                os.close(key.fd)
+                self._exited(key.data)
+
+    def _exited(self, pid):
+        with self.lock:
+            entry = self.watched.get(pid)
+            if not entry or not entry["alive"]:
+                return
+            entry["alive"] = False
+            entry["fd"] = None
+            on_exit = entry["on_exit"]
+            self.stats["exits"] += 1
+        if on_exit:
+            try:
+                on_exit()
+            except Exception as e:
+                log(f"Process {pid} exit handler failed: {e}")
+
+    def is_alive(self, pid):
+        with self.lock:
+            entry = self.watched.get(pid)
+            if entry and (entry["fd"] is not None or not entry["alive"]):
+                return entry["alive"]  # Kept current by the watcher thread
+            self.stats["fallback_checks"] += 1
+        try:
+            os.kill(pid, 0)
+            return True
+        except PermissionError:
+            return True  # Exists, just not ours to signal
+        except OSError:
+            if entry:
+                self._exited(pid)
+            return False
+
+    def cmdline(self, pid):
+        """A process's command line, or "" if it is gone"""
+        if self.procfs:
+            try:
+                with open(f"/proc/{pid}/cmdline", "rb") as f:
+                    return f.read().replace(b"\0", b" ").decode("utf-8", "replace")
+            except OSError:
+                return ""
+        result = subprocess.run(['ps', '-p', str(pid), '-o', 'command='],
+                                capture_output=True, text=True)
+        return result.stdout
+
+    def is_scene_script(self, pid):
+        """Whether pid runs one of our scene scripts (cached per watched PID)"""
+        with self.lock:
+            entry = self.watched.get(pid)
+            if entry and entry["script"] is not None:
+                return entry["script"]
+        script = 'run-scene' in self.cmdline(pid)
+        if entry:
+            entry["script"] = script
+        return script
+
+    def parents(self):
+        """pid -> parent pid for every process"""
+        parents = {}
+        if self.procfs:
+            for name in os.listdir("/proc"):
+                if not name.isdigit():
+                    continue
+                try:
+                    with open(f"/proc/{name}/stat", "rb") as f:
+                        stat = f.read()
+                    # Fields after the parenthesised command: state, ppid, ...
+                    parents[int(name)] = int(stat.rsplit(b")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+            return parents
+        result = subprocess.run(['ps', '-A', '-o', 'pid=,ppid='], capture_output=True, text=True)
+        for line in result.stdout.splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[0].isdigit() and fields[1].isdigit():
+                parents[int(fields[0])] = int(fields[1])
+        return parents
+
+    def descendants(self, pid):
+        """Every process below pid, children before grandchildren"""
+        children = {}
+        for child, parent in self.parents().items():
+            children.setdefault(parent, []).append(child)
+        found, frontier = [], [pid]
+        while frontier:
+            frontier = [child for parent in frontier for child in children.get(parent, [])
+                        if child not in found]
+            found.extend(frontier)
+        return found
+
+    def kill_tree(self, pid, sig=signal.SIGTERM):
+        """Signal pid, then its whole descendant tree; False if pid was already gone"""
+        tree = self.descendants(pid)
+        try:
+            os.kill(pid, sig)
+            alive = True
+        except OSError:
+            alive = False
+        # Scene scripts lead their own process group (setsid), which also
+        # reaches grandchildren already orphaned by an earlier exit
+        try:
+            os.killpg(pid, sig)
+        except OSError:
+            pass
+        for child in tree:
+            try:
+                os.kill(child, sig)
+            except OSError:
+                pass
+        return alive
+
+    def status(self):
+        with self.lock:
+            return {**self.stats,
+                    "watching": sum(1 for entry in self.watched.values() if entry["alive"]),
+                    "pidfd": hasattr(os, "pidfd_open"), "procfs": self.procfs}
+
+process_supervisor = ProcessSupervisor()
+
+def is_process_running(pid):
+    """Check if a process is running and is our scene script"""
+    return process_supervisor.is_alive(pid) and process_supervisor.is_scene_script(pid)
+
+def kill_process_tree(pid):
+    """Kill a process and all its descendants"""
+    return process_supervisor.kill_tree(pid)
+
+def load_scene_state():
+    """Load and recover scenes from disk"""
+    if not STATE_FILE.exists():
+        return
+
+    try:
+        with open(STATE_FILE) as f:
+            saved = json.load(f)
+        STATE_FILE.unlink()
+    except Exception as e:
+        log(f"Error loading scene state: {e}")
+        if STATE_FILE.exists():
+            STATE_FILE.unlink()
+        return
+
+    # Files from before multi-scene support hold a single scene
+    for state in saved.get("scenes", [saved]):
+        try:
+            recover_scene(state)
+        except Exception as e:
+            log(f"Error recovering scene: {e}")
+    save_scene_state()
+
+def recover_scene(state):
+    """Restart (native) or re-adopt (script) one scene from the state file"""
+    # Native scenes died with the old server - restart the engine
+    if state.get("engine") == "native":
+        log(f"Restarting scene from previous run: {state['palette']} {state['animation']}")
+        success, message, _ = start_scene(
+            state["palette"], state["animation"], state["rooms"],
+            state.get("brightness") or 94,
+            backed_off_lights=set(state.get("backed_off_lights", [])),
+            output=state.get("output", "rest"), scene_id=state.get("id"),
+            motion=state.get("motion", "steps"),
+            overlap="steal")  # Saved in start order, so later scenes win shared lights as before
+        if not success:
+            log(f"Could not restart scene: {message}")
+        return
+
+    # Check if process is still running and is our script
+    pid = state.get("pid")
+    if pid and is_process_running(pid):
+        log(f"Recovered running scene (PID: {pid})")
+        scene = new_scene(
+            pid=pid,  # Can't recover subprocess object, but we have PID
+            palette=state["palette"],
+            animation=state["animation"],
+            brightness=state.get("brightness"),
+            rooms=state["rooms"],
+            light_ids=set(state.get("light_ids", [])),  # Restore as set
+            backed_off_lights=set(state.get("backed_off_lights", [])),  # Restore as set
+            started_at=state["started_at"],
+            last_command_time=0,
+        )
+        if state.get("id"):
+            scene["id"] = state["id"]
+        register_scene(scene)
+        process_supervisor.watch(pid, on_exit=functools.partial(stop_scene, scene["id"]))
+        return
+
+    # Process not running or not our script - nothing to recover
+    log("Previous scene no longer running, cleaning up state")
+
+def register_scene(scene):
+    """Add a scene and take ownership of its lights"""
+    with scenes_lock:
+        scenes[scene["id"]] = scene
+        for light_id in scene["light_ids"]:
+            light_owner[light_id] = scene["id"]
+
+def claim_lights(light_ids, overlap):
+    """Free lights held by other scenes before a new scene takes them
+
+    overlap "reject" raises SceneConflict if any light is busy; "steal"
+    takes the lights, shrinking the scenes that held them (a scene left
+    with nothing to animate, or a script scene that can't shrink, stops).
+    """
+    with scenes_lock:
+        taken = {}
+        for light_id in light_ids:
+            owner = light_owner.get(light_id)
+            if owner:
+                taken.setdefault(owner, set()).add(light_id)
+        if taken and overlap == "reject":
+            busy = [scenes[scene_id]["animation"] + f" ({scene_id})" for scene_id in taken]
+            raise SceneConflict(f"Lights already in use by {', '.join(busy)}")
+
+    for scene_id, stolen in taken.items():
+        scene = scenes.get(scene_id)
+        if not scene:
+            continue
+        with scenes_lock:
+            scene["light_ids"] -= stolen
+            scene["backed_off_lights"] -= stolen
+            scene["light_mask"] = topology.mask(scene["light_ids"])
+            scene["backed_off_mask"] = topology.mask(scene["backed_off_lights"])
+            for light_id in stolen:
+                light_owner.pop(light_id, None)
+        if scene["engine"] and scene["light_mask"] & ~scene["backed_off_mask"]:
+            scene["engine"].release(stolen)
+            log(f"Scene {scene_id} handed over {len(stolen)} lights")
+        else:
+            log(f"Scene {scene_id} lost its lights, stopping it")
+            stop_scene(scene_id)
+
+def scene_summary(scene):
+    """Status of one scene"""
+    return {
+        "id": scene["id"],
+        "running": scene["running"],
+        "palette": scene["palette"],
+        "animation": scene["animation"],
+        "brightness": scene.get("brightness"),
+        "output": scene.get("output", "rest"),
+        "motion": scene.get("motion", "steps"),
+        "rooms": scene["rooms"],
+        "started_at": scene["started_at"],
+        "lights": len(scene["light_ids"]),
+        "load": round(scene_load(scene), 2) if scene["animation"] in ANIMATIONS else None,
+        "slowdown": scene.get("slowdown", 1.0),
+        "backed_off_rooms": topology.backed_off_rooms(scene["backed_off_mask"], scene["light_mask"]),
+        "backed_off_lights_count": len(scene["backed_off_lights"]),
+        "engine_stats": scene["engine"].stats if scene.get("engine") else None,
+    }
+
+def scene_status():
+    """All scenes for /api/scenes/status and SSE clients
+
+    The top-level fields describe the most recently started scene (or say
+    nothing is running), so single-scene panels keep working; "scenes"
+    lists every running scene.
+    """
+    with scenes_lock:
+        running = sorted(scenes.values(), key=lambda scene: scene["started_at"])
+    summaries = [scene_summary(scene) for scene in running]
+    if summaries:
+        return dict(summaries[-1], scenes=summaries)
+    return {
+        "id": None,
+        "running": False,
+        "palette": None,
+        "animation": None,
+        "output": "rest",
+        "motion": None,
+        "rooms": [],
+        "started_at": None,
+        "backed_off_rooms": [],
+        "backed_off_lights_count": 0,
+        "engine_stats": None,
+        "scenes": [],
+    }
+
+def halt_scene(scene):
+    """Stop a scene's engine or process (it is already unregistered)"""
+    # Handle in-process engine (native mode)
+    if scene.get("engine"):
+        scene["engine"].stop()
+
+    # Handle process object (script mode)
+    elif scene.get("process") and scene["process"].poll() is None:
+        try:
+            os.killpg(os.getpgid(scene["process"].pid), signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        scene["process"].wait()
+
+    # Handle recovered PID (after server restart)
+    elif scene.get("pid"):
+        if kill_process_tree(scene["pid"]):
+            log(f"Stopped recovered scene (PID: {scene['pid']})")
+
+def stop_scene(scene_id=None):
+    """Stop one scene by id, or every scene; returns how many were stopped"""
+    with scenes_lock:
+        if scene_id is None:
+            stopping = list(scenes.values())
+        else:
+            stopping = [scenes[scene_id]] if scene_id in scenes else []
+        for scene in stopping:
+            del scenes[scene["id"]]
+            for light_id in scene["light_ids"]:
+                if light_owner.get(light_id) == scene["id"]:
+                    del light_owner[light_id]
+
+    # Engines are joined outside the lock - a finishing engine stops itself
+    for scene in stopping:
+        scene["running"] = False
+        halt_scene(scene)
+
+    if stopping:
+        save_scene_state()  # Rewrite (or clear) the state file
+        event_hub.publish("scene", scene_status())
+    return len(stopping)
+
+def projected_load(animation, light_ids, slowdown=1.0, palette=None, motion="steps"):
+    """Projected bridge commands/s for animating these lights
+
+    Each light gets one command per step (per keyframe with keyframe
+    motion); gradient lights count as GRADIENT_COMMAND_COST (five points
+    per command). Static scenes send a single frame, so they carry no
+    sustained load.
+    """
+    anim = ANIMATIONS[animation]
+    step_time = anim["step_time"]
+    if step_time is None or not light_ids:
+        return 0.0
+    gradients = sum(1 for light_id in light_ids if is_gradient_light(light_id))
+    gradient_weight = gradients * GRADIENT_COMMAND_COST
+    solid_weight = len(light_ids) - gradients
+    if anim["phase"] in ("offset", "spread") and "random_brightness" not in anim:
+        gradient_weight *= keyframe_ratio(palette, motion, "gradient")
+        solid_weight *= keyframe_ratio(palette, motion, "solid")
+    return (gradient_weight + solid_weight) / (step_time * slowdown)
+
+def scene_load(scene, excluding=frozenset()):
+    """Current projected load of a running scene (backed-off lights are idle)"""
+    active = scene["light_ids"] - scene["backed_off_lights"] - excluding
+    return projected_load(scene["animation"], active, scene.get("slowdown", 1.0),
+                          scene["palette"], scene.get("motion", "steps"))
+
+def admit_scene(animation, lights, overlap, can_slow=True, palette=None, motion="steps"):
+    """Check a new scene against the budget; returns the slowdown to run it at
+
+    Lights it would steal from running scenes are counted as freed. If the
+    scene only fits when slowed (up to MAX_SLOWDOWN) it is admitted slowed;
+    otherwise AdmissionRejected explains what is in use.
+    """
+    light_set = set(lights)
+    freed = light_set if overlap == "steal" else frozenset()
+    with scenes_lock:
+        in_use = sum((scene_load(scene, freed) for scene in scenes.values()), 0.0)
+        lights_in_use = len(set(light_owner) - freed)
+    load = projected_load(animation, lights, palette=palette, motion=motion)
+    available = max(0.0, ANIMATION_BUDGET - in_use)
+    details = {"projected_load": round(load, 2), "budget": ANIMATION_BUDGET,
+               "in_use": round(in_use, 2), "available": round(available, 2)}
+
+    if MAX_ANIMATED_LIGHTS and lights_in_use + len(light_set) > MAX_ANIMATED_LIGHTS:
+        details.update(max_lights=MAX_ANIMATED_LIGHTS, lights_in_use=lights_in_use)
+        raise AdmissionRejected(
+            f"{len(light_set)} more lights would exceed the cap of {MAX_ANIMATED_LIGHTS} "
+            f"animated lights ({lights_in_use} in use)", details)
+    if load <= available:
+        return 1.0
+    slowdown = load / available if available else float('inf')
+    if can_slow and slowdown <= MAX_SLOWDOWN:
+        return round(slowdown, 2)
+    raise AdmissionRejected(
+        f"{animation} on {len(light_set)} lights needs {load:.1f} commands/s but only "
+        f"{available:.1f} of {ANIMATION_BUDGET:g} are free - stop a scene, pick fewer rooms "
+        f"or a slower animation", details)
+
+def admission_status():
+    """Budget usage for /health"""
+    with scenes_lock:
+        in_use = sum((scene_load(scene) for scene in scenes.values()), 0.0)
+        lights_in_use = len(light_owner)
+    return {"budget": ANIMATION_BUDGET, "in_use": round(in_use, 2),
+            "max_lights": MAX_ANIMATED_LIGHTS or None, "lights_in_use": lights_in_use}
+
+def start_scene(palette, animation, rooms, brightness=94, backed_off_lights=None, output="rest",
+                overlap=None, scene_id=None, motion=None, hold=False):
+    """Start a scene animation (in-process engine, or run-scene.sh in script mode)
+
+    output is "rest" (CLIP v2 commands) or "stream" (Entertainment API where
+    available, REST for everything else). motion is "steps" or "keyframes"
+    (default SCENE_MOTION). hold keeps a static scene running until stopped,
+    so its brightness can still change. Other scenes keep running; lights
+    they share with this one are handled per overlap ("steal" or "reject",
+    default SCENE_OVERLAP). The scene must fit the animation budget (it may
+    be slowed to fit, else AdmissionRejected). Returns (success, message,
+    scene id).
+    """
+    overlap = overlap or SCENE_OVERLAP
+    if overlap not in ("steal", "reject"):
+        return False, f"Unknown overlap policy: {overlap}", None
+
+    if SCENE_ENGINE == "script":
+        return start_script_scene(palette, animation, rooms, brightness, overlap)
+
+    if palette.upper() not in PALETTES:
+        return False, f"Unknown palette: {palette}", None
+    if animation not in ANIMATIONS:
+        return False, f"Unknown animation: {animation}", None
+    if output not in ("rest", "stream"):
+        return False, f"Unknown output: {output}", None
+    motion = motion or SCENE_MOTION
+    if motion not in ("steps", "keyframes"):
+        return False, f"Unknown motion: {motion}", None
+
+    lights = get_ordered_lights_for_rooms(rooms)
+    if not lights:
+        return False, "No lights found in specified rooms", None
+
+    with scene_start_lock:
+        slowdown = admit_scene(animation, lights, overlap, palette=palette, motion=motion)
+        claim_lights(lights, overlap)
+
+        log(f"Starting scene: {palette} {animation} {brightness}% on {' '.join(rooms)}"
+            + (f" (slowed {slowdown:g}x to fit the bridge budget)" if slowdown > 1 else ""))
+        scene = new_scene(
+            palette=palette,
+            animation=animation,
+            brightness=brightness,
+            output=output,
+            motion=motion,
+            rooms=rooms,
+            light_ids=set(lights),
+            backed_off_lights=(backed_off_lights or set()) & set(lights),
+            slowdown=slowdown,
+        )
+        if scene_id:
+            scene["id"] = scene_id
+        scene["engine"] = SceneEngine(scene, palette, animation, lights, brightness, output, slowdown,
+                                      motion, hold)
+        register_scene(scene)
+        scene["engine"].start()
+    save_scene_state()  # Persist for recovery after restart
+    event_hub.publish("scene", scene_status())
+    log(f"Tracking {len(lights)} lights for override detection (scene {scene['id']})")
+    if slowdown > 1:
+        return True, f"Scene started, slowed {slowdown:g}x to fit the bridge budget", scene["id"]
+    return True, "Scene started", scene["id"]
+
+def start_script_scene(palette, animation, rooms, brightness=94, overlap=SCENE_OVERLAP):
+    """Start a scene animation via run-scene.sh"""
+    # Build command
+    script = SCRIPT_DIR / "run-scene.sh"
+    if not script.exists():
+        return False, f"Script not found: {script}", None
+
+    cmd = [str(script), palette, animation, str(brightness)] + rooms
+    log(f"Starting scene: {' '.join(cmd)}")
+
+    try:
+        # Get light IDs for the rooms being animated
+        light_ids = get_light_ids_for_rooms(rooms)
+        if animation in ANIMATIONS:
+            admit_scene(animation, light_ids, overlap, can_slow=False)  # Scripts run at fixed speed
+        claim_lights(light_ids, overlap)
+
+        # Start in new process group so we can kill all children
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=str(SCRIPT_DIR),
+            preexec_fn=os.setsid
+        )
+        scene = new_scene(
+            process=process,
+            pid=process.pid,
+            palette=palette,
+            animation=animation,
+            brightness=brightness,
+            rooms=rooms,
+            light_ids=light_ids,  # Fresh start, no backed-off lights
+        )
+        register_scene(scene)
+        process_supervisor.watch(process.pid, on_exit=functools.partial(stop_scene, scene["id"]))
+        save_scene_state()  # Persist for recovery after restart
+        event_hub.publish("scene", scene_status())
+        log(f"Tracking {len(light_ids)} lights for override detection (scene {scene['id']})")
+        return True, "Scene started", scene["id"]
+    except (SceneConflict, AdmissionRejected):
+        raise
+    except Exception as e:
+        return False, str(e), None
+
+# =============================================================================
+# SCHEDULES - Scene timelines fired from one timer heap
+# =============================================================================
+
+class TimerHeap:
+    """One thread running callbacks at wall-clock times
+
+    Timers sit in a heap ordered by due time and the thread sleeps on a
+    condition until the earliest is due (or an earlier one is added), so
+    pending timers cost nothing while idle however many there are.
+    Cancelled timers are dropped when they reach the top. Callbacks run on
+    the timer thread, so they must not block for long.
+    """
+
+    MAX_SLEEP_SECONDS = 60  # Re-check the clock at least this often (NTP/DST jumps)
+
+    def __init__(self):
+        self.heap = []  # (due time.time(), handle, callback)
+        self.cancelled = set()
+        self.next_handle = 0
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="TimerHeap", daemon=True)
+        self.thread.start()
+
+    def add(self, when, callback):
+        """Run callback() once time.time() reaches when; returns a handle for cancel()"""
+        with self.condition:
+            self.next_handle += 1
+            heapq.heappush(self.heap, (when, self.next_handle, callback))
+            if self.heap[0][1] == self.next_handle:
+                self.condition.notify()  # New earliest timer
+            return self.next_handle
+
+    def cancel(self, handle):
+        with self.condition:
+            if any(entry[1] == handle for entry in self.heap):
+                self.cancelled.add(handle)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.stopped:
+                        return
+                    while self.heap and self.heap[0][1] in self.cancelled:
+                        self.cancelled.discard(heapq.heappop(self.heap)[1])
+                    if self.heap and self.heap[0][0] <= time.time():
+                        break
+                    timeout = self.heap[0][0] - time.time() if self.heap else None
+                    self.condition.wait(min(timeout, self.MAX_SLEEP_SECONDS) if timeout is not None else None)
+                _, _, callback = heapq.heappop(self.heap)
+            try:
+                callback()
+            except Exception as e:
+                log(f"Schedule timer failed: {e}")
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.heap) - len(self.cancelled)
+
+def parse_cron_field(field, low, high):
+    """Values matched by one cron field: *, N, N-M, lists and /step"""
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"cron field {field!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+class CronTrigger:
+    """Standard five-field cron expression (minute hour day month weekday), local time"""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("cron needs five fields: minute hour day month weekday")
+        self.expression = expression
+        self.minutes = parse_cron_field(fields[0], 0, 59)
+        self.hours = parse_cron_field(fields[1], 0, 23)
+        self.days = set(parse_cron_field(fields[2], 1, 31))
+        self.months = set(parse_cron_field(fields[3], 1, 12))
+        self.weekdays = {day % 7 for day in parse_cron_field(fields[4], 0, 7)}  # 0 and 7 = Sunday
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+        self.next_after(datetime.now())  # Reject expressions that never fire
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok  # cron: either restricted field may match
+
+    def next_after(self, after):
+        """First matching minute strictly after `after`"""
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 8):  # Long enough to reach a 29 February
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"cron {self.expression!r} never fires")
+
+def parse_at(value):
+    """A one-shot trigger time as naive local time (timezone-aware values are converted)"""
+    if not isinstance(value, str):
+        raise ValueError("\"at\" must be an ISO 8601 time")
+    when = datetime.fromisoformat(value)
+    if when.tzinfo is not None:
+        when = when.astimezone().replace(tzinfo=None)
+    return when
+
+def validate_segment(segment, last):
+    """Check one timeline segment, raising ValueError with what is wrong"""
+    if str(segment.get("palette", "")).upper() not in PALETTES:
+        raise ValueError(f"Unknown palette: {segment.get('palette')}")
+    if segment.get("animation") not in ANIMATIONS:
+        raise ValueError(f"Unknown animation: {segment.get('animation')}")
+    rooms = segment.get("rooms")
+    if not rooms or any(room not in topology.room_lights for room in rooms):
+        raise ValueError(f"Unknown or missing rooms: {rooms}")
+    for key in ("brightness", "ramp_to"):
+        if key in segment and not 1 <= segment[key] <= 100:
+            raise ValueError(f"{key} must be 1-100")
+    duration = segment.get("duration")
+    if duration is None:
+        if not last:
+            raise ValueError("Only the last segment may run without a duration")
+        if "ramp_to" in segment:
+            raise ValueError("ramp_to needs a duration to ramp over")
+    elif duration <= 0:
+        raise ValueError("duration must be positive (seconds)")
+
+class ScheduleManager:
+    """Scheduled scene timelines, persisted to SCHEDULES_FILE
+
+    A schedule has a trigger - {"at": ISO local time} once, or {"cron":
+    "30 6 * * 1-5"} - and a timeline of segments, each a scene (palette,
+    animation, rooms, brightness, optional output/motion) that runs for
+    "duration" seconds before the next one starts. "ramp_to" fades the
+    segment's brightness there over its duration (sunrise). The scene stops
+    when the last segment's duration ends; a last segment without one keeps
+    running. Every trigger, segment change and ramp step is a timer on the
+    shared TimerHeap - no sleeping threads or processes per schedule.
+    """
+
+    def __init__(self):
+        self.schedules = {}  # id -> schedule as persisted
+        self.next_run = {}  # id -> (datetime, timer handle)
+        self.runs = {}  # id -> {"segment", "scene_id", "timers", "schedule", "started_at"} while playing
+        self.lock = threading.RLock()
+        self.timers = TimerHeap()
+
+    def start(self):
+        self.load()
+        self.timers.start()
+
+    def stop(self):
+        self.timers.stop()
+
+    def load(self):
+        if not SCHEDULES_FILE.exists():
+            return
+        try:
+            with open(SCHEDULES_FILE) as f:
+                saved = json.load(f).get("schedules", [])
+        except Exception as e:
+            log(f"Ignoring {SCHEDULES_FILE.name}: {e}")
+            return
+        with self.lock:
+            for schedule in saved:
+                try:
+                    self._validate(schedule)
+                except ValueError as e:
+                    log(f"Dropping schedule {schedule.get('name') or schedule.get('id')}: {e}")
+                    continue
+                self.schedules[schedule["id"]] = schedule
+                self._arm(schedule)
+            self.save()
+        if self.schedules:
+            log(f"Schedules: {len(self.schedules)} loaded")
+
+    def save(self):
+        with self.lock:
+            data = {"schedules": list(self.schedules.values())}
+        with open(SCHEDULES_FILE, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def _validate(self, schedule):
+        trigger = schedule.get("trigger") or {}
+        if "cron" in trigger:
+            CronTrigger(trigger["cron"])
+        elif "at" in trigger:
+            if parse_at(trigger["at"]) <= datetime.now():
+                raise ValueError("\"at\" is in the past")
+        else:
+            raise ValueError("trigger needs \"at\" or \"cron\"")
+        timeline = schedule.get("timeline")
+        if not timeline:
+            raise ValueError("timeline needs at least one segment")
+        for index, segment in enumerate(timeline):
+            validate_segment(segment, index == len(timeline) - 1)
+
+    def _arm(self, schedule):
+        """Set the timer for a schedule's next trigger"""
+        trigger = schedule["trigger"]
+        if "cron" in trigger:
+            when = CronTrigger(trigger["cron"]).next_after(datetime.now())
+        else:
+            when = parse_at(trigger["at"])
+        handle = self.timers.add(when.timestamp(), lambda: self._fire(schedule["id"]))
+        self.next_run[schedule["id"]] = (when, handle)
+
+    def create(self, spec):
+        """Add a schedule from an API request; raises ValueError if invalid"""
+        schedule = {
+            "id": uuid.uuid4().hex[:8],
+            "name": str(spec.get("name") or "")[:100],
+            "trigger": spec.get("trigger"),
+            "timeline": spec.get("timeline"),
+            "created_at": datetime.now().isoformat(),
+        }
+        self._validate(schedule)
+        with self.lock:
+            self.schedules[schedule["id"]] = schedule
+            self._arm(schedule)
+        self.save()
+        log(f"Schedule {schedule['id']} created, next run {self.next_run[schedule['id']][0].isoformat()}")
+        return schedule
+
+    def cancel(self, schedule_id):
+        """Remove a schedule and end its timeline if playing; False if unknown"""
+        with self.lock:
+            found = self.schedules.pop(schedule_id, None) is not None
+            pending = self.next_run.pop(schedule_id, None)
+            if pending:
+                self.timers.cancel(pending[1])
+            found = self._end_run(schedule_id) or found
+        if found:
+            self.save()
+            log(f"Schedule {schedule_id} cancelled")
+        return found
+
+    def _fire(self, schedule_id):
+        with self.lock:
+            schedule = self.schedules.get(schedule_id)
+            if schedule is None:
+                return
+            self.next_run.pop(schedule_id, None)
+            self._end_run(schedule_id)  # A cron timeline still playing is replaced
+            self.runs[schedule_id] = {"segment": None, "scene_id": None, "timers": [],
+                                      "schedule": schedule, "started_at": datetime.now().isoformat()}
+            log(f"Schedule {schedule_id} ({schedule['name'] or 'unnamed'}) starting")
+            if "cron" in schedule["trigger"]:
+                self._arm(schedule)
+            else:
+                del self.schedules[schedule_id]  # One-shot: the run carries on without it
+            self._start_segment(schedule_id, 0)
+        self.save()
+
+    def _start_segment(self, schedule_id, index):
+        run = self.runs.get(schedule_id)
+        if run is None:
+            return
+        run["timers"] = []
+        run["segment"] = index
+        segment = run["schedule"]["timeline"][index]
+        previous = run["scene_id"]
+        if previous and previous in scenes:
+            stop_scene(previous)
+        brightness = segment.get("brightness", 94)
+        try:
+            success, message, scene_id = start_scene(
+                segment["palette"], segment["animation"], segment["rooms"], brightness,
+                output=segment.get("output", "rest"), overlap="steal", motion=segment.get("motion"),
+                hold="ramp_to" in segment)  # A static segment must outlive its first frame to ramp
+        except (SceneConflict, AdmissionRejected) as e:
+            success, message, scene_id = False, str(e), None
+        if not success:
+            log(f"Schedule {schedule_id}: segment {index + 1} not started ({message})")
+        run["scene_id"] = scene_id
+
+        duration = segment.get("duration")
+        if duration is None:
+            return  # Last segment keeps running
+        now = time.time()
+        if scene_id and "ramp_to" in segment:
+            steps = max(1, int(duration // RAMP_STEP_SECONDS))
+            for step in range(1, steps + 1):
+                level = round(brightness + (segment["ramp_to"] - brightness) * step / steps)
+                run["timers"].append(self.timers.add(
+                    now + duration * step / steps,
+                    lambda scene_id=scene_id, level=level: set_scene_brightness(scene_id, level)))
+        if index + 1 < len(run["schedule"]["timeline"]):
+            follow = lambda: self._next_segment(schedule_id, index + 1)
+        else:
+            follow = lambda: self._finish(schedule_id)
+        run["timers"].append(self.timers.add(now + duration, follow))
+
+    def _next_segment(self, schedule_id, index):
+        with self.lock:
+            self._start_segment(schedule_id, index)
+
+    def _finish(self, schedule_id):
+        with self.lock:
+            if self._end_run(schedule_id):
+                log(f"Schedule {schedule_id} finished")
+
+    def _end_run(self, schedule_id):
+        """Cancel a playing timeline's timers and stop its scene"""
+        run = self.runs.pop(schedule_id, None)
+        if run is None:
+            return False
+        for handle in run["timers"]:
+            self.timers.cancel(handle)
+        if run["scene_id"] and run["scene_id"] in scenes:
+            stop_scene(run["scene_id"])
+        return True
+
+    def summary(self, schedule_id):
+        run = self.runs.get(schedule_id)
+        schedule = self.schedules.get(schedule_id) or run["schedule"]
+        pending = self.next_run.get(schedule_id)
+        return dict(schedule, id=schedule_id,
+                    next_run=pending[0].isoformat() if pending else None,
+                    running={"segment": run["segment"], "scene_id": run["scene_id"],
+                             "started_at": run["started_at"]} if run else None)
+
+    def list(self):
+        with self.lock:
+            return [self.summary(schedule_id) for schedule_id in {**self.schedules, **self.runs}]
+
+    def status(self):
+        with self.lock:
+            upcoming = min((when for when, _ in self.next_run.values()), default=None)
+            return {"schedules": len(self.schedules), "playing": len(self.runs),
+                    "timers": len(self.timers),
+                    "next_run": upcoming.isoformat() if upcoming else None}
+
+def set_scene_brightness(scene_id, brightness):
+    """Change a running native scene's brightness (schedule ramps)"""
+    scene = scenes.get(scene_id)
+    if scene and isinstance(scene.get("engine"), SceneEngine):
+        scene["engine"].set_brightness(brightness)
+
+schedule_manager = ScheduleManager()
+
+# =============================================================================
+# FEATURE REQUESTS - SQLite store with atomic votes and a cached listing
+# =============================================================================
 
-def load_feature_requests():
-    """Load feature requests from file"""
-    if not FEATURE_REQUESTS_FILE.exists():
-        return {"palette": [], "animation": []}
-    try:
-        with open(FEATURE_REQUESTS_FILE) as f:
-            return json.load(f)
-    except Exception:
-        return {"palette": [], "animation": []}
+FEATURE_REQUEST_TYPES = ("palette", "animation")
 
-def save_feature_requests(data):
-    """Save feature requests to file"""
-    with open(FEATURE_REQUESTS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+class FeatureRequestStore:
+    """Palette/animation requests from the panel, one SQLite row per request
 
-def is_process_running(pid):
-    """Check if a process is running and is our scene script"""
-    try:
-        # Check if process exists
-        os.kill(pid, 0)
-        # Verify it's our scene script using ps
-        result = subprocess.run(
-            ['ps', '-p', str(pid), '-o', 'command='],
-            capture_output=True, text=True
-        )
-        return 'run-scene' in result.stdout
-    except (OSError, ProcessLookupError):
-        return False
+    Votes are a single UPDATE ... SET votes = votes + 1, so concurrent
+    upvotes from the threaded server never lose writes. Listings come from
+    an index on (type, votes) and are cached in memory until the next write,
+    so the panel's polling doesn't touch the database.
+    """
 
-def kill_process_tree(pid):
-    """Kill a process and all its children"""
-    try:
-        # Get child PIDs using pgrep
-        result = subprocess.run(
-            ['pgrep', '-P', str(pid)],
-            capture_output=True, text=True
-        )
-        child_pids = [int(p) for p in result.stdout.strip().split() if p]
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = None
+        self.listing = None  # {"palette": [...], "animation": [...]}, sorted by votes
+        self.stats = {"cache_hits": 0, "cache_misses": 0}
 
-        # Kill children first
-        for child_pid in child_pids:
+    def _connect(self):
+        """Open the database on first use, importing the old JSON file once"""
+        if self.db is not None:
+            return self.db
+        db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("""CREATE TABLE IF NOT EXISTS feature_requests (
+                          id TEXT PRIMARY KEY,
+                          type TEXT NOT NULL,
+                          text TEXT NOT NULL,
+                          votes INTEGER NOT NULL DEFAULT 0,
+                          created_at TEXT NOT NULL)""")
+        db.execute("""CREATE INDEX IF NOT EXISTS feature_requests_by_votes
+                      ON feature_requests (type, votes DESC, created_at)""")
+        empty = db.execute("SELECT COUNT(*) FROM feature_requests").fetchone()[0] == 0
+        if empty and FEATURE_REQUESTS_FILE.exists():
             try:
-                os.kill(child_pid, signal.SIGTERM)
-            except (OSError, ProcessLookupError):
-                pass
+                with open(FEATURE_REQUESTS_FILE) as f:
+                    legacy = json.load(f)
+                rows = [(req["id"], req_type, req["text"], int(req.get("votes", 0)),
+                         req.get("createdAt") or datetime.now().isoformat())
+                        for req_type in FEATURE_REQUEST_TYPES for req in legacy.get(req_type, [])]
+                with db:
+                    db.execute("BEGIN")
+                    db.executemany("INSERT OR IGNORE INTO feature_requests VALUES (?, ?, ?, ?, ?)", rows)
+                log(f"Imported {len(rows)} feature requests from {FEATURE_REQUESTS_FILE.name}")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                log(f"Could not import {FEATURE_REQUESTS_FILE.name}: {e}")
+        self.db = db
+        return db
 
-        # Kill parent
-        os.kill(pid, signal.SIGTERM)
-        return True
-    except (OSError, ProcessLookupError):
-        return False
+    def create(self, req_type, text):
+        request_id = str(uuid.uuid4())
+        with self.lock:
+            self._connect().execute(
+                "INSERT INTO feature_requests (id, type, text, votes, created_at) VALUES (?, ?, ?, 0, ?)",
+                (request_id, req_type, text, datetime.now().isoformat()))
+            self.listing = None
+        return request_id
 
-def load_scene_state():
-    """Load and recover scene state from disk"""
-    global scene_state
+    def upvote(self, request_id):
+        """Add one vote; returns False if there is no such request"""
+        with self.lock:
+            cursor = self._connect().execute(
+                "UPDATE feature_requests SET votes = votes + 1 WHERE id = ?", (request_id,))
+            if cursor.rowcount:
+                self.listing = None
+            return cursor.rowcount > 0
 
-    if not STATE_FILE.exists():
-        return
+    def _load_listing(self):
+        """Every request grouped by type, most votes first (caller holds the lock)"""
+        if self.listing is not None:
+            self.stats["cache_hits"] += 1
+            return self.listing
+        self.stats["cache_misses"] += 1
+        listing = {req_type: [] for req_type in FEATURE_REQUEST_TYPES}
+        rows = self._connect().execute(
+            "SELECT type, id, text, votes, created_at FROM feature_requests "
+            "ORDER BY type, votes DESC, created_at")
+        for req_type, request_id, text, votes, created_at in rows:
+            listing.setdefault(req_type, []).append(
+                {"id": request_id, "text": text, "votes": votes, "createdAt": created_at})
+        self.listing = listing
+        return listing
 
-    try:
-        with open(STATE_FILE) as f:
-            state = json.load(f)
+    def all(self):
+        """The panel's view: {"palette": [...], "animation": [...]}"""
+        with self.lock:
+            return self._load_listing()
 
-        pid = state.get("pid")
-        if not pid:
-            STATE_FILE.unlink()
-            return
+    def page(self, req_type, offset=0, limit=50):
+        """One page of a type's requests, most votes first"""
+        with self.lock:
+            requests = self._load_listing().get(req_type, [])
+        return {"type": req_type, "total": len(requests), "offset": offset, "limit": limit,
+                "requests": requests[offset:offset + limit]}
 
-        # Check if process is still running and is our script
-        if is_process_running(pid):
-            log(f"Recovered running scene (PID: {pid})")
-            scene_state = {
-                "running": True,
-                "process": None,  # Can't recover subprocess object, but we have PID
-                "pid": pid,
-                "palette": state["palette"],
-                "animation": state["animation"],
-                "rooms": state["rooms"],
-                "light_ids": set(state.get("light_ids", [])),  # Restore as set
-                "backed_off_lights": set(state.get("backed_off_lights", [])),  # Restore as set
-                "started_at": state["started_at"],
-                "last_command_time": 0,
-            }
-            return
+    def status(self):
+        with self.lock:
+            counts = {req_type: len(requests) for req_type, requests in self.listing.items()} \
+                if self.listing is not None else None
+        return {**self.stats, "cached": counts is not None, "requests": counts}
 
-        # Process not running or not our script - clean up
-        log("Previous scene no longer running, cleaning up state")
-        STATE_FILE.unlink()
-    except Exception as e:
-        log(f"Error loading scene state: {e}")
-        if STATE_FILE.exists():
-            STATE_FILE.unlink()
+feature_requests = FeatureRequestStore(FEATURE_REQUESTS_DB)
+
+# =============================================================================
+# STATIC ASSETS - Files served from memory, precompressed, with ETags
+# =============================================================================
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
 
-def stop_scene():
-    """Stop any running scene animation"""
-    global scene_state
+def static_file_path(path):
+    """File for a static URL path, or None (same path rules as SimpleHTTPRequestHandler)"""
+    path = urllib.parse.unquote(path.split('?', 1)[0].split('#', 1)[0])
+    parts = [part for part in path.split('/') if part and part not in ('.', '..')]
+    file_path = Path(os.getcwd()).joinpath(*parts)
+    if file_path.is_dir():
+        file_path = file_path / "index.html"
+    return file_path if file_path.is_file() else None
 
-    # Handle process object (normal case)
-    if scene_state.get("process") and scene_state["process"].poll() is None:
+def accepted_encodings(header):
+    """Content codings a client accepts (q=0 excluded)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+class StaticAssets:
+    """Static files kept in memory with gzip (and brotli) variants
+
+    Each file is read and compressed once, then re-read only when its
+    mtime or size changes. Every variant carries a strong ETag, so a panel
+    reload on flaky Wi-Fi costs a 304 instead of the whole page.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.assets = {}  # Path -> {"key", "type", "variants": {coding: (body, etag)}}
+        self.stats = {"hits": 0, "loads": 0, "not_modified": 0}
+
+    def preload(self, names=STATIC_PRELOAD):
+        for name in names:
+            file_path = static_file_path("/" + name)
+            if file_path:
+                self._asset(file_path)
+
+    def _asset(self, file_path):
+        """The cached asset for a file, (re)loading it if it changed; None if too large"""
+        stat = file_path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            asset = self.assets.get(file_path)
+            if asset and asset["key"] == key:
+                self.stats["hits"] += 1
+                return asset
+        if stat.st_size > STATIC_MAX_CACHED_BYTES:
+            return None
+        data = file_path.read_bytes()
+        content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+        digest = hashlib.sha1(data).hexdigest()[:20]
+        variants = {"identity": (data, f'"{digest}"')}
+        if content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = {"gzip": gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(data)
+            for coding, body in compressed.items():
+                if len(body) < len(data):
+                    variants[coding] = (body, f'"{digest}-{coding}"')
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        asset = {"key": key, "type": content_type, "variants": variants}
+        with self.lock:
+            self.assets[file_path] = asset
+            self.stats["loads"] += 1
+        return asset
+
+    def response(self, path, accept_encoding=None, if_none_match=None):
+        """(status, body, content_type, headers) for a static path, or None if there is no file"""
+        file_path = static_file_path(path)
+        if file_path is None:
+            return None
         try:
-            os.killpg(os.getpgid(scene_state["process"].pid), signal.SIGTERM)
-        except ProcessLookupError:
-            pass
-        scene_state["process"].wait()
+            asset = self._asset(file_path)
+        except OSError:
+            return None
+        if asset is None:
+            content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+            return 200, file_path.read_bytes(), content_type, [("Cache-Control", "no-cache")]
 
-    # Handle recovered PID (after server restart)
-    elif scene_state.get("pid"):
-        if kill_process_tree(scene_state["pid"]):
-            log(f"Stopped recovered scene (PID: {scene_state['pid']})")
+        accepted = accepted_encodings(accept_encoding)
+        coding = next((c for c in ("br", "gzip") if c in accepted and c in asset["variants"]), "identity")
+        body, etag = asset["variants"][coding]
+        headers = [("ETag", etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if if_none_match and (if_none_match.strip() == "*" or etag in
+                              [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            with self.lock:
+                self.stats["not_modified"] += 1
+            return 304, b"", asset["type"], headers
+        if coding != "identity":
+            headers.append(("Content-Encoding", coding))
+        return 200, body, asset["type"], headers
 
-    scene_state = {
-        "running": False,
-        "process": None,
-        "pid": None,
-        "palette": None,
-        "animation": None,
-        "rooms": [],
-        "light_ids": set(),
-        "backed_off_lights": set(),
-        "started_at": None,
-        "last_command_time": 0,
+    def status(self):
+        with self.lock:
+            return {**self.stats, "files": len(self.assets),
+                    "bytes": sum(len(body) for asset in self.assets.values()
+                                 for body, _ in asset["variants"].values()),
+                    "brotli": brotli is not None}
+
+static_assets = StaticAssets()
+
+def feature_request_listing(path):
+    """GET /api/feature-requests[?type=palette&offset=0&limit=50]"""
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(path).query)
+    if "type" not in query:
+        return feature_requests.all(), 200
+    req_type = query["type"][0]
+    if req_type not in FEATURE_REQUEST_TYPES:
+        return {"error": f"Unknown type: {req_type!r}"}, 400
+    try:
+        offset = max(0, int(query.get("offset", ["0"])[0]))
+        limit = min(FEATURE_REQUEST_PAGE_MAX, max(1, int(query.get("limit", ["50"])[0])))
+    except ValueError:
+        return {"error": "offset and limit must be integers"}, 400
+    return feature_requests.page(req_type, offset, limit), 200
+
+# =============================================================================
+# API ROUTES - Shared by the threaded and asyncio servers
+# =============================================================================
+
+def check_scenes_alive():
+    """Clean up scenes whose engine/process ended (static scenes finish on their own)"""
+    with scenes_lock:
+        running = list(scenes.values())
+    for scene in running:
+        if scene.get("engine") and not scene["engine"].is_alive():
+            stop_scene(scene["id"])
+        elif scene.get("process") and scene["process"].poll() is not None:
+            stop_scene(scene["id"])  # Process ended, clean up state
+        # Check recovered PID is still running
+        elif scene.get("pid") and not scene.get("process"):
+            if not is_process_running(scene["pid"]):
+                stop_scene(scene["id"])
+
+def health_status():
+    return {
+        "status": "ok",
+        "server_mode": SERVER_MODE,
+        "bridge": HUE_BRIDGE,
+        "scene_running": bool(scenes),
+        "scenes_running": len(scenes),
+        "event_stream_connected": event_monitor.get("connected", False),
+        "lights_tracked": len(light_owner),
+        "admission": admission_status(),
+        "schedules": schedule_manager.status(),
+        "feature_requests": feature_requests.status(),
+        "processes": process_supervisor.status(),
+        "static": static_assets.status(),
+        "bridge_pool": bridge_pool.status(),
+        "scheduler": command_scheduler.status(),
+        "delta_cache": light_state_cache.status(),
+        "sse": event_hub.status(),
+        "mirror": resource_mirror.status(),
+        "bridge_reads": bridge_reads.status(),
+        "metrics": metrics.summary(),
     }
-    save_scene_state()  # Clear the state file
 
-def start_scene(palette, animation, rooms, brightness=94):
-    """Start a scene animation via run-scene.sh"""
-    global scene_state
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
 
-    # Stop any existing scene
-    stop_scene()
+def record_proxy_request(method, path, status, started):
+    """Count and time one proxied panel request"""
+    resource = resource_of_path(path)[0] or "other"
+    metrics.inc("hue_proxy_requests_total", method=method, resource=resource, status=status)
+    metrics.observe("hue_proxy_request_seconds", time.monotonic() - started,
+                    method=method, resource=resource)
 
-    # Build command
-    script = SCRIPT_DIR / "run-scene.sh"
-    if not script.exists():
-        return False, f"Script not found: {script}"
+def scheduler_series():
+    stats = command_scheduler.status()
+    return {(("outcome", outcome),): stats[outcome]
+            for outcome in ("queued", "sent", "coalesced", "dropped", "discarded", "errors")}
 
-    cmd = [str(script), palette, animation, str(brightness)] + rooms
-    log(f"Starting scene: {' '.join(cmd)}")
+def payload_caches():
+    with scenes_lock:
+        engines = [scene.get("engine") for scene in scenes.values()]
+    return [engine.rest.bodies for engine in engines
+            if isinstance(engine, SceneEngine) and engine.rest]
 
-    try:
-        # Get light IDs for the rooms being animated
-        light_ids = get_light_ids_for_rooms(rooms)
+def payload_cache_series():
+    caches = payload_caches()
+    hits = sum(cache.stats["hits"] for cache in caches)
+    lookups = hits + sum(cache.stats["misses"] for cache in caches)
+    return {(): hits / lookups} if lookups else {}
+
+def queue_depth_series():
+    depth = command_scheduler.status()["queue_depth"]
+    return {(("priority", priority),): count for priority, count in depth.items()}
+
+metrics.collector("hue_scheduler_commands_total", "counter",
+                  "Scheduler command outcomes", scheduler_series)
+metrics.collector("hue_scheduler_queue_depth", "gauge",
+                  "Commands waiting for a rate-limit token, by priority", queue_depth_series)
+metrics.collector("hue_scheduler_in_flight", "gauge", "Commands being sent to the bridge",
+                  lambda: {(): command_scheduler.status()["in_flight"]})
+metrics.collector("hue_delta_requests_saved_total", "counter",
+                  "Animation commands skipped because the bridge already had the state",
+                  lambda: {(): light_state_cache.status()["requests_saved"]})
+metrics.collector("hue_mirror_requests_total", "counter", "Resource mirror lookups by result",
+                  lambda: {(("result", result),): resource_mirror.status()[result]
+                           for result in ("hits", "misses")})
+metrics.collector("hue_bridge_read_cache_total", "counter",
+                  "Proxied bridge GETs by result (hit, miss = upstream read, merged = joined one in flight)",
+                  lambda: {(("result", result),): bridge_reads.status()[result]
+                           for result in ("hits", "misses", "merged")})
+metrics.collector("hue_bridge_pool_idle", "gauge", "Idle keep-alive bridge connections",
+                  lambda: {(): bridge_pool.status()["idle"]})
+metrics.collector("hue_eventstream_connected", "gauge", "1 while the bridge EventStream is connected",
+                  lambda: {(): int(event_monitor.get("connected", False))})
+metrics.collector("hue_sse_clients", "gauge", "Panels subscribed to /api/events",
+                  lambda: {(): event_hub.status()["clients"]})
+metrics.collector("hue_scenes_running", "gauge", "Running scenes",
+                  lambda: {(): len(scenes)})
+metrics.collector("hue_animated_lights", "gauge", "Lights owned by running scenes",
+                  lambda: {(): len(light_owner)})
+metrics.collector("hue_payload_cache_hit_ratio", "gauge",
+                  "Share of running scenes' command bodies served from cache", payload_cache_series)
+metrics.collector("hue_payload_cache_bytes", "gauge", "Encoded command bodies cached by scene engines",
+                  lambda: {(): sum(cache.size for cache in payload_caches())})
+metrics.collector("hue_animation_load", "gauge", "Projected animation commands/s across scenes",
+                  lambda: {(): admission_status()["in_use"]})
+
+def handle_api(method, path, body):
+    """Server-side API routes; returns (response, status) or None to fall through
+
+    Anything not handled here is proxied to the bridge (or served as a
+    static file). body is the raw request body or None.
+    """
+    if method == 'GET':
+        # Health check endpoint
+        if path == '/health':
+            return health_status(), 200
+
+        # Scene status endpoint (latest scene at top level, plus all scenes)
+        if path == '/api/scenes/status':
+            check_scenes_alive()
+            return scene_status(), 200
+
+        # Per-scene status
+        if path == '/api/scenes':
+            check_scenes_alive()
+            return {"scenes": scene_status()["scenes"]}, 200
+        if path.startswith('/api/scenes/'):
+            check_scenes_alive()
+            scene = scenes.get(path.split('/')[3])
+            if scene:
+                return scene_summary(scene), 200
+            return {"error": "Scene not found"}, 404
+
+        # Scheduled scene timelines
+        if path == '/api/schedules':
+            return {"schedules": schedule_manager.list()}, 200
+
+        # Feature requests endpoint
+        if path.split('?', 1)[0] == '/api/feature-requests':
+            return feature_request_listing(path)
+        return None
+
+    if method != 'POST':
+        return None
+
+    # Scene start endpoint
+    if path == '/api/scenes/start':
+        request = json.loads(body) if body else {}
+        palette = request.get('palette')
+        animation = request.get('animation')
+        rooms = request.get('rooms', [])
+        brightness = request.get('brightness', 94)
+        output = request.get('output', 'rest')  # 'rest' or 'stream'
+        overlap = request.get('overlap')  # 'steal' or 'reject', default SCENE_OVERLAP
+        motion = request.get('motion')  # 'steps' or 'keyframes', default SCENE_MOTION
+
+        if not palette or not animation or not rooms:
+            return {"error": "Missing palette, animation, or rooms"}, 400
+
+        try:
+            success, message, scene_id = start_scene(palette, animation, rooms, brightness,
+                                                     output=output, overlap=overlap, motion=motion)
+        except SceneConflict as e:
+            return {"error": str(e)}, 409
+        except AdmissionRejected as e:
+            return dict(e.details, error=str(e)), 429
+        if success:
+            return {"status": "started", "message": message, "id": scene_id}, 200
+        return {"error": message}, 500
+
+    # Scene stop endpoint - one scene by id, or all of them
+    if path == '/api/scenes/stop':
+        request = json.loads(body) if body else {}
+        if request.get('id'):
+            if not stop_scene(request['id']):
+                return {"error": "Scene not found"}, 404
+        else:
+            stop_scene()
+        return {"status": "stopped"}, 200
+    if path.startswith('/api/scenes/') and path.endswith('/stop'):
+        if not stop_scene(path.split('/')[3]):
+            return {"error": "Scene not found"}, 404
+        return {"status": "stopped"}, 200
+
+    # A whole frame of light states in one request
+    if path == '/api/lights/batch':
+        try:
+            request = json.loads(body) if body else {}
+        except ValueError:
+            return {"error": "Invalid JSON"}, 400
+        return apply_light_batch(request)
+
+    # Schedule a scene timeline / cancel one
+    if path == '/api/schedules':
+        try:
+            schedule = schedule_manager.create(json.loads(body) if body else {})
+        except (ValueError, TypeError, KeyError) as e:
+            return {"error": str(e)}, 400
+        return {"status": "created", "id": schedule["id"],
+                "next_run": schedule_manager.summary(schedule["id"])["next_run"]}, 200
+    if path.startswith('/api/schedules/') and path.endswith('/cancel'):
+        if not schedule_manager.cancel(path.split('/')[3]):
+            return {"error": "Schedule not found"}, 404
+        return {"status": "cancelled"}, 200
+
+    # Recompile room topology (after editing .rooms.json)
+    if path == '/api/rooms/reload':
+        compiled = reload_topology()
+        # Bit assignments can change, so rebuild the running scenes' masks
+        with scenes_lock:
+            for scene in scenes.values():
+                scene["light_mask"] = compiled.mask(scene["light_ids"])
+                scene["backed_off_mask"] = compiled.mask(scene["backed_off_lights"])
+        return {"status": "reloaded", "rooms": len(compiled.room_lights),
+                "lights": len(compiled.bit)}, 200
+
+    # Create feature request
+    if path == '/api/feature-requests':
+        request = json.loads(body) if body else {}
+        req_type = request.get('type')  # 'palette' or 'animation'
+        text = request.get('text', '').strip()[:2000]  # Max 2000 chars
+
+        if req_type not in FEATURE_REQUEST_TYPES or not text:
+            return {"error": "Invalid request"}, 400
+
+        request_id = feature_requests.create(req_type, text)
+        log(f"New {req_type} feature request: {text[:50]}...")
+        return {"status": "created", "id": request_id}, 200
+
+    # Upvote feature request
+    if path.startswith('/api/feature-requests/') and path.endswith('/upvote'):
+        request_id = path.split('/')[-2]
+
+        if feature_requests.upvote(request_id):
+            return {"status": "upvoted"}, 200
+        return {"error": "Request not found"}, 404
+
+    return None
+
+def apply_light_batch(request):
+    """Send a whole frame of light states from one /api/lights/batch request
+
+    request is {"lights": [{"id": light id, "state": CLIP v2 light state},
+    ...], "priority": optional scheduler priority}. Lights a scene has
+    backed off are skipped, and each touched scene's override debounce is
+    refreshed once for the batch. The commands fan out through the
+    scheduler (bounded by its rate limits and the bridge pool) and are
+    awaited together. Returns (response, status) with a result per light,
+    in request order.
+    """
+    if not isinstance(request, dict) or not isinstance(request.get("lights"), list):
+        return {"error": "Expected {\"lights\": [{\"id\": ..., \"state\": {...}}, ...]}"}, 400
+    items = request["lights"]
+    if len(items) > BATCH_MAX_LIGHTS:
+        return {"error": f"At most {BATCH_MAX_LIGHTS} lights per batch"}, 400
+    for item in items:
+        light_id = item.get("id") if isinstance(item, dict) else None
+        if not isinstance(light_id, str) or not light_id or any(c in light_id for c in '/?#'):
+            return {"error": f"Invalid light id: {light_id!r}"}, 400
+        if not isinstance(item.get("state"), dict):
+            return {"error": f"Missing state for light {light_id}"}, 400
+    priority = command_priority(request.get("priority"))
+
+    results = [None] * len(items)
+    tickets = []
+    touched = {}
+    skipped = 0
+    for index, item in enumerate(items):
+        light_id = item["id"]
+        scene = scene_for_light(light_id)
+        if scene is not None:
+            if light_id in scene["backed_off_lights"]:
+                results[index] = {"id": light_id, "status": 200, "skipped": "backed_off"}
+                skipped += 1
+                continue
+            touched[scene["id"]] = scene
+        try:
+            ticket = command_scheduler.submit('PUT', light_path(light_id),
+                                              encode_payload(item["state"]), priority)
+        except SchedulerFull as e:
+            results[index] = {"id": light_id, "status": 503, "error": str(e)}
+            continue
+        tickets.append((index, light_id, ticket))
+    now_ms = int(time.time() * 1000)
+    for scene in touched.values():
+        scene["last_command_time"] = now_ms
+    if skipped:
+        metrics.inc("hue_backed_off_skips_total", skipped, source="batch")
+
+    deadline = time.monotonic() + BRIDGE_TIMEOUT * 2
+    for index, light_id, ticket in tickets:
+        try:
+            status, data = ticket.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError as e:
+            results[index] = {"id": light_id, "status": 504, "error": str(e)}
+            continue
+        except Exception as e:
+            results[index] = {"id": light_id, "status": 502, "error": str(e)}
+            continue
+        if ticket.dropped:
+            results[index] = {"id": light_id, "status": 200, "skipped": "dropped"}
+            continue
+        result = {"id": light_id, "status": status}
+        try:
+            errors = json.loads(data).get("errors")
+        except (ValueError, AttributeError):
+            errors = None
+        if errors:
+            result["errors"] = errors
+        results[index] = result
+
+    failed = sum(1 for result in results if result["status"] >= 400)
+    return {"results": results, "sent": len(tickets), "skipped": skipped, "failed": failed}, 200
+
+def mirror_headers():
+    """Freshness headers for responses answered from the resource mirror"""
+    return [('X-Mirror-Synced-At', datetime.fromtimestamp(resource_mirror.synced_at).isoformat()),
+            ('X-Mirror-Age', f"{time.time() - resource_mirror.synced_at:.1f}")]
+
+def backed_off_response(method, path):
+    """Local reply for a PUT to a backed-off light, else None (forward it)
+
+    Also keeps the override debounce window current when animations route
+    their light commands through the server.
+    """
+    if method != 'PUT' or '/resource/light/' not in path:
+        return None
+    # Extract light_id from path: /api/clip/v2/resource/light/{id}
+    light_id = path.split('/resource/light/')[1].split('/')[0]
+    scene = scene_for_light(light_id)
+    if scene is None:
+        return None
+    if light_id in scene["backed_off_lights"]:
+        # Silently succeed - animation keeps running but we don't forward
+        metrics.inc("hue_backed_off_skips_total", source="proxy")
+        return {"data": [{"success": True}]}
+    scene["last_command_time"] = int(time.time() * 1000)
+    return None
 
-        # Start in new process group so we can kill all children
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            cwd=str(SCRIPT_DIR),
-            preexec_fn=os.setsid
-        )
-        scene_state = {
-            "running": True,
-            "process": process,
-            "pid": process.pid,
-            "palette": palette,
-            "animation": animation,
-            "rooms": rooms,
-            "light_ids": light_ids,
-            "backed_off_lights": set(),  # Fresh start, no backed-off lights
-            "started_at": datetime.now().isoformat(),
-            "last_command_time": int(time.time() * 1000),  # Track when we started
-        }
-        save_scene_state()  # Persist for recovery after restart
-        log(f"Tracking {len(light_ids)} lights for override detection")
-        return True, "Scene started"
-    except Exception as e:
-        return False, str(e)
 
 
 class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
@@ -556,233 +4290,546 @@ class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
 
 
 class HueProxyHandler(SimpleHTTPRequestHandler):
-    # 10 second timeout for bridge requests
+    # 10 second timeout for bridge requests (and idle keep-alive connections)
     timeout = 10
+    # Persistent connections: every response below carries a Content-Length
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this a kept-alive
+    # connection stalls on delayed ACKs
+    disable_nagle_algorithm = True
 
-    def send_json(self, data, status=200):
-        """Helper to send JSON response with CORS headers"""
+    def parse_request(self):
+        # One handler serves every request on a kept-alive connection
+        self.body_read, self.body = False, None
+        return super().parse_request()
+
+    def read_body(self):
+        """The request body (read once), so no early reply leaves it on a kept-alive socket"""
+        if not self.body_read:
+            self.body_read = True
+            content_length = int(self.headers.get('Content-Length', 0))
+            if self.headers.get('Transfer-Encoding'):
+                self.close_connection = True  # Chunked bodies aren't read - don't reuse the socket
+            self.body = self.rfile.read(content_length) if content_length > 0 else None
+        return self.body
+
+    def send_body(self, status, data, content_type='application/json', extra_headers=()):
+        """Send a complete response with CORS headers"""
         self.send_response(status)
-        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
         self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in extra_headers:
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(data)
+
+    def send_json(self, data, status=200):
+        """Helper to send JSON response with CORS headers"""
+        self.send_body(status, json.dumps(data).encode())
 
     def do_OPTIONS(self):
         """Handle CORS preflight"""
+        self.read_body()
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-Command-Priority')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_GET(self):
+        self.read_body()
         # Redirect root to control panel
         if self.path == '/' or self.path == '':
             self.send_response(302)
             self.send_header('Location', '/control-panel.html')
+            self.send_header('Content-Length', '0')
             self.end_headers()
             return
 
-        # Health check endpoint
-        if self.path == '/health':
-            self.send_json({
-                "status": "ok",
-                "bridge": HUE_BRIDGE,
-                "scene_running": scene_state["running"],
-                "event_stream_connected": event_monitor.get("connected", False),
-                "lights_tracked": len(scene_state.get("light_ids", set())),
-            })
+        # Prometheus scrape
+        if self.path == '/metrics':
+            self.send_body(200, metrics.render(), METRICS_CONTENT_TYPE)
             return
 
-        # Scene status endpoint
-        if self.path == '/api/scenes/status':
-            # Check if process is still running
-            if scene_state.get("process") and scene_state["process"].poll() is not None:
-                stop_scene()  # Process ended, clean up state
-            # Check recovered PID is still running
-            elif scene_state.get("pid") and not scene_state.get("process"):
-                if not is_process_running(scene_state["pid"]):
-                    stop_scene()
-
-            # Compute backed-off rooms for status display
-            backed_off_rooms = []
-            for room in BASE_ROOMS:
-                room_lights = set(ROOM_LIGHTS.get(room, []))
-                backed_off = scene_state.get("backed_off_lights", set())
-                if room_lights and room_lights <= backed_off:
-                    backed_off_rooms.append(room)
-
-            self.send_json({
-                "running": scene_state["running"],
-                "palette": scene_state["palette"],
-                "animation": scene_state["animation"],
-                "rooms": scene_state["rooms"],
-                "started_at": scene_state["started_at"],
-                "backed_off_rooms": backed_off_rooms,
-                "backed_off_lights_count": len(scene_state.get("backed_off_lights", set())),
-            })
+        # Server-side API routes (health, scenes, feature requests)
+        response = handle_api('GET', self.path, None)
+        if response:
+            self.send_json(*response)
             return
 
-        # Feature requests endpoint
-        if self.path == '/api/feature-requests':
-            data = load_feature_requests()
-            self.send_json(data)
+        # Live scene/light updates for control panels
+        if self.path == '/api/events':
+            self.stream_events()
             return
 
+        # Mirrored bridge resources are answered from memory
+        if self.path.startswith('/api/clip/v2/resource/'):
+            data = resource_mirror.get(self.path[4:])
+            if data is not None:
+                self.send_body(200, data, extra_headers=mirror_headers())
+                return
+
         # Proxy to Hue bridge
         if self.path.startswith('/api/'):
             self.proxy_request('GET')
+            return
+
+        # Static files from memory (304 when the panel already has them)
+        response = static_assets.response(self.path, self.headers.get('Accept-Encoding'),
+                                          self.headers.get('If-None-Match'))
+        if response:
+            status, data, content_type, extra_headers = response
+            self.send_body(status, data, content_type, extra_headers)
         else:
-            # Serve static files
-            super().do_GET()
+            self.send_json({"error": "Not found"}, 404)
 
     def do_PUT(self):
+        self.read_body()
         if self.path.startswith('/api/'):
             self.proxy_request('PUT')
+        else:
+            self.send_json({"error": "Not found"}, 404)
 
     def do_POST(self):
-        # Scene start endpoint
-        if self.path == '/api/scenes/start':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = json.loads(self.rfile.read(content_length)) if content_length > 0 else {}
+        body = self.read_body()
 
-            palette = body.get('palette')
-            animation = body.get('animation')
-            rooms = body.get('rooms', [])
-            brightness = body.get('brightness', 94)
+        # Server-side API routes (scenes, rooms, feature requests)
+        response = handle_api('POST', self.path, body)
+        if response:
+            self.send_json(*response)
+            return
 
-            if not palette or not animation or not rooms:
-                self.send_json({"error": "Missing palette, animation, or rooms"}, 400)
-                return
+        # Proxy to Hue bridge
+        if self.path.startswith('/api/'):
+            self.proxy_request('POST', body)
+        else:
+            self.send_json({"error": "Not found"}, 404)
+
+    def stream_events(self):
+        """Server-Sent Events: current scene, then live scene/backoff/light events"""
+        client = event_hub.subscribe()
+        self.close_connection = True  # The stream has no length; it ends with the connection
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.wfile.write(encode_sse("scene", scene_status()))
+            self.wfile.flush()
+            while True:
+                try:
+                    message = client.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    message = b": heartbeat\n\n"  # Keeps proxies and phones from idling out
+                self.wfile.write(message)
+                self.wfile.flush()
+        except OSError:
+            pass  # Client went away
+        finally:
+            event_hub.unsubscribe(client)
+
+    def proxy_request(self, method, body=None):
+        """Proxy request to Hue bridge with timeout"""
+        started = time.monotonic()
+        if body is None:
+            body = self.read_body()
+        filtered = backed_off_response(method, self.path)
+        if filtered:
+            self.send_json(filtered)
+            record_proxy_request(method, self.path, 200, started)
+            return
+
+        # Remove /api prefix to get bridge path
+        bridge_path = self.path[4:]  # Remove '/api'
 
-            success, message = start_scene(palette, animation, rooms, brightness)
-            if success:
-                self.send_json({"status": "started", "message": message})
+        try:
+            if method == 'PUT':
+                # State changes go through the rate-limited scheduler
+                priority = command_priority(self.headers.get('X-Command-Priority'))
+                ticket = command_scheduler.submit(method, bridge_path, body, priority)
+                status, data = ticket.wait(timeout=BRIDGE_TIMEOUT * 2)
+                if ticket.dropped:
+                    status, data = 200, DROPPED_COMMAND_RESPONSE
+            elif method == 'GET':
+                # Merged with identical in-flight GETs, cached for slow-changing resources
+                status, data = bridge_reads.request(bridge_path)
             else:
-                self.send_json({"error": message}, 500)
+                # Pooled keep-alive connection, 10 second timeout on bridge requests
+                status, data = bridge_pool.request(method, bridge_path, body)
+            if method != 'GET':
+                bridge_reads.invalidate(resource_of_path(bridge_path)[0])  # Don't serve our own stale read
+
+            self.send_body(status, data)
+        except SchedulerFull as e:
+            status = 503
+            self.send_json({"error": str(e)}, status)
+        except Exception as e:
+            status = 500
+            log(f"Bridge error: {e}")
+            self.send_json({"error": str(e)}, status)
+        record_proxy_request(method, self.path, status, started)
+
+    def log_message(self, format, *args):
+        """Custom logging with timestamps"""
+        msg = str(args[0]) if args else ''
+        if '/api/' in msg or '/health' in msg:
+            log(f"[API] {msg}")
+        # Suppress static file logs
+
+
+# =============================================================================
+# ASYNCIO SERVER - SERVER_MODE=asyncio
+# =============================================================================
+
+class AsyncEventClient:
+    """EventHub client for the asyncio server
+
+    Behaves like the bounded queue EventHub expects (put_nowait/get_nowait,
+    raising queue.Full/queue.Empty) but wakes the event loop instead of a
+    blocked thread, since publish() runs on scheduler and monitor threads.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.messages = collections.deque()
+        self.lock = threading.Lock()
+        self.ready = asyncio.Event()
+
+    def put_nowait(self, message):
+        with self.lock:
+            if len(self.messages) >= SSE_CLIENT_QUEUE:
+                raise queue.Full
+            self.messages.append(message)
+        try:
+            self.loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            pass  # Loop already closed (shutting down)
+
+    def get_nowait(self):
+        with self.lock:
+            if not self.messages:
+                raise queue.Empty
+            return self.messages.popleft()
+
+    def drain(self):
+        with self.lock:
+            messages = list(self.messages)
+            self.messages.clear()
+        return messages
+
+async def await_ticket(ticket, timeout):
+    """Async CommandTicket.wait(): no thread is parked while the command is queued"""
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def settle():
+        if not done.done():
+            done.set_result(None)
+
+    ticket.add_done_callback(lambda _: loop.call_soon_threadsafe(settle))
+    try:
+        await asyncio.wait_for(done, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError("Timed out waiting for bridge scheduler") from None
+    return ticket.wait(0)
+
+async def read_http_headers(reader):
+    """Header block after a request/status line, as a lowercase-keyed dict"""
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+async def read_http_body(reader, headers):
+    """Yield a message body as it arrives (chunked, sized or until close)"""
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0], 16)
+            if size == 0:
+                await read_http_headers(reader)  # Trailers
+                return
+            yield await reader.readexactly(size)
+            await reader.readline()  # CRLF after each chunk
+    elif 'content-length' in headers:
+        yield await reader.readexactly(int(headers['content-length']))
+    else:
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                return
+            yield chunk
+
+async def async_event_stream_monitor():
+    """EventStream monitor as an asyncio task (same consumers as the thread)"""
+    host, _, port = HUE_BRIDGE.partition(':')
+    decoder = SSEDecoder()
+    attempts = 0
+
+    while True:
+        writer = None
+        try:
+            log("EventStream: Connecting to bridge...")
+            if attempts:
+                metrics.inc("hue_eventstream_reconnects_total")
+            attempts += 1
+            reader, writer = await asyncio.open_connection(
+                host, int(port or 443), ssl=bridge_pool.ssl_context)
+            request = [
+                "GET /eventstream/clip/v2 HTTP/1.1",
+                f"Host: {HUE_BRIDGE}",
+                f"hue-application-key: {HUE_API_KEY}",
+                "Accept: text/event-stream",
+            ]
+            if decoder.last_event_id:
+                request.append(f"Last-Event-ID: {decoder.last_event_id}")
+            writer.write(("\r\n".join(request) + "\r\n\r\n").encode())
+            await writer.drain()
+
+            status_line = await reader.readline()
+            headers = await read_http_headers(reader)
+            if status_line.split(b' ', 2)[1:2] != [b'200']:
+                raise OSError(f"EventStream returned {status_line.decode('latin-1').strip()}")
+
+            event_monitor["connected"] = True
+            log("EventStream: Connected, monitoring for overrides")
+            resource_mirror.request_resync()  # Events may have been missed while down
+            bridge_reads.invalidate()
+
+            decoder.reset()
+            loop = asyncio.get_running_loop()
+            async for chunk in read_http_body(reader, headers):
+                # Consumers may block briefly (backoff stops a scene), so run
+                # them off the loop - awaited, so events stay in order
+                await loop.run_in_executor(None, process_stream_chunk, decoder, chunk)
+            event_monitor["connected"] = False
+        except asyncio.CancelledError:
+            event_monitor["connected"] = False
+            log("EventStream: Monitor stopped")
+            raise
+        except Exception as e:
+            event_monitor["connected"] = False
+            delay = decoder.retry_ms / 1000 if decoder.retry_ms else 5
+            log(f"EventStream: Connection error: {e}, reconnecting in {delay:g}s...")
+            await asyncio.sleep(delay)
+        finally:
+            if writer:
+                writer.close()
+
+class AsyncHueServer:
+    """Single event loop serving the same routes as HueProxyHandler
+
+    Connections are HTTP/1.1 keep-alive and cost no thread while idle or
+    while waiting on the bridge: proxied PUTs await their scheduler ticket,
+    other bridge requests run on the bridge executor (one thread per pooled
+    connection), and SSE clients are plain coroutines. At most
+    ASYNC_MAX_REQUESTS requests are processed at once; SSE streams are not
+    counted against that limit.
+    """
+
+    def __init__(self, host, port, max_requests=ASYNC_MAX_REQUESTS):
+        self.host = host
+        self.port = port
+        self.slots = asyncio.Semaphore(max_requests)
+        self.server = None
+        self.stopping = None
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.stopping.set)
+
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                                 reuse_address=True, backlog=128)
+        monitor = asyncio.create_task(async_event_stream_monitor())
+        try:
+            await self.stopping.wait()
+        finally:
+            log("Shutting down...")
+            monitor.cancel()
+            self.server.close()
+            schedule_manager.stop()
+            await loop.run_in_executor(None, stop_scene)
+            bridge_pool.close()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), ASYNC_KEEPALIVE_SECONDS)
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    self.respond(writer, 400, {"error": "Bad request"}, keep_alive=False)
+                    break
+                headers = await read_http_headers(reader)
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                transfer_encoding = headers.get('transfer-encoding', '').lower()
+                if transfer_encoding == 'chunked':
+                    body = b''.join([chunk async for chunk in read_http_body(reader, headers)]) or None
+                elif transfer_encoding:
+                    # Can't find where this body ends - don't read the next request from it
+                    body, keep_alive = None, False
+                else:
+                    length = int(headers.get('content-length') or 0)
+                    body = await reader.readexactly(length) if length > 0 else None
+
+                if method == 'GET' and path == '/api/events':
+                    await self.stream_events(writer)
+                    break
+
+                async with self.slots:
+                    await self.route(method, path, headers, body, writer, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            log(f"Async server error: {e}")
+        finally:
+            writer.close()
+
+    def respond(self, writer, status, data=b'', content_type='application/json',
+                extra_headers=(), keep_alive=True):
+        """Write a complete response; dicts/lists are sent as JSON"""
+        if not isinstance(data, bytes):
+            data = json.dumps(data).encode()
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(data)}",
+                 "Access-Control-Allow-Origin: *",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in extra_headers]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + data)
+
+    async def route(self, method, path, headers, body, writer, keep_alive):
+        loop = asyncio.get_running_loop()
+
+        if method == 'OPTIONS':
+            # CORS preflight
+            self.respond(writer, 200, keep_alive=keep_alive, extra_headers=[
+                ('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS'),
+                ('Access-Control-Allow-Headers', 'Content-Type, X-Command-Priority')])
             return
 
-        # Scene stop endpoint
-        if self.path == '/api/scenes/stop':
-            stop_scene()
-            self.send_json({"status": "stopped"})
+        # Redirect root to control panel
+        if method == 'GET' and path in ('/', ''):
+            self.respond(writer, 302, extra_headers=[('Location', '/control-panel.html')],
+                         keep_alive=keep_alive)
             return
 
-        # Create feature request
-        if self.path == '/api/feature-requests':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = json.loads(self.rfile.read(content_length)) if content_length > 0 else {}
+        # Prometheus scrape
+        if method == 'GET' and path == '/metrics':
+            self.respond(writer, 200, metrics.render(), METRICS_CONTENT_TYPE, keep_alive=keep_alive)
+            return
 
-            req_type = body.get('type')  # 'palette' or 'animation'
-            text = body.get('text', '').strip()[:2000]  # Max 2000 chars
+        # Server-side API routes - scene start/stop can block briefly, so off the loop
+        response = await loop.run_in_executor(None, handle_api, method, path, body)
+        if response:
+            data, status = response
+            self.respond(writer, status, data, keep_alive=keep_alive)
+            return
 
-            if req_type not in ['palette', 'animation'] or not text:
-                self.send_json({"error": "Invalid request"}, 400)
+        # Mirrored bridge resources are answered from memory
+        if method == 'GET' and path.startswith('/api/clip/v2/resource/'):
+            data = resource_mirror.get(path[4:])
+            if data is not None:
+                self.respond(writer, 200, data, extra_headers=mirror_headers(), keep_alive=keep_alive)
                 return
 
-            data = load_feature_requests()
-            new_request = {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "votes": 0,
-                "createdAt": datetime.now().isoformat()
-            }
-            data[req_type].append(new_request)
-            save_feature_requests(data)
-
-            log(f"New {req_type} feature request: {text[:50]}...")
-            self.send_json({"status": "created", "id": new_request["id"]})
+        if path.startswith('/api/') and method in ('GET', 'PUT', 'POST'):
+            status, data = await self.proxy(method, path, headers, body)
+            self.respond(writer, status, data, keep_alive=keep_alive)
             return
 
-        # Upvote feature request
-        if self.path.startswith('/api/feature-requests/') and self.path.endswith('/upvote'):
-            request_id = self.path.split('/')[-2]
-
-            data = load_feature_requests()
-            found = False
-            for req_type in ['palette', 'animation']:
-                for req in data[req_type]:
-                    if req['id'] == request_id:
-                        req['votes'] += 1
-                        found = True
-                        break
-                if found:
-                    break
-
-            if found:
-                save_feature_requests(data)
-                self.send_json({"status": "upvoted"})
+        if method == 'GET':
+            # Unchanged files are a stat() away from memory; new or changed ones load off the loop
+            response = await loop.run_in_executor(
+                None, static_assets.response, path,
+                headers.get('accept-encoding'), headers.get('if-none-match'))
+            if response:
+                status, data, content_type, extra_headers = response
+                self.respond(writer, status, data, content_type, extra_headers, keep_alive=keep_alive)
             else:
-                self.send_json({"error": "Request not found"}, 404)
+                self.respond(writer, 404, {"error": "Not found"}, keep_alive=keep_alive)
             return
 
-        # Proxy to Hue bridge
-        if self.path.startswith('/api/'):
-            self.proxy_request('POST')
+        self.respond(writer, 501, {"error": f"Unsupported method ({method})"}, keep_alive=keep_alive)
 
-    def proxy_request(self, method):
-        """Proxy request to Hue bridge with timeout"""
-        global scene_state
-
-        # Filter backed-off lights - silently succeed without forwarding to bridge
-        if method == 'PUT' and '/resource/light/' in self.path:
-            # Extract light_id from path: /api/clip/v2/resource/light/{id}
-            parts = self.path.split('/resource/light/')
-            if len(parts) > 1:
-                light_id = parts[1].split('/')[0]
-                if light_id in scene_state.get("backed_off_lights", set()):
-                    # Silently succeed - animation keeps running but we don't forward
-                    self.send_json({"data": [{"success": True}]})
-                    return
-
-            # Track light commands for override detection
-            # This keeps the debounce window current when animations route through the server
-            scene_state["last_command_time"] = int(time.time() * 1000)
-
-        # Remove /api prefix and build bridge URL
-        bridge_path = self.path[4:]  # Remove '/api'
-        url = f"https://{HUE_BRIDGE}{bridge_path}"
-
-        # Read request body if present
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length) if content_length > 0 else None
-
-        # Create request to bridge
-        req = urllib.request.Request(url, data=body, method=method)
-        req.add_header('hue-application-key', HUE_API_KEY)
-        req.add_header('Content-Type', 'application/json')
-
-        # Disable SSL verification (bridge uses self-signed cert)
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-
-        try:
-            # 10 second timeout on bridge requests
-            with urllib.request.urlopen(req, context=ctx, timeout=10) as response:
-                data = response.read()
-
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(data)
-        except urllib.error.HTTPError as e:
-            self.send_response(e.code)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(e.read())
+    async def proxy(self, method, path, headers, body):
+        """Forward to the bridge; returns (status, response body)"""
+        started = time.monotonic()
+        status, data = await self._proxy(method, path, headers, body)
+        record_proxy_request(method, path, status, started)
+        return status, data
+
+    async def _proxy(self, method, path, headers, body):
+        filtered = backed_off_response(method, path)
+        if filtered:
+            return 200, filtered
+        bridge_path = path[4:]  # Remove '/api'
+        try:
+            if method == 'PUT':
+                # State changes go through the rate-limited scheduler
+                priority = command_priority(headers.get('x-command-priority'))
+                ticket = command_scheduler.submit(method, bridge_path, body, priority)
+                status, data = await await_ticket(ticket, BRIDGE_TIMEOUT * 2)
+                if ticket.dropped:
+                    status, data = 200, DROPPED_COMMAND_RESPONSE
+            elif method == 'GET' and bridge_reads.cacheable_type(bridge_path):
+                cached = bridge_reads.cached(bridge_path)
+                if cached:
+                    return cached
+                # Merged reads wait on the leader, so keep them off the bridge executor
+                status, data = await asyncio.get_running_loop().run_in_executor(
+                    None, bridge_reads.request, bridge_path)
+            else:
+                status, data = await asyncio.get_running_loop().run_in_executor(
+                    bridge_executor, bridge_pool.request, method, bridge_path, body)
+            if method != 'GET':
+                bridge_reads.invalidate(resource_of_path(bridge_path)[0])  # Don't serve our own stale read
+            return status, data
+        except SchedulerFull as e:
+            return 503, {"error": str(e)}
         except Exception as e:
             log(f"Bridge error: {e}")
-            self.send_json({"error": str(e)}, 500)
+            return 500, {"error": str(e)}
 
-    def log_message(self, format, *args):
-        """Custom logging with timestamps"""
-        msg = str(args[0]) if args else ''
-        if '/api/' in msg or '/health' in msg:
-            log(f"[API] {msg}")
-        # Suppress static file logs
+    async def stream_events(self, writer):
+        """Server-Sent Events, as HueProxyHandler.stream_events"""
+        client = AsyncEventClient(asyncio.get_running_loop())
+        event_hub.subscribe(client)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n"
+                         b"Connection: close\r\n\r\n")
+            writer.write(encode_sse("scene", scene_status()))
+            await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(client.ready.wait(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")  # Keeps proxies and phones from idling out
+                else:
+                    client.ready.clear()
+                    for message in client.drain():
+                        writer.write(message)
+                await writer.drain()
+        except ConnectionError:
+            pass  # Client went away
+        finally:
+            event_hub.unsubscribe(client)
 
 
 def main():
@@ -791,8 +4838,18 @@ def main():
     # Recover scene state from previous run
     load_scene_state()
 
-    # Start EventStream monitor for override detection
-    start_event_monitor()
+    # Arm scheduled timelines
+    schedule_manager.start()
+
+    # Keep the control panel in memory, compressed
+    static_assets.preload()
+
+    # Start EventStream monitor for override detection (a task in asyncio mode)
+    if SERVER_MODE != "asyncio":
+        start_event_monitor()
+
+    # Mirror bridge light/room state so panel GETs don't hit the bridge
+    resource_mirror.start()
 
     # Get local IP for display (socket already imported at top)
     try:
@@ -803,10 +4860,7 @@ def main():
     except Exception:
         local_ip = "your-ip"
 
-    # Bind to all interfaces for LAN access
-    server = ThreadingHTTPServer(('0.0.0.0', PORT), HueProxyHandler)
-
-    log("Server starting...")
+    log(f"Server starting ({SERVER_MODE})...")
     print(f"""
 ╔═══════════════════════════════════════════════════════════════╗
 ║              Hue Control Panel Server                         ║
@@ -819,11 +4873,22 @@ def main():
 ╚═══════════════════════════════════════════════════════════════╝
 """)
 
+    if SERVER_MODE == "asyncio":
+        # Bind to all interfaces for LAN access; handles SIGTERM/Ctrl+C itself
+        asyncio.run(AsyncHueServer('0.0.0.0', PORT).serve())
+        log("Server stopped.")
+        return
+
+    # Bind to all interfaces for LAN access
+    server = ThreadingHTTPServer(('0.0.0.0', PORT), HueProxyHandler)
+
     # Handle graceful shutdown
     def shutdown_handler(signum, frame):
         log("Shutting down...")
         stop_event_monitor()
+        schedule_manager.stop()
         stop_scene()
+        bridge_pool.close()
         server.shutdown()
 
     signal.signal(signal.SIGTERM, shutdown_handler)
@@ -833,6 +4898,7 @@ def main():
     except KeyboardInterrupt:
         log("Server stopped.")
         stop_event_monitor()
+        schedule_manager.stop()
         stop_scene()
 
 if __name__ == '__main__':